@@ -0,0 +1,180 @@
+# cli.py - U盘自动化测试系统命令行入口（无界面，可用于 Linux 测试架 / CI）
+import argparse
+import json
+import os
+import sys
+
+from utils.logger import Logger
+from utils.test_runner import TEST_REGISTRY, DEFAULT_TESTS, TestRunner, make_usb_info, resolve_tests
+from utils.device_scheduler import DeviceScheduler
+from utils.device_watcher import DeviceWatcher
+from utils.usb_detector import get_detector
+from utils.report_writer import ReportWriter
+from utils.results_db import record_history
+from constants import MULTI_DEVICE_MAX_WORKERS, MULTI_DEVICE_MAX_PER_HUB, REPORT_DIR, HISTORY_DB_FILE
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="U盘自动化测试（命令行模式）")
+    parser.add_argument("--path", action="append",
+                        help="U盘挂载路径，如 /media/usb 或 E:\\；可重复指定多台设备并行测试")
+    parser.add_argument("--hub", action="append",
+                        help="与 --path 一一对应的 Hub/控制器标识，用于限制同一 Hub 下的并发")
+    parser.add_argument("--max-workers", type=int, default=MULTI_DEVICE_MAX_WORKERS,
+                        help=f"多设备测试时同时测试的设备数上限（默认 {MULTI_DEVICE_MAX_WORKERS}）")
+    parser.add_argument("--max-per-hub", type=int, default=MULTI_DEVICE_MAX_PER_HUB,
+                        help=f"同一 Hub 下同时测试的设备数上限（默认 {MULTI_DEVICE_MAX_PER_HUB}，0 表示不限）")
+    parser.add_argument("--watch", action="store_true",
+                        help="持续监视热插拔，新插入并挂载的U盘自动加入并行测试（Ctrl+C 停止接收新设备）")
+    parser.add_argument("--tests", help=f"逗号分隔的测试项，默认: {','.join(DEFAULT_TESTS)}")
+    parser.add_argument("--all", action="store_true", help="执行全部测试项（包括耗时较长的扩展测试）")
+    parser.add_argument("--list", action="store_true", help="列出可用测试项后退出")
+    parser.add_argument("--job-file",
+                        help="自定义负载测试的任务文件（TOML/JSON）；未指定 --tests 时只执行自定义负载测试")
+    parser.add_argument("--output", help="把 JSON 结果写入指定文件")
+    parser.add_argument("--json", action="store_true", help="把 JSON 结果输出到标准输出（日志输出到标准错误）")
+    parser.add_argument("--report-dir", default=REPORT_DIR,
+                        help=f"结构化报告目录（.jsonl 事件流 + .json 汇总，默认 {REPORT_DIR}）")
+    parser.add_argument("--no-report", action="store_true", help="不生成结构化报告文件")
+    parser.add_argument("--history-db", default=HISTORY_DB_FILE,
+                        help=f"历史结果数据库（用于性能回退检测，默认 {HISTORY_DB_FILE}）")
+    parser.add_argument("--no-history", action="store_true", help="不保存历史结果、不做回退检测")
+    parser.add_argument("--no-cleanup", action="store_true", help="测试结束后不执行全局清理")
+    return parser.parse_args(argv)
+
+
+# 从检测结果补充到 --path 设备上的硬件信息
+_HARDWARE_FIELDS = ("model", "vendor", "serial", "size_gb", "device_path", "volume_path", "filesystem", "hub", "controller")
+
+
+def _hardware_info(paths):
+    """
+    按挂载路径匹配检测到的U盘（路径可以是挂载点下的子目录）。
+
+    Returns:
+        list[dict]: 与 paths 一一对应的硬件信息，未检测到时为空字典。
+    """
+    try:
+        detected = [d for d in get_detector().find_usb_drives() if d.get("path")]
+    except Exception:
+        detected = []
+    infos = []
+    for path in paths:
+        path = os.path.abspath(path)
+        best = None
+        for device in detected:
+            mount = os.path.abspath(device["path"])
+            if os.path.commonpath([path, mount]) == mount and (best is None or len(mount) > len(best["path"])):
+                best = device
+        infos.append({k: best[k] for k in _HARDWARE_FIELDS if best and best.get(k) is not None})
+    return infos
+
+
+def _on_device_event(scheduler, logger, event, device):
+    """监视模式：已挂载的新设备加入调度（插入后才完成挂载时会收到 changed 事件）"""
+    if event == "error":
+        logger.log_message(f"⚠️ 设备枚举失败: {device}", "WARNING")
+        return
+    if event not in ("added", "changed") or not device.get("path"):
+        return
+    try:
+        extra = {k: v for k, v in device.items() if v is not None and k != "path"}
+        scheduler.add_device(make_usb_info(device["path"], **extra))
+    except OSError as e:
+        logger.log_message(f"⚠️ 无法访问新设备 {device['path']}: {e}", "WARNING")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.list:
+        for spec in TEST_REGISTRY.values():
+            suffix = "（扩展）" if spec.extended else ""
+            print(f"{spec.id:<16}{spec.name}{suffix}")
+        return 0
+
+    if not args.path and not args.watch:
+        print("错误: 必须通过 --path 指定U盘挂载路径（或使用 --watch 自动发现）", file=sys.stderr)
+        return 2
+
+    try:
+        if args.all:
+            test_ids = list(TEST_REGISTRY)
+        elif args.tests:
+            test_ids = resolve_tests([t.strip() for t in args.tests.split(",") if t.strip()])
+        elif args.job_file:
+            test_ids = ["workload"]
+        else:
+            test_ids = DEFAULT_TESTS
+        options = {}
+        if args.job_file:
+            from tests.workload_test import resolve_job_file
+            from utils.workload import load_job_file
+            load_job_file(resolve_job_file(args.job_file))  # 启动前校验任务文件
+            options["workload"] = {"job_file": args.job_file}
+        paths = args.path or []
+        hubs = args.hub or []
+        if hubs and len(hubs) != len(paths):
+            raise ValueError("--hub 的个数必须与 --path 相同")
+        infos = _hardware_info(paths)
+        for i, hub in enumerate(hubs):
+            infos[i]["hub"] = hub
+        devices = [make_usb_info(path, **info) for path, info in zip(paths, infos)]
+    except (ValueError, OSError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+
+    logger = Logger()
+    writer = None if args.no_report else ReportWriter(args.report_dir)
+    try:
+        if len(devices) == 1 and not args.watch:
+            runner = TestRunner(devices[0], logger, listener=writer, cleanup=not args.no_cleanup,
+                                options=options)
+            report = runner.run(test_ids)
+            if not args.no_history:
+                record_history(report, logger, args.history_db)
+                if writer:
+                    writer.write_summary(report)  # 汇总中补充回退检测结果
+        else:
+            try:
+                scheduler = DeviceScheduler(devices, logger, max_workers=args.max_workers,
+                                            max_per_hub=args.max_per_hub, cleanup=not args.no_cleanup,
+                                            listener=writer.device_listener if writer else None,
+                                            watch=args.watch, options=options)
+            except ValueError as e:
+                print(f"错误: {e}", file=sys.stderr)
+                return 2
+            watcher = None
+            if args.watch:
+                watcher = DeviceWatcher()
+                watcher.add_listener(lambda event, device: _on_device_event(scheduler, logger, event, device))
+                watcher.start()
+                logger.log_message("正在监视U盘热插拔，按 Ctrl+C 停止接收新设备")
+            try:
+                report = scheduler.run(test_ids)
+            finally:
+                if watcher:
+                    watcher.stop()
+            if not args.no_history:
+                for key, device_report in report["devices"].items():
+                    if "device" in device_report:
+                        record_history(device_report, logger, args.history_db)
+            if writer:
+                writer.write_summary(report)
+    finally:
+        if writer:
+            writer.close()
+            logger.log_message(f"结构化报告: {writer.summary_path}（事件流: {writer.events_path}）")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2, default=str)
+        print()
+
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
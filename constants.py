@@ -7,11 +7,116 @@ DRIVE_FIXED = 3
 # 测试配置
 TEST_DIR_NAME = "USBTestData"
 REPORT_FILE = "usb_test_report.json"
+REPORT_DIR = "reports"  # 结果报告目录（每次运行生成 .jsonl 事件流 + .json 汇总）
+REPORT_SCHEMA_VERSION = 1  # 报告结构版本，结构变化时递增
 SMALL_FILE_SIZE = 1024  # 1KB
 MEDIUM_FILE_SIZE = 1024 * 1024  # 1MB
 LARGE_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 STRESS_TEST_DURATION = 30  # 秒
+STRESS_WORKERS = 4  # 压力测试并发工作者数量
+STRESS_WORKER_MODE = "thread"  # thread（线程）或 process（进程，绕开 GIL）
+STRESS_FILE_SIZE = 64 * 1024  # 每次写-读-删循环的文件大小（原为 1KB，改为 64KB 使 MB/s 有意义）
+STRESS_FSYNC = True  # 每次写入后 fsync 并丢弃页缓存，使写入与读回都真正到达设备
 STABILITY_TEST_DURATION = 60  # 1分钟
+INTEGRITY_FILE_COUNT = 50  # 完整性测试文件数
+INTEGRITY_FILE_SIZE = SMALL_FILE_SIZE  # 完整性测试单个文件大小
 
 # 字母表用于驱动器检测
-DRIVE_LETTERS = string.ascii_uppercase
\ No newline at end of file
+DRIVE_LETTERS = string.ascii_uppercase
+
+# 直接I/O配置（绕过页缓存）
+DIRECT_IO_ALIGNMENT = 4096  # 缓冲区/偏移/长度对齐粒度
+DIRECT_IO_BLOCK_SIZE = 4 * 1024 * 1024  # 4MB 对齐读写块
+
+# 测试数据生成器配置
+PATTERN_BASE_SIZE = 1024 * 1024  # 1MB 种子基准块（循环复用）
+PATTERN_SECTOR_SIZE = 4096  # 每 4KB 扇区写入唯一的 (扇区号, 种子) 标记
+
+# 随机I/O（IOPS）测试配置
+RANDOM_IO_BLOCK_SIZE = 4096  # 4KB 随机块
+RANDOM_IO_QUEUE_DEPTH = 32  # 多队列深度（同时在途请求数）
+RANDOM_IO_READ_RATIO = 0.7  # 混合读写时读操作占比
+RANDOM_IO_REGION_SIZE = 256 * 1024 * 1024  # 预分配的测试区域 256MB
+RANDOM_IO_DURATION = 10  # 每个测试点持续秒数
+
+# 块大小扫描测试配置
+BLOCK_SWEEP_SIZES = [4 * 1024, 16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024]
+BLOCK_SWEEP_POINT_DURATION = 3  # 每个块大小的读/写各自最多持续秒数
+BLOCK_SWEEP_MAX_BYTES = 512 * 1024 * 1024  # 每个测试点最多写入 512MB
+
+# 写入吞吐采样（检测 SLC 缓存耗尽）
+THROUGHPUT_SAMPLE_INTERVAL = 0.25  # 采样间隔（秒）
+THROUGHPUT_CLIFF_RATIO = 0.6  # 稳态速度低于初始速度的 60% 视为出现掉速断崖
+
+# 内存映射I/O测试（性能测试中的 mmap 模式）
+PERF_MMAP_ENABLED = True  # 性能测试是否包含 mmap 缺页读写测试
+PERF_MMAP_SIZE = 512 * 1024 * 1024  # 映射的测试区域大小
+PERF_MMAP_RANDOM_DURATION = 10  # 随机逐页访问持续秒数
+
+# 文件复制引擎与复制策略测试
+COPY_CHUNK_SIZE = 8 * 1024 * 1024  # 每次复制/读写的块大小（各策略复用同一大小的缓冲区）
+COPY_PIPELINE_DEPTH = 2  # 流水线复制的缓冲区数量（2 即双缓冲）
+COPY_PROGRESS_BYTES = 500 * 1024 * 1024  # 每复制 500MB 报告一次进度
+COPY_BENCH_SIZE = 512 * 1024 * 1024  # 复制策略测试的源文件大小
+COPY_BENCH_SOURCE_DIR = None  # 主机端源文件目录，None 表示系统临时目录
+
+# 预分配与追加写入对比测试
+PREALLOC_BENCH_SIZE = 256 * 1024 * 1024  # 每种写入方式的数据量
+
+# 声明式负载测试（任务文件）
+WORKLOAD_JOB_FILE = "jobs/default.toml"  # 默认任务文件（相对路径先在运行目录中查找，其次在程序目录中查找）
+WORKLOAD_SPACE_RESERVE = 64 * 1024 * 1024  # 检查剩余空间时额外预留的空间
+
+# 全盘容量校验（扩容盘/假容量检测）
+CAPACITY_BLOCK_SIZE = 1024 * 1024  # 自校验块大小（含块头）
+CAPACITY_BATCH_SIZE = 16 * 1024 * 1024  # 每次 I/O 的批量大小
+CAPACITY_FILE_SIZE = 1024 * 1024 * 1024  # 单个填充文件 1GB（兼容 FAT32 4GB 限制）
+CAPACITY_PIPELINE_DEPTH = 4  # 流水线缓冲区数量
+CAPACITY_RESERVE_BYTES = 16 * 1024 * 1024  # 预留给文件系统元数据的空间
+
+# 快速容量抽样探测（扩容盘快速筛查）
+CAPACITY_PROBE_COUNT = 256  # 分层随机探测点数量
+CAPACITY_PROBE_BLOCK_SIZE = 4096  # 探测块大小
+CAPACITY_PROBE_SKIP_BYTES = 1024 * 1024  # 跳过卷开头的引导扇区/文件分配表区域
+CAPACITY_PROBE_MIN_WRAP = 256 * 1024 * 1024  # 检测的最小回绕周期（为每个探测点在 2 的幂周期下放置影子探测点）
+
+# 文件校验引擎（完整性/兼容性测试共用）
+HASH_ALGORITHM = "sha256"  # 可选 sha256 / blake2b / crc32
+HASH_BUFFER_SIZE = 4 * 1024 * 1024  # 每次读取 4MB（复用缓冲区）
+HASH_PIPELINE_DEPTH = 2  # 双缓冲：读取与哈希计算重叠
+HASH_WORKERS = 4  # 并行校验的文件数（hashlib 计算时会释放 GIL）
+
+# 多设备并行测试
+MULTI_DEVICE_MAX_WORKERS = 8  # 同时运行测试的设备（工作进程）数上限
+MULTI_DEVICE_MAX_PER_HUB = 2  # 同一 Hub/控制器下同时测试的设备数上限，避免带宽互相挤占
+
+# 小文件元数据性能测试
+METADATA_FILE_COUNT = 10000  # 文件总数（可配置到 100000）
+METADATA_DIR_FAN_OUT = 1  # 文件分散到的子目录数（1 即全部放在同一目录）
+METADATA_SAMPLE_SIZE = 1000  # 每个检查点上 stat/open/rename 抽样的文件数
+
+# 界面日志
+LOG_DIR = "logs"  # 完整日志文件目录（相对于程序运行目录）
+LOG_FLUSH_INTERVAL_MS = 100  # 界面按固定帧率批量刷新日志（毫秒）
+LOG_MAX_VISIBLE_LINES = 5000  # 日志框最多保留的行数（更早的行只保留在日志文件中）
+
+# 历史结果数据库（回归检测）
+HISTORY_DB_FILE = "usb_test_history.db"  # SQLite 数据库文件
+HISTORY_REGRESSION_MARGIN = 0.15  # 低于历史中位数 15% 视为性能回退
+HISTORY_MIN_SAMPLES = 3  # 至少有这么多条历史记录才进行比较
+HISTORY_WINDOW = 20  # 只与最近 N 次记录比较
+
+# 测试文件清单（按清单清理，不再扫描目录）
+MANIFEST_DIR_NAME = ".manifest"  # 清单目录（位于U盘测试目录下，每个测试一个清单文件）
+CLEANUP_WORKERS = 8  # 并行删除文件的线程数
+
+# 热插拔设备监视
+DEVICE_WATCH_SETTLE_S = 0.5  # 收到设备事件后等待事件平息再枚举（一次插拔会产生一串事件）
+DEVICE_WATCH_POLL_INTERVAL_S = 1.0  # Windows 下比较盘符位图的间隔（一次系统调用，不做枚举）
+DEVICE_WATCH_FALLBACK_RESCAN_S = 10  # 无法订阅系统事件时的定期重新枚举间隔
+DEVICE_WATCH_UI_INTERVAL_MS = 200  # 界面取出设备变化事件的间隔
+
+# 启动耗时预算（startup_benchmark.py 检查）
+STARTUP_IMPORT_BUDGET_MS = 100  # 第一帧之前导入 main 与设备选择页的耗时上限
+STARTUP_FIRST_FRAME_BUDGET_MS = 300  # 从进程启动到第一帧绘制完成的耗时上限
+STARTUP_BENCHMARK_RUNS = 5  # 取中位数的启动次数
@@ -1,19 +1,22 @@
 # main.py - U盘自动化测试系统主入口
 import tkinter as tk
 from tkinter import messagebox
-import ctypes
+import importlib
 import os
 import sys
 
-# 导入页面模块
-from pages.device_selection import DeviceSelectionPage
-from pages.test_setup import TestSetupPage
+# 页面模块按需导入："页面名": "模块:类名"（测试页面及其测试引擎在第一次进入时才加载）
+PAGE_CLASSES = {
+    "DeviceSelectionPage": "pages.device_selection:DeviceSelectionPage",
+    "TestSetupPage": "pages.test_setup:TestSetupPage",
+}
 
 
 # ================== 权限检查：确保以管理员身份运行 ==================
 def is_admin():
     """检查是否以管理员权限运行"""
     try:
+        import ctypes
         return ctypes.windll.shell32.IsUserAnAdmin()
     except:
         return False
@@ -23,6 +26,7 @@ def run_as_admin():
     """若非管理员，则重新启动程序并请求提权"""
     if is_admin():
         return True
+    import ctypes
     script = os.path.abspath(sys.argv[0])
     try:
         ret = ctypes.windll.shell32.ShellExecuteW(
@@ -39,11 +43,6 @@ def run_as_admin():
         sys.exit(1)
 
 
-if not is_admin():
-    run_as_admin()
-    sys.exit()
-
-
 # ================== 主应用控制器 ==================
 class USBTestApp:
     def __init__(self, root):
@@ -64,37 +63,33 @@ class USBTestApp:
         self.container.grid_rowconfigure(0, weight=1)
         self.container.grid_columnconfigure(0, weight=1)
 
-        # 页面字典
+        # 页面字典（页面在第一次显示时才创建）
         self.pages = {}
 
-        # 创建所有页面
-        self.create_pages()
-
-        # 默认显示设备选择页
-        self.show_page("DeviceSelectionPage")
-
-    def create_pages(self):
-        """动态导入并创建所有页面"""
-        page_classes = {
-            "DeviceSelectionPage": DeviceSelectionPage,
-            "TestSetupPage": TestSetupPage,
-        }
-
-        for page_name, PageClass in page_classes.items():
-            try:
-                page = PageClass(parent=self.container, controller=self)
-                self.pages[page_name] = page
-                page.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-            except Exception as e:
-                messagebox.showerror("初始化失败", f"无法创建页面 {page_name}: {str(e)}")
-                self.root.destroy()
-                return
+        # 先让窗口显示出来，再创建默认的设备选择页（设备枚举在后台线程中进行）
+        self.root.after_idle(self.show_page, "DeviceSelectionPage")
+
+    def create_page(self, page_name):
+        """动态导入并创建页面，失败时返回 None"""
+        try:
+            module_name, _, class_name = PAGE_CLASSES[page_name].partition(":")
+            PageClass = getattr(importlib.import_module(module_name), class_name)
+            page = PageClass(parent=self.container, controller=self)
+        except Exception as e:
+            messagebox.showerror("初始化失败", f"无法创建页面 {page_name}: {str(e)}")
+            self.root.destroy()
+            return None
+        self.pages[page_name] = page
+        page.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        return page
 
     def show_page(self, page_name):
         """切换到指定页面"""
-        if page_name not in self.pages:
+        if page_name not in PAGE_CLASSES:
             messagebox.showerror("页面错误", f"未找到页面：{page_name}")
             return
+        if page_name not in self.pages and self.create_page(page_name) is None:
+            return
 
         # 隐藏所有页面
         for page in self.pages.values():
@@ -139,6 +134,11 @@ class USBTestApp:
 
 # ================== 程序启动 ==================
 if __name__ == "__main__":
+    # 仅在 Windows 下以图形界面启动时请求管理员权限（命令行模式见 cli.py）
+    if os.name == "nt" and not is_admin():
+        run_as_admin()
+        sys.exit()
+
     root = tk.Tk()
     app = USBTestApp(root)
     root.mainloop()
\ No newline at end of file
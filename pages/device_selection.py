@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import wmi  # 用于获取U盘硬件信息
-import ctypes
-import string
+import queue
+from utils.usb_detector import filesystem_uuid, get_detector
+from utils.device_watcher import DeviceWatcher, default_key
+from constants import DEVICE_WATCH_UI_INTERVAL_MS
+
+_EMPTY_ROW = "__empty__"
 
 
 class DeviceSelectionPage(ttk.Frame):
@@ -10,10 +13,18 @@ class DeviceSelectionPage(ttk.Frame):
         super().__init__(parent)
         self.controller = controller
         self.selected_device = None  # 存储选中的U盘信息
-        self.usb_drives = []        # 存储所有检测到的U盘
+        self.usb_drives = {}        # 表格行 id -> 检测到的U盘
 
         self.setup_ui()
-        self.refresh_devices()
+        self.tree.insert("", "end", iid=_EMPTY_ROW, values=("正在扫描U盘设备...", "", ""))
+
+        # 后台监视热插拔：WMI 扫描不再阻塞界面线程，设备变化时只推送差异
+        self.device_events = queue.SimpleQueue()
+        self.detector = get_detector()
+        self.watcher = DeviceWatcher(scan=self.get_usb_drives)
+        self.watcher.add_listener(lambda event, device: self.device_events.put((event, device)))
+        self.watcher.start()
+        self.after(DEVICE_WATCH_UI_INTERVAL_MS, self.process_device_events)
 
     def setup_ui(self):
         """构建UI界面"""
@@ -77,114 +88,51 @@ class DeviceSelectionPage(ttk.Frame):
         self.exit_btn.grid(row=0, column=2, padx=10)
 
     def get_usb_drives(self):
-        """使用WMI扫描所有U盘设备"""
-        try:
-            c = wmi.WMI()
-            disk_drives = c.Win32_DiskDrive()
-            usb_drives = []
-
-            for disk in disk_drives:
-                # 判断是否为USB可移动磁盘
-                if (disk.MediaType and "removable" in disk.MediaType.lower()) and \
-                   (disk.InterfaceType and disk.InterfaceType.lower() == "usb"):
-
-                    model = disk.Model.strip() if disk.Model else "Unknown"
-                    size_gb = 0
-                    if disk.Size:
-                        try:
-                            size_gb = int(disk.Size) / (1024 ** 3)
-                        except (ValueError, TypeError):
-                            size_gb = 0
-
-                    status = disk.Status if disk.Status else "Unknown"
-
-                    usb_drives.append({
-                        "model": model,
-                        "size_gb": round(size_gb, 2),
-                        "status": status,
-                        "device_id": disk.DeviceID  # 用于后续关联盘符（可选）
-                    })
-
-            return usb_drives
-        except Exception as e:
-            messagebox.showerror("扫描错误", f"无法访问WMI服务：\n{str(e)}")
-            return []
+        """扫描所有U盘设备（在设备监视线程中调用，出错时抛出异常）"""
+        return self.detector.find_usb_drives()
 
     def refresh_devices(self):
-        """刷新设备列表"""
-        # 清空表格
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # 重新扫描
-        self.usb_drives = self.get_usb_drives()
-
-        if self.usb_drives:
-            for drive in self.usb_drives:
-                self.tree.insert("", "end", values=(
-                    drive["model"],
-                    f"{drive['size_gb']:.2f}",
-                    drive["status"]
-                ))
-        else:
-            self.tree.insert("", "end", values=("未检测到U盘设备", "", ""))
-            self.start_btn.config(state="disabled")
+        """请求后台重新扫描设备（结果通过设备变化事件更新表格）"""
+        self.watcher.request_refresh()
 
-    def get_actual_usb_drive(self):
-        """获取真实U盘盘符和路径"""
+    def process_device_events(self):
+        """在界面线程中取出设备监视器推送的变化并增量更新表格"""
         try:
-            print("正在扫描可移动设备...")
-            found_drives = []
-            
-            # 获取所有可移动磁盘
-            for letter in string.ascii_uppercase:
-                drive_path = f"{letter}:\\"
-                drive_type = ctypes.windll.kernel32.GetDriveTypeW(drive_path)
-                
-                # 检查是否为可移动设备（类型2）
-                if drive_type == 2:  # DRIVE_REMOVABLE
-                    try:
-                        # 检查磁盘是否可访问
-                        import os
-                        if os.path.exists(drive_path):
-                            # 获取磁盘信息
-                            import shutil
-                            usage = shutil.disk_usage(drive_path)
-                            free_gb = usage.free / (1024**3)
-                            total_gb = usage.total / (1024**3)
-                            
-                            drive_info = {
-                                "drive": f"{letter}:",
-                                "path": drive_path,
-                                "free_gb": free_gb,
-                                "total_gb": total_gb
-                            }
-                            found_drives.append(drive_info)
-                            # 移除个人设备信息框，静默收集信息
-                    except Exception as e:
-                        print(f"检查磁盘 {letter}: 时出错: {e}")
-                        continue
-            
-            if not found_drives:
-                messagebox.showerror("错误", "未检测到任何可移动设备（U盘）")
-                return None
-            
-            # 如果有多个可移动设备，选择第一个（静默处理）
-            selected_drive = found_drives[0]
-            # 静默返回，不显示额外信息框
-            
-            return selected_drive
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"获取U盘路径失败: {e}")
-            return None
+            while True:
+                event, device = self.device_events.get_nowait()
+                if event == "error":
+                    messagebox.showerror("扫描错误", f"无法枚举U盘设备：\n{device}")
+                    continue
+                iid = str(default_key(device))
+                if event in ("removed", "changed") and iid in self.usb_drives:
+                    del self.usb_drives[iid]
+                    self.tree.delete(iid)
+                    if self.selected_device is not None and default_key(self.selected_device) == default_key(device):
+                        self.selected_device = None
+                        self.start_btn.config(state="disabled")
+                if event in ("added", "changed"):
+                    self.usb_drives[iid] = device
+                    self.tree.insert("", "end", iid=iid, values=(
+                        device["model"],
+                        f"{device['size_gb']:.2f}",
+                        device["status"]
+                    ))
+        except queue.Empty:
+            pass
+
+        has_devices = bool(self.usb_drives)
+        if has_devices and self.tree.exists(_EMPTY_ROW):
+            self.tree.delete(_EMPTY_ROW)
+        elif not has_devices and not self.tree.exists(_EMPTY_ROW):
+            self.tree.insert("", "end", iid=_EMPTY_ROW, values=("未检测到U盘设备", "", ""))
+            self.start_btn.config(state="disabled")
+        self.after(DEVICE_WATCH_UI_INTERVAL_MS, self.process_device_events)
 
     def on_select(self, event):
         """处理设备选择事件"""
         selected_items = self.tree.selection()
-        if selected_items:
-            index = self.tree.index(selected_items[0])
-            self.selected_device = self.usb_drives[index]
+        if selected_items and selected_items[0] in self.usb_drives:
+            self.selected_device = self.usb_drives[selected_items[0]]
             self.start_btn.config(state="normal")
 
     def start_test(self):
@@ -193,30 +141,37 @@ class DeviceSelectionPage(ttk.Frame):
             messagebox.showwarning("提示", "请先选择一个U盘设备！")
             return
 
-        # ✅ 获取真实U盘盘符和路径
-        usb_drive_info = self.get_actual_usb_drive()
-        if not usb_drive_info:
-            messagebox.showerror("错误", "无法获取U盘真实路径，请检查U盘是否正常连接。")
+        # 检测结果中已包含该设备对应的分区盘符/挂载路径
+        device = self.selected_device
+        if not device.get("path"):
+            messagebox.showerror("错误", "该U盘没有可访问的分区（未分配盘符或未挂载），请检查U盘是否正常连接。")
             return
         
         # 将设备信息传递给主控制器（controller）
         usb_info = {
-            "model": self.selected_device["model"],
-            "size_gb": self.selected_device["size_gb"],
-            "status": self.selected_device["status"],
-            "drive": usb_drive_info["drive"],  # 真实盘符
-            "path": usb_drive_info["path"],    # 真实路径
-            "label": self.selected_device["model"]  # 可用作名称显示
+            "model": device["model"],
+            "size_gb": device["size_gb"],
+            "status": device["status"],
+            "drive": device["drive"],  # 真实盘符 / 分区设备
+            "path": device["path"],    # 真实路径
+            "label": device["model"],  # 可用作名称显示
+            "serial": device.get("serial"),  # 用于历史结果的设备指纹
+            "fs_uuid": filesystem_uuid(device["path"]),
+            "device_path": device.get("device_path"),
+            "volume_path": device.get("volume_path"),
+            "hub": device.get("hub"),
+            "controller": device.get("controller"),
         }
 
         # 显示统一的确认信息并提供选项
+        free_gb = device.get("free_space_gb")
         device_info = (
             f"U盘设备信息：\n"
-            f"型号：{self.selected_device['model']}\n"
-            f"容量：{self.selected_device['size_gb']:.2f}GB\n"
-            f"盘符：{usb_drive_info['drive']}\n"
-            f"路径：{usb_drive_info['path']}\n"
-            f"可用空间：{usb_drive_info['free_gb']:.2f}GB\n\n"
+            f"型号：{device['model']}\n"
+            f"容量：{device['size_gb']:.2f}GB\n"
+            f"盘符：{device['drive']}\n"
+            f"路径：{device['path']}\n"
+            f"可用空间：{f'{free_gb:.2f}GB' if free_gb is not None else '未知'}\n\n"
             f"是否开始测试？"
         )
         
@@ -234,6 +189,7 @@ class DeviceSelectionPage(ttk.Frame):
     def exit_application(self):
         """安全退出应用程序"""
         try:
+            self.watcher.stop()
             # 销毁窗口并退出程序
             self.controller.root.quit()
             self.controller.root.destroy()
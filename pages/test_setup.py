@@ -4,16 +4,11 @@ from tkinter import ttk, messagebox
 import threading
 from typing import Dict, Optional
 
-# 导入测试模块
-from tests.compatibility_test import CompatibilityTest
-from tests.integrity_test import IntegrityTest
-from tests.performance_test import PerformanceTest
-from tests.stress_test import StressTest
-from tests.stability_test import StabilityTest
+# 导入测试引擎（测试模块、报告与历史数据库在开始测试时才加载）
+from utils.test_runner import TEST_REGISTRY, TestRunner
 
 # 导入日志工具
 from utils.logger import Logger
-from utils.test_cleaner import TestCleaner
 
 
 class TestSetupPage(ttk.Frame):
@@ -49,16 +44,13 @@ class TestSetupPage(ttk.Frame):
         options_frame = ttk.LabelFrame(left_frame, text="选择测试项目")
         options_frame.pack(fill=tk.X, padx=10, pady=10)
 
-        self.test_options = [
-            "数据兼容性测试",
-            "数据完整性测试",
-            "性能测试",
-            "压力测试",
-            "稳定性测试"
-        ]
+        self.test_options = [spec.name for spec in TEST_REGISTRY.values()]
+
+        # 耗时较长的扩展基准测试默认不勾选
+        self.extended_tests = {spec.name for spec in TEST_REGISTRY.values() if spec.extended}
 
         for option in self.test_options:
-            var = tk.BooleanVar(value=True)
+            var = tk.BooleanVar(value=option not in self.extended_tests)
             chk = ttk.Checkbutton(options_frame, text=option, variable=var)
             chk.pack(anchor=tk.W, padx=8, pady=2)
             self.selected_tests[option] = var
@@ -143,6 +135,10 @@ class TestSetupPage(ttk.Frame):
 
         # 记录日志 - 添加空值检查
         if self.logger:
+            if self.logger.text_handler:
+                self.logger.text_handler.clear()
+            log_path = self.logger.start_file_log()
+            self.logger.log_message(f"完整日志文件: {log_path}", "INFO")
             self.logger.log_message(f"开始测试设备: {usb_info['model']}", "INFO")
             self.logger.log_message(f"测试项目: {', '.join(selected_names)}", "INFO")
             self.logger.log_message("-" * 50, "INFO")
@@ -157,48 +153,17 @@ class TestSetupPage(ttk.Frame):
         thread.start()
 
     def run_all_tests(self, usb_info, selected_names):
-        """在子线程中运行所有测试"""
+        """在子线程中通过测试引擎运行所有测试"""
+        from utils.report_writer import ReportWriter
+        from utils.results_db import record_history
         try:
-            test_classes = {
-                "数据兼容性测试": CompatibilityTest,
-                "数据完整性测试": IntegrityTest,
-                "性能测试": PerformanceTest,
-                "压力测试": StressTest,
-                "稳定性测试": StabilityTest,
-            }
-
-            all_passed = True
-            for name in selected_names:
-                cls = test_classes.get(name)
-                if cls:
-                    self.safe_log(f"--- 开始: {name} ---", "INFO")
-                    try:
-                        test = cls(usb_info, self.logger)
-                        if test.run():
-                            self.safe_log(f"✅ {name} 通过", "INFO")
-                        else:
-                            self.safe_log(f"❌ {name} 失败", "ERROR")
-                            all_passed = False
-                    except Exception as e:
-                        self.safe_log(f"❌ {name} 执行异常: {e}", "ERROR")
-                        all_passed = False
-
-            final = "🎉 所有测试通过！" if all_passed else "⚠️ 部分测试失败"
-            self.safe_log("-" * 50, "INFO")
-            self.safe_log(f"测试完成: {final}", "INFO")
-            
-            # 执行全局清理
-            self.safe_log("-" * 50, "INFO")
-            self.safe_log("开始全局清理...", "INFO")
-            try:
-                cleaner = TestCleaner(usb_info, self.logger)
-                cleanup_success = cleaner.complete_cleanup()
-                if cleanup_success:
-                    self.safe_log("🎉 全局清理完成！U盘已恢复清洁状态", "INFO")
-                else:
-                    self.safe_log("⚠️ 全局清理部分失败，请手动检查U盘", "WARNING")
-            except Exception as e:
-                self.safe_log(f"❌ 全局清理出错: {e}", "ERROR")
+            with ReportWriter() as writer:
+                self.safe_log(f"结构化报告: {writer.summary_path}", "INFO")
+                runner = TestRunner(usb_info, self.logger, listener=writer)
+                report = runner.run(selected_names)
+                if record_history(report, self.logger):
+                    writer.write_summary(report)  # 汇总中补充回退检测结果
+            final = "🎉 所有测试通过！" if report["passed"] else "⚠️ 部分测试失败"
 
             # 弹窗必须在主线程执行
             self.log_text.after(0, lambda: messagebox.showinfo("测试结果", final))
@@ -209,6 +174,8 @@ class TestSetupPage(ttk.Frame):
             self.log_text.after(0, lambda: messagebox.showerror("错误", error_msg))
 
         finally:
+            if self.logger:
+                self.logger.stop_file_log()
             self.is_testing = False
 
     def exit_application(self):
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准 - 多次冷启动 main.py 的界面，测量导入耗时与首帧耗时并与预算比较
+用法: python startup_benchmark.py [--runs N]
+超出预算或启动阶段加载了不应加载的模块时返回码为 1，可在 CI 中使用。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from statistics import median
+
+from constants import STARTUP_IMPORT_BUDGET_MS, STARTUP_FIRST_FRAME_BUDGET_MS, STARTUP_BENCHMARK_RUNS
+
+# 第一帧之前不应加载的重量级模块（应在第一次使用时才导入）
+DEFERRED_MODULES = ("tests.", "utils.test_runner", "utils.hash_engine", "sqlite3", "multiprocessing", "wmi",
+                    "pages.test_setup")
+
+
+def measure_child():
+    """子进程：导入并创建界面，输出各阶段耗时（JSON）"""
+    start = time.perf_counter()
+    import main
+    import pages.device_selection  # 第一帧时创建的页面
+    result = {"import_ms": (time.perf_counter() - start) * 1000, "first_frame_ms": None, "error": None}
+
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        result["error"] = f"无图形界面，跳过首帧测量: {e}"
+    else:
+        app = main.USBTestApp(root)
+        root.update()  # 绘制第一帧并执行 after_idle 中的页面创建
+        result["first_frame_ms"] = (time.perf_counter() - start) * 1000
+        page = app.pages.get("DeviceSelectionPage")
+        if page is not None:
+            page.watcher.stop()
+        root.destroy()
+
+    result["deferred_loaded"] = sorted(m for m in sys.modules if m.startswith(DEFERRED_MODULES))
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="界面启动耗时基准")
+    parser.add_argument("--runs", type=int, default=STARTUP_BENCHMARK_RUNS, help="冷启动次数（取中位数）")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure_child()
+        return 0
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(max(1, args.runs)):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], cwd=here,
+                             capture_output=True, text=True, check=True).stdout
+        sample = json.loads(out.strip().splitlines()[-1])
+        sample["process_ms"] = (time.perf_counter() - start) * 1000
+        samples.append(sample)
+
+    import_ms = median(s["import_ms"] for s in samples)
+    process_ms = median(s["process_ms"] for s in samples)
+    frames = [s["first_frame_ms"] for s in samples if s["first_frame_ms"] is not None]
+    ok = True
+
+    print(f"启动次数: {len(samples)}（取中位数）")
+    print(f"导入耗时:   {import_ms:7.1f} ms（预算 {STARTUP_IMPORT_BUDGET_MS} ms）")
+    ok &= import_ms <= STARTUP_IMPORT_BUDGET_MS
+    if frames:
+        frame_ms = median(frames)
+        print(f"首帧耗时:   {frame_ms:7.1f} ms（预算 {STARTUP_FIRST_FRAME_BUDGET_MS} ms，不含解释器启动）")
+        ok &= frame_ms <= STARTUP_FIRST_FRAME_BUDGET_MS
+    else:
+        print(samples[0]["error"])
+    print(f"进程总耗时: {process_ms:7.1f} ms（含解释器启动与退出）")
+
+    deferred = samples[0]["deferred_loaded"]
+    if deferred:
+        ok = False
+        print(f"❌ 第一帧之前加载了应延迟导入的模块: {', '.join(deferred)}")
+
+    print("✅ 启动耗时在预算内" if ok else "❌ 启动耗时超出预算")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import time
+from pathlib import Path
+from utils.logger import Logger
+from utils.cleanup_manifest import CleanupManifest
+from utils.data_generator import PatternGenerator
+from utils.direct_io import AlignedBuffer, DirectFile, evict_page_cache, align_up
+from constants import (TEST_DIR_NAME, DIRECT_IO_BLOCK_SIZE, BLOCK_SWEEP_SIZES,
+                       BLOCK_SWEEP_POINT_DURATION, BLOCK_SWEEP_MAX_BYTES)
+
+
+class BlockSizeSweepTest:
+    """块大小扫描测试：在一组块大小下分别测量绕过缓存的顺序读写吞吐，输出吞吐曲线"""
+
+    def __init__(self, usb_info, logger: Logger, block_sizes=None,
+                 point_duration=BLOCK_SWEEP_POINT_DURATION, max_bytes=BLOCK_SWEEP_MAX_BYTES, seed=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "block_sweep")
+        self.block_sizes = sorted(align_up(size) for size in (block_sizes or BLOCK_SWEEP_SIZES))
+        self.point_duration = point_duration
+        self.max_bytes = max_bytes
+        self.generator = PatternGenerator(seed)
+        self.test_file = self.test_dir / "block_sweep_test.dat"
+        self.metrics = {"block_size_sweep": []}
+
+    def _write_point(self, block_size, pattern):
+        """以 block_size 顺序写入，直到达到时长或字节上限，返回 (写入字节数, MB/s)；记录实际使用的I/O方式"""
+        limit = max(self.max_bytes // block_size, 1) * block_size
+        slots = len(pattern) // block_size
+        written_bytes = 0
+        with DirectFile(self.test_file, "w") as f:
+            start_time = time.perf_counter()
+            deadline = start_time + self.point_duration
+            while written_bytes < limit and time.perf_counter() < deadline:
+                pos = (written_bytes // block_size) % slots * block_size
+                f.write(pattern[pos:pos + block_size])
+                written_bytes += block_size
+            f.sync()
+            elapsed = time.perf_counter() - start_time
+            self._note_method(f)
+        return written_bytes, (written_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+
+    def _read_point(self, block_size, buffer, file_size):
+        """以 block_size 顺序读取刚写入的文件，直到读完或达到时长，返回 MB/s"""
+        view = buffer[:block_size]
+        read_bytes = 0
+        with DirectFile(self.test_file, "r") as f:
+            if not f.direct:
+                # 无法直接I/O：刚写入的数据还在页缓存中，读取前先逐出
+                evicted, resident = evict_page_cache(self.test_file)
+                if not evicted:
+                    self.metrics["cache_evicted"] = False
+                    if resident is not None:
+                        self.logger.log_message(f"页缓存逐出后驻留比例: {resident * 100:.1f}%", "WARNING")
+            start_time = time.perf_counter()
+            deadline = start_time + self.point_duration
+            while read_bytes < file_size and time.perf_counter() < deadline:
+                n = f.readinto(view)
+                if not n:
+                    break
+                read_bytes += n
+            elapsed = time.perf_counter() - start_time
+        return (read_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+
+    def _note_method(self, f):
+        """首次发现退回缓冲I/O时记录并警告一次"""
+        if "direct_io_method" in self.metrics:
+            return
+        self.metrics["direct_io_method"] = f.method
+        if not f.direct:
+            self.metrics["cache_evicted"] = True  # 任一测试点逐出失败时改为 False
+            self.logger.log_message(
+                f"⚠️ 当前文件系统不支持绕过缓存的I/O（{f.method}），读取前逐出页缓存，写入吞吐包含刷盘时间", "WARNING"
+            )
+
+    @staticmethod
+    def _format_size(size):
+        if size >= 1024 * 1024:
+            return f"{size // (1024 * 1024)}MB"
+        return f"{size // 1024}KB"
+
+    def run(self):
+        self.logger.log_message(
+            f"开始块大小扫描测试（{len(self.block_sizes)} 个测试点，每点读/写各最多 {self.point_duration} 秒）..."
+        )
+
+        # 写入模式缓冲区：至少 4MB，循环使用，每个扇区内容唯一
+        pattern_size = max(DIRECT_IO_BLOCK_SIZE, self.block_sizes[-1])
+        success = True
+        self.manifest.add(self.test_file)
+        try:
+            with AlignedBuffer(pattern_size) as pattern, AlignedBuffer(self.block_sizes[-1]) as read_buf:
+                self.generator.fill(pattern.view)
+                for block_size in self.block_sizes:
+                    written_bytes, write_mb_s = self._write_point(block_size, pattern.view)
+                    read_mb_s = self._read_point(block_size, read_buf.view, written_bytes)
+                    self.metrics["block_size_sweep"].append({
+                        "block_size": block_size,
+                        "bytes": written_bytes,
+                        "write_mb_s": round(write_mb_s, 2),
+                        "read_mb_s": round(read_mb_s, 2),
+                    })
+                    self.logger.log_message(
+                        f"块大小 {self._format_size(block_size):>6}: 写入 {write_mb_s:8.2f} MB/s, 读取 {read_mb_s:8.2f} MB/s"
+                    )
+        except Exception as e:
+            self.logger.log_message(f"❌ 块大小扫描测试出错: {e}", "ERROR")
+            success = False
+
+        points = self.metrics["block_size_sweep"]
+        if points:
+            best_write = max(points, key=lambda p: p["write_mb_s"])
+            best_read = max(points, key=lambda p: p["read_mb_s"])
+            self.metrics["best_write_block_size"] = best_write["block_size"]
+            self.metrics["best_read_block_size"] = best_read["block_size"]
+
+            self.logger.log_message(f"\n=== 块大小扫描结果 ===")
+            self.logger.log_message(f"{'块大小':>8}  {'写入 MB/s':>10}  {'读取 MB/s':>10}")
+            for p in points:
+                self.logger.log_message(
+                    f"{self._format_size(p['block_size']):>8}  {p['write_mb_s']:>10.2f}  {p['read_mb_s']:>10.2f}"
+                )
+            self.logger.log_message(
+                f"最佳写入块大小: {self._format_size(best_write['block_size'])}，"
+                f"最佳读取块大小: {self._format_size(best_read['block_size'])}"
+            )
+            self.logger.log_message(f"================")
+
+        if success:
+            self.logger.log_message("✅ 块大小扫描测试完成")
+
+        # 清理测试文件
+        self._cleanup_test_files()
+
+        return success
+
+    def _cleanup_test_files(self):
+        """按清单清理块大小扫描测试生成的文件，目录已空时一并删除"""
+        try:
+            self.manifest.cleanup(self.logger, f"块大小扫描测试文件")
+        except Exception as e:
+            self.logger.log_message(f"⚠️ 清理块大小扫描测试文件时出错: {e}", "WARNING")
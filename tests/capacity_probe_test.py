@@ -0,0 +1,247 @@
+import os
+import time
+import errno
+import random
+import shutil
+from pathlib import Path
+from utils.logger import Logger
+from utils.direct_io import AlignedBuffer, DirectFile, align_down, lock_volume, unlock_volume
+from utils.verified_block import (VerifiedBlockFormat, BLOCK_OK, BLOCK_MISSING, BLOCK_CORRUPT,
+                                  BLOCK_STALE, BLOCK_MISPLACED)
+from constants import (TEST_DIR_NAME, CAPACITY_PROBE_COUNT, CAPACITY_PROBE_BLOCK_SIZE,
+                       CAPACITY_PROBE_SKIP_BYTES, CAPACITY_PROBE_MIN_WRAP)
+
+_GB = 1024 * 1024 * 1024
+
+
+class CapacityProbeTest:
+    """
+    快速容量抽样探测（参考 f3probe）：在卷的整个标称容量范围内，
+    于分层随机位置及 2 的幂边界写入带标记的小探测块，绕过缓存读回，
+    检测地址回绕（别名）或数据丢失，几秒内给出扩容盘的初筛结论。
+
+    直接读写卷/块设备（需要管理员权限），探测前备份每个探测位置的原始数据，
+    结束后（包括出错时）原样写回。Windows 下探测期间锁定并卸载卷；
+    Linux/macOS 要求卷已卸载（以 O_EXCL 独占打开），且必须能绕过页缓存读写。
+    """
+
+    def __init__(self, usb_info, logger: Logger, probe_count=CAPACITY_PROBE_COUNT, seed=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.probe_count = probe_count
+        self.block_format = VerifiedBlockFormat(seed, CAPACITY_PROBE_BLOCK_SIZE)
+        self.metrics = {"seed": self.block_format.seed}
+
+    def _device_path(self):
+        """
+        探测所用的卷设备路径：只使用检测器提供的 volume_path（分区/卷），Windows 下可退回盘符卷路径。
+        不能使用 device_path（整盘）：那会改写分区表，且 Windows 下无法锁定物理磁盘句柄。
+        """
+        if self.usb_info.get("volume_path"):
+            return self.usb_info["volume_path"]
+        drive = self.usb_info.get("drive")
+        if os.name == "nt" and drive:
+            drive = drive.rstrip("\\")
+            return f"\\\\.\\{drive}"
+        return None
+
+    def _probe_offsets(self, capacity):
+        """
+        分层随机探测点 + 2 的幂边界 + 末尾块，
+        再为每个探测点在各个 2 的幂回绕周期下放置影子探测点，保证回绕时必然发生地址冲突
+        """
+        block = CAPACITY_PROBE_BLOCK_SIZE
+        first = CAPACITY_PROBE_SKIP_BYTES // block
+        blocks = capacity // block
+        rng = random.Random(self.block_format.seed)
+        offsets = set()
+
+        span = blocks - first
+        for i in range(self.probe_count):
+            lo = first + span * i // self.probe_count
+            hi = first + span * (i + 1) // self.probe_count
+            if hi > lo:
+                offsets.add(rng.randrange(lo, hi) * block)
+
+        # 扩容盘通常在 2 的幂处回绕
+        boundary = 1 << 20
+        while boundary < capacity:
+            for offset in (boundary - block, boundary):
+                if offset >= first * block:
+                    offsets.add(offset)
+            boundary <<= 1
+        offsets.add((blocks - 1) * block)
+
+        # 扩容盘通常只是忽略了高位地址线：地址 H 实际落在 H mod 2^k
+        shadows = set()
+        wrap = CAPACITY_PROBE_MIN_WRAP
+        while wrap < capacity:
+            shadows.update(offset % wrap for offset in offsets if offset >= wrap)
+            wrap <<= 1
+        offsets |= shadows
+        return sorted(o for o in offsets if first * block <= o < blocks * block)
+
+    def _mounted_here(self, device_path):
+        """卷是否仍挂载在 usb_info["path"] 上（按设备号比较，Linux/macOS 通用）"""
+        try:
+            return os.stat(self.usb_info["path"]).st_dev == os.stat(device_path).st_rdev
+        except (OSError, KeyError, TypeError):
+            return False
+
+    def run(self):
+        self.logger.log_message("开始快速容量抽样探测...")
+
+        device_path = self._device_path()
+        if not device_path:
+            self.logger.log_message("❌ 未获取到U盘卷/块设备路径，无法进行抽样探测，请改用全盘容量校验", "ERROR")
+            return False
+
+        reported = None
+        if os.name == "nt":
+            # Windows 在打开卷之前读取文件系统容量，随后 lock_volume 会卸载该卷
+            try:
+                reported = shutil.disk_usage(self.usb_info["path"]).total
+            except OSError as e:
+                self.logger.log_message(f"❌ 获取U盘标称容量失败: {e}", "ERROR")
+                return False
+        elif self._mounted_here(device_path):
+            # Linux/macOS 无法像 Windows 那样锁定并卸载卷：在已挂载的文件系统上改写扇区，
+            # 探测期间的回写会被覆盖，中途拔出会损坏文件系统
+            self.logger.log_message(
+                f"❌ 卷 {device_path} 仍挂载在 {self.usb_info['path']}，请先卸载（umount）后再进行抽样探测", "ERROR"
+            )
+            return False
+
+        try:
+            device = DirectFile(device_path, "rw", exclusive=os.name != "nt")
+        except OSError as e:
+            if e.errno == errno.EBUSY:
+                self.logger.log_message(f"❌ 卷 {device_path} 已挂载或正被占用，请先卸载后再进行抽样探测", "ERROR")
+            else:
+                self.logger.log_message(f"❌ 无法直接打开设备 {device_path}（需要管理员权限）: {e}", "ERROR")
+            return False
+
+        try:
+            if not device.direct:
+                # 缓冲读回的是刚写入页缓存的数据，扩容盘也会通过
+                self.logger.log_message(f"❌ 无法以绕过缓存的方式打开 {device_path}，抽样探测结果不可信", "ERROR")
+                return False
+            if not lock_volume(device.fd):
+                self.logger.log_message(f"❌ 无法锁定卷 {device_path}，请关闭占用U盘的程序后重试", "ERROR")
+                return False
+            try:
+                device_size = device.size()
+            except OSError:
+                device_size = 0
+            if reported and device_size:
+                capacity = min(reported, device_size)
+            else:
+                capacity = reported or device_size
+            capacity = align_down(capacity, CAPACITY_PROBE_BLOCK_SIZE)
+            if not capacity:
+                self.logger.log_message(f"❌ 无法获取卷 {device_path} 的容量", "ERROR")
+                return False
+            self.metrics["io_method"] = device.method
+            return self._probe(device, device_path, capacity)
+        finally:
+            unlock_volume(device.fd)
+            device.close()
+
+    def _probe(self, device, device_path, capacity):
+        offsets = self._probe_offsets(capacity)
+        block = CAPACITY_PROBE_BLOCK_SIZE
+        self.logger.log_message(
+            f"设备: {device_path}，标称容量 {capacity / _GB:.2f}GB，探测点 {len(offsets)} 个（种子: {self.block_format.seed}）"
+        )
+        self.logger.log_message("⚠️ 探测会临时覆盖探测位置的数据并在结束后写回，请勿拔出U盘", "WARNING")
+
+        start_time = time.perf_counter()
+        backups = {}
+        results = {}
+        with AlignedBuffer(block) as buf:
+            try:
+                # 1. 备份原始数据
+                for offset in offsets:
+                    device.pread_into(buf.view, offset)
+                    backups[offset] = bytes(buf.view)
+
+                # 2. 从高地址向低地址写入探测块：回绕时低地址的真实数据最后写入并保留，
+                #    读回时被判为错位的就是高位的虚假地址
+                for offset in reversed(offsets):
+                    self.block_format.build(buf.view, offset)
+                    device.pwrite(buf.view, offset)
+                device.sync()
+
+                # 3. 绕过缓存读回校验
+                for offset in offsets:
+                    n = device.pread_into(buf.view, offset)
+                    if n < block:
+                        results[offset] = (BLOCK_MISSING, None)
+                    else:
+                        results[offset] = self.block_format.check(buf.view, offset)
+            finally:
+                # 4. 写回原始数据
+                restore_failed = 0
+                for offset, original in backups.items():
+                    try:
+                        buf.view[:] = original
+                        device.pwrite(buf.view, offset)
+                    except OSError:
+                        restore_failed += 1
+                try:
+                    device.sync()
+                except OSError:
+                    restore_failed += 1
+                if restore_failed:
+                    self.logger.log_message(f"❌ {restore_failed} 个探测位置的原始数据写回失败", "ERROR")
+
+        elapsed = time.perf_counter() - start_time
+        return self._report(capacity, results, elapsed)
+
+    def _report(self, capacity, results, elapsed):
+        counts = {BLOCK_OK: 0, BLOCK_MISSING: 0, BLOCK_CORRUPT: 0, BLOCK_STALE: 0, BLOCK_MISPLACED: 0}
+        first_bad = None
+        last_good = None
+        alias = None
+        for offset in sorted(results):
+            status, found = results[offset]
+            counts[status] += 1
+            if status == BLOCK_OK:
+                if first_bad is None:
+                    last_good = offset
+            else:
+                if first_bad is None:
+                    first_bad = offset
+                if status == BLOCK_MISPLACED and alias is None:
+                    alias = (offset, found)
+
+        passed = first_bad is None
+        self.metrics.update({
+            "reported_capacity_bytes": capacity,
+            "probe_count": len(results),
+            "probe_counts": counts,
+            "first_bad_offset": first_bad,
+            "last_good_offset": last_good,
+            "elapsed_s": round(elapsed, 2),
+        })
+
+        self.logger.log_message(f"\n=== 快速容量探测结果 ===")
+        self.logger.log_message(f"耗时 {elapsed:.1f} 秒，正常 {counts[BLOCK_OK]}，丢失 {counts[BLOCK_MISSING]}，"
+                                f"损坏 {counts[BLOCK_CORRUPT] + counts[BLOCK_STALE]}，错位 {counts[BLOCK_MISPLACED]}")
+        if alias:
+            offset, found = alias
+            self.logger.log_message(
+                f"⚠️ 地址回绕: {offset / _GB:.3f}GB 处读到的是写入 {found / _GB:.3f}GB 处的探测块"
+                f"（回绕周期约 {(offset - found) / _GB:.2f}GB）", "WARNING"
+            )
+        if passed:
+            self.logger.log_message(f"✅ 通过: 标称 {capacity / _GB:.2f}GB 范围内所有探测点均正常")
+        else:
+            good = (last_good + CAPACITY_PROBE_BLOCK_SIZE) if last_good is not None else 0
+            self.logger.log_message(
+                f"❌ 不通过: 疑似扩容盘，真实容量约在 {good / _GB:.2f}GB ~ {first_bad / _GB:.2f}GB 之间"
+                f"（标称 {capacity / _GB:.2f}GB）", "ERROR"
+            )
+        self.logger.log_message(f"================")
+        return passed
@@ -0,0 +1,233 @@
+import time
+import errno
+import shutil
+from pathlib import Path
+from utils.logger import Logger
+from utils.cleanup_manifest import CleanupManifest
+from utils.direct_io import DirectFile, evict_page_cache, align_down
+from utils.pipeline import run_pipeline
+from utils.verified_block import (VerifiedBlockFormat, BLOCK_OK, BLOCK_MISSING, BLOCK_CORRUPT,
+                                  BLOCK_STALE, BLOCK_MISPLACED)
+from constants import (TEST_DIR_NAME, CAPACITY_BLOCK_SIZE, CAPACITY_BATCH_SIZE, CAPACITY_FILE_SIZE,
+                       CAPACITY_PIPELINE_DEPTH, CAPACITY_RESERVE_BYTES)
+
+_GB = 1024 * 1024 * 1024
+
+
+class CapacityTest:
+    """
+    全盘容量校验（扩容盘检测）：用自校验块写满剩余空间，再流式读回校验，
+    找出地址回绕或数据损坏的确切位置，估算真实可用容量。
+    """
+
+    def __init__(self, usb_info, logger: Logger, max_bytes=None, seed=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "capacity")
+        self.max_bytes = max_bytes  # 仅用于限制填充量（调试/快速模式），None 表示写满
+        self.block_format = VerifiedBlockFormat(seed, CAPACITY_BLOCK_SIZE)
+        self.fill_files = []  # [(路径, 已写入字节数)]
+        self.metrics = {"seed": self.block_format.seed}
+
+    def _plan_fill_bytes(self):
+        free = shutil.disk_usage(self.test_dir).free - CAPACITY_RESERVE_BYTES
+        if self.max_bytes is not None:
+            free = min(free, self.max_bytes)
+        return align_down(max(free, 0), CAPACITY_BLOCK_SIZE)
+
+    def _write_file(self, path, base_offset, size):
+        """以流水线方式写入一个填充文件，返回 (写入字节数, 是否因空间不足/错误而提前结束)"""
+        batch = CAPACITY_BATCH_SIZE
+        written = 0
+        stopped = False
+
+        def produce(view, index):
+            n = min(batch, size - index * batch)
+            self.block_format.build_many(view[:n], base_offset + index * batch)
+            return n
+
+        with DirectFile(path, "w") as f:
+            def consume(view, index):
+                nonlocal written, stopped
+                try:
+                    f.write(view)
+                except OSError as e:
+                    stopped = True
+                    if e.errno != errno.ENOSPC:
+                        self.logger.log_message(f"❌ 写入 {path.name} 时出错: {e}", "ERROR")
+                    return False
+                written += len(view)
+                return True
+
+            run_pipeline(produce, consume, batch, count=(size + batch - 1) // batch,
+                         depth=CAPACITY_PIPELINE_DEPTH)
+            try:
+                f.sync()
+            except OSError as e:
+                self.logger.log_message(f"❌ 刷盘 {path.name} 失败: {e}", "ERROR")
+                stopped = True
+        return written, stopped
+
+    def _fill(self):
+        """写入阶段：按 1GB 文件依次写满计划容量"""
+        planned = self._plan_fill_bytes()
+        self.logger.log_message(f"计划写入 {planned / _GB:.2f}GB 自校验数据（种子: {self.block_format.seed}）")
+
+        total = 0
+        start_time = time.perf_counter()
+        index = 0
+        while total < planned:
+            size = min(CAPACITY_FILE_SIZE, planned - total)
+            path = self.test_dir / f"capacity_fill_{index:05d}.dat"
+            self.manifest.add(path)
+            written, stopped = self._write_file(path, total, size)
+            self.fill_files.append((path, written))
+            total += written
+            index += 1
+            elapsed = time.perf_counter() - start_time
+            speed = (total / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+            self.logger.log_message(f"写入进度: {total / _GB:.2f}GB / {planned / _GB:.2f}GB ({speed:.2f} MB/s)")
+            if stopped or written < size:
+                self.logger.log_message(f"写入在 {total / _GB:.2f}GB 处提前结束", "WARNING")
+                break
+
+        elapsed = time.perf_counter() - start_time
+        self.metrics["written_bytes"] = total
+        self.metrics["write_speed_mb_s"] = round((total / (1024 * 1024)) / elapsed, 2) if elapsed > 0 else 0
+        return total
+
+    def _evict(self, path):
+        """
+        无法直接I/O时读回前逐出页缓存，否则校验读到的是刚写入的缓存而不是U盘上的数据，
+        扩容盘的地址回绕将无法被发现。
+        """
+        if "cache_evicted" not in self.metrics:
+            self.metrics["cache_evicted"] = True
+            self.logger.log_message(
+                f"⚠️ 当前文件系统不支持绕过缓存的I/O（{self.metrics['direct_io_method']}），校验前逐出页缓存", "WARNING"
+            )
+        evicted, resident = evict_page_cache(path)
+        if not evicted and self.metrics["cache_evicted"]:
+            self.metrics["cache_evicted"] = False
+            detail = f"，驻留比例 {resident * 100:.1f}%" if resident is not None else ""
+            self.logger.log_message(
+                f"⚠️ 无法确认 {path.name} 的页缓存已逐出{detail}，校验结果可能来自缓存而非U盘", "WARNING"
+            )
+
+    def _verify(self):
+        """校验阶段：流式读回每个块并检查块头，不保存任何哈希"""
+        block_size = CAPACITY_BLOCK_SIZE
+        batch = CAPACITY_BATCH_SIZE
+        counts = {BLOCK_OK: 0, BLOCK_MISSING: 0, BLOCK_CORRUPT: 0, BLOCK_STALE: 0, BLOCK_MISPLACED: 0}
+        state = {"first_bad": None, "first_alias": None}
+        verified = 0
+        start_time = time.perf_counter()
+
+        base_offset = 0
+        for path, size in self.fill_files:
+            if size == 0:
+                continue
+            with DirectFile(path, "r") as f:
+                self.metrics.setdefault("direct_io_method", f.method)
+                if not f.direct:
+                    self._evict(path)
+
+                def produce(view, index):
+                    n = min(batch, size - index * batch)
+                    got = 0
+                    while got < n:
+                        r = f.readinto(view[got:n])
+                        if not r:
+                            break
+                        got += r
+                    view[got:n] = bytes(n - got)  # 读不到的部分按丢失处理
+                    return n
+
+                def consume(view, index):
+                    first = base_offset + index * batch
+                    for pos in range(0, len(view), block_size):
+                        expected = first + pos
+                        status, found = self.block_format.check(view[pos:pos + block_size], expected)
+                        counts[status] += 1
+                        if status != BLOCK_OK and state["first_bad"] is None:
+                            state["first_bad"] = expected
+                        if status == BLOCK_MISPLACED and state["first_alias"] is None:
+                            state["first_alias"] = (expected, found)
+
+                run_pipeline(produce, consume, batch, count=(size + batch - 1) // batch,
+                             depth=CAPACITY_PIPELINE_DEPTH)
+
+            base_offset += size
+            verified += size
+            elapsed = time.perf_counter() - start_time
+            speed = (verified / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+            self.logger.log_message(f"校验进度: {verified / _GB:.2f}GB ({speed:.2f} MB/s)")
+
+        elapsed = time.perf_counter() - start_time
+        self.metrics["verify_speed_mb_s"] = round((verified / (1024 * 1024)) / elapsed, 2) if elapsed > 0 else 0
+        return counts, state
+
+    def run(self):
+        self.logger.log_message("开始全盘容量校验（写满剩余空间并逐块校验）...")
+
+        try:
+            written = self._fill()
+        except Exception as e:
+            self.logger.log_message(f"❌ 填充写入失败: {e}", "ERROR")
+            self._cleanup_test_files()
+            return False
+
+        if written == 0:
+            self.logger.log_message("❌ 没有可用空间进行容量校验", "ERROR")
+            self._cleanup_test_files()
+            return False
+
+        try:
+            counts, state = self._verify()
+        except Exception as e:
+            self.logger.log_message(f"❌ 校验读取失败: {e}", "ERROR")
+            self._cleanup_test_files()
+            return False
+
+        bad_blocks = sum(c for status, c in counts.items() if status != BLOCK_OK)
+        first_bad = state["first_bad"]
+        real_bytes = first_bad if first_bad is not None else written
+        self.metrics.update({
+            "block_counts": counts,
+            "first_bad_offset": first_bad,
+            "verified_capacity_bytes": real_bytes,
+        })
+
+        self.logger.log_message(f"\n=== 全盘容量校验结果 ===")
+        self.logger.log_message(f"写入: {written / _GB:.2f}GB ({self.metrics['write_speed_mb_s']:.2f} MB/s)，"
+                                f"校验: {self.metrics['verify_speed_mb_s']:.2f} MB/s")
+        self.logger.log_message(
+            f"正常块 {counts[BLOCK_OK]}，丢失 {counts[BLOCK_MISSING]}，损坏 {counts[BLOCK_CORRUPT]}，"
+            f"残留 {counts[BLOCK_STALE]}，错位 {counts[BLOCK_MISPLACED]}"
+        )
+        if state["first_alias"]:
+            expected, found = state["first_alias"]
+            self.logger.log_message(
+                f"⚠️ 地址回绕: {expected / _GB:.3f}GB 处读到的是写入 {found / _GB:.3f}GB 处的数据", "WARNING"
+            )
+        if bad_blocks:
+            self.logger.log_message(
+                f"❌ 首个异常块位于 {first_bad / _GB:.3f}GB，可信容量约 {real_bytes / _GB:.2f}GB，疑似扩容盘", "ERROR"
+            )
+        else:
+            self.logger.log_message(f"✅ 全部 {written / _GB:.2f}GB 数据校验通过")
+        self.logger.log_message(f"================")
+
+        # 清理测试文件
+        self._cleanup_test_files()
+
+        return bad_blocks == 0
+
+    def _cleanup_test_files(self):
+        """按清单清理容量校验生成的文件，目录已空时一并删除"""
+        try:
+            self.manifest.cleanup(self.logger, f"容量校验文件")
+        except Exception as e:
+            self.logger.log_message(f"⚠️ 清理容量校验文件时出错: {e}", "WARNING")
@@ -1,28 +1,33 @@
 import os
-import hashlib
 from pathlib import Path
 from utils.logger import Logger
+from utils.cleanup_manifest import CleanupManifest
+from utils.latency_histogram import LatencyRecorder
+from utils.hash_engine import HashEngine, new_hasher
 from constants import TEST_DIR_NAME, SMALL_FILE_SIZE, MEDIUM_FILE_SIZE, LARGE_FILE_SIZE
 
 class CompatibilityTest:
-    def __init__(self, usb_info, logger: Logger):
+    def __init__(self, usb_info, logger: Logger, algorithm=None):
         self.usb_info = usb_info
         self.logger = logger
         self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
         self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "compatibility")
+        self.hash_engine = HashEngine(algorithm) if algorithm else HashEngine()
+        self.latency = LatencyRecorder()
+        self.metrics = {}
 
     def generate_test_file(self, filename, size):
+        """写入随机数据，摘要直接由内存中的数据计算，无需写后回读"""
         filepath = self.test_dir / filename
-        with open(filepath, "wb") as f:
-            f.write(os.urandom(size))
-        return filepath
-
-    def calculate_file_hash(self, filepath):
-        hash_sha256 = hashlib.sha256()
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+        data = os.urandom(size)
+        self.manifest.add(filepath)
+        with self.latency.measure("write"):
+            with open(filepath, "wb") as f:
+                f.write(data)
+        hasher = new_hasher(self.hash_engine.algorithm)
+        hasher.update(data)
+        return filepath, hasher.hexdigest()
 
     def run(self):
         self.logger.log_message("开始数据兼容性测试...")
@@ -34,24 +39,29 @@ class CompatibilityTest:
 
         hashes = {}
         for filename, size in test_files.items():
-            filepath = self.generate_test_file(filename, size)
-            hashes[filename] = self.calculate_file_hash(filepath)
+            filepath, digest = self.generate_test_file(filename, size)
+            hashes[filepath] = digest
             self.logger.log_message(f"创建测试文件: {filename} ({size} bytes)")
 
-        for filename, original_hash in hashes.items():
-            filepath = self.test_dir / filename
-            if filepath.exists():
-                current_hash = self.calculate_file_hash(filepath)
-                if current_hash == original_hash:
-                    self.logger.log_message(f"文件 {filename} 完整性验证通过")
-                else:
-                    self.logger.log_message(f"文件 {filename} 完整性验证失败", "ERROR")
-                    return False
+        # 并行回读校验
+        current_hashes = self.hash_engine.hash_files(list(hashes))
+        for filepath, original_hash in hashes.items():
+            current_hash = current_hashes.get(filepath)
+            if current_hash is None:
+                self.logger.log_message(f"文件 {filepath.name} 丢失", "ERROR")
+                return False
+            if current_hash == original_hash:
+                self.logger.log_message(f"文件 {filepath.name} 完整性验证通过")
             else:
-                self.logger.log_message(f"文件 {filename} 丢失", "ERROR")
+                self.logger.log_message(f"文件 {filepath.name} 完整性验证失败", "ERROR")
                 return False
 
         self.logger.log_message("✅ 数据兼容性测试完成")
+        self.hash_engine.log_summary(self.logger, "兼容性校验")
+        self.metrics["verify"] = self.hash_engine.stats()
+        self.latency.merge(self.hash_engine.latency())
+        self.latency.log_summary(self.logger, "数据兼容性测试延迟分布")
+        self.metrics["latency"] = self.latency.summary()
         
         # 清理测试文件
         self._cleanup_test_files()
@@ -59,18 +69,8 @@ class CompatibilityTest:
         return True
 
     def _cleanup_test_files(self):
-        """清理兼容性测试生成的所有文件"""
+        """按清单清理兼容性测试生成的文件，目录已空时一并删除"""
         try:
-            if self.test_dir.exists():
-                # 清理所有测试文件
-                for test_file in self.test_dir.glob("*"):
-                    if test_file.is_file():
-                        test_file.unlink()
-                        self.logger.log_message(f"✅ 已清理兼容性测试文件: {test_file.name}")
-                
-                # 如果目录为空，删除目录
-                if not any(self.test_dir.iterdir()):
-                    self.test_dir.rmdir()
-                    self.logger.log_message(f"✅ 已清理测试目录: {self.test_dir.name}")
+            self.manifest.cleanup(self.logger, f"兼容性测试文件")
         except Exception as e:
-            self.logger.log_message(f"⚠️ 清理兼容性测试文件时出错: {e}", "WARNING")
\ No newline at end of file
+            self.logger.log_message(f"⚠️ 清理兼容性测试文件时出错: {e}", "WARNING")
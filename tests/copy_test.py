@@ -0,0 +1,149 @@
+import os
+import socket
+import tempfile
+import platform
+from pathlib import Path
+from utils.logger import Logger
+from utils.cleanup_manifest import CleanupManifest
+from utils.data_generator import PatternGenerator
+from utils.copy_engine import available_strategies, copy_file
+from utils.direct_io import evict_page_cache
+from constants import TEST_DIR_NAME, COPY_BENCH_SIZE, COPY_BENCH_SOURCE_DIR, COPY_CHUNK_SIZE
+
+_MB = 1024 * 1024
+
+
+class CopyTest:
+    """
+    复制策略测试：用同一份源文件分别以各个复制策略复制，比较吞吐，找出当前主机与文件系统上最快的策略。
+    两个场景：主机 -> U盘（导入文件），U盘 -> U盘（同一文件系统内复制，内核复制可能在设备端完成）。
+    每次复制前逐出源/目标的页缓存，复制结束时 fsync，计时包含刷盘。
+    """
+
+    SCENARIOS = (("host_to_usb", "主机→U盘"), ("usb_to_usb", "U盘→U盘"))
+
+    def __init__(self, usb_info, logger: Logger, size=COPY_BENCH_SIZE, strategies=None,
+                 source_dir=COPY_BENCH_SOURCE_DIR, seed=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "copy")
+        self.size = size
+        self.strategies = strategies or available_strategies()
+        self.source_dir = source_dir
+        self.generator = PatternGenerator(seed)
+        self.metrics = {
+            "seed": self.generator.seed,
+            "host": socket.gethostname(),
+            "platform": platform.platform(),
+            "filesystem": usb_info.get("filesystem"),
+            "size": size,
+            "copy": {},
+            "best_strategy": {},
+        }
+
+    def _create_source(self, path):
+        """写入种子数据作为复制源文件"""
+        with open(path, "wb", buffering=0) as f:
+            for chunk in self.generator.stream(self.size, COPY_CHUNK_SIZE):
+                f.write(chunk)
+            os.fsync(f.fileno())
+
+    def _verify(self, path):
+        """抽查开头、中间、结尾三段内容与种子数据是否一致"""
+        if os.path.getsize(path) != self.size:
+            return False
+        length = min(_MB, self.size)
+        with open(path, "rb") as f:
+            for offset in {0, (self.size // 2) // _MB * _MB, self.size - length}:
+                f.seek(offset)
+                if f.read(length) != self.generator.read(offset, length):
+                    return False
+        return True
+
+    def _run_scenario(self, title, source, target):
+        """依次用每个策略复制 source -> target，返回 {策略: 结果}"""
+        results = {}
+        for strategy in self.strategies:
+            evict_page_cache(source)
+            try:
+                result = copy_file(source, target, strategy)
+                result["verified"] = self._verify(target)
+                evict_page_cache(target)
+            except OSError as e:
+                results[strategy] = {"error": str(e)}
+                self.logger.log_message(f"{title} {strategy}: 不可用 ({e})")
+                continue
+            finally:
+                try:
+                    os.unlink(target)
+                except OSError:
+                    pass
+            results[strategy] = result
+            status = "" if result["verified"] else "  ❌ 内容校验失败"
+            self.logger.log_message(f"{title} {strategy:>16}: {result['throughput_mb_s']:8.2f} MB/s{status}")
+        return results
+
+    def run(self):
+        self.logger.log_message(
+            f"开始复制策略测试（{self.size // _MB}MB，策略: {', '.join(self.strategies)}）..."
+        )
+        host_dir = Path(tempfile.mkdtemp(prefix="usb_copy_", dir=self.source_dir))
+        host_source = host_dir / "copy_source.dat"
+        usb_source = self.test_dir / "copy_source.dat"
+        target = self.test_dir / "copy_target.dat"
+        self.manifest.add_many((usb_source, target))
+
+        success = True
+        try:
+            self._create_source(host_source)
+            self._create_source(usb_source)
+            for scenario, title in self.SCENARIOS:
+                source = host_source if scenario == "host_to_usb" else usb_source
+                results = self._run_scenario(title, source, target)
+                self.metrics["copy"][scenario] = results
+                if any(r.get("verified") is False for r in results.values()):
+                    success = False
+                ok = {name: r for name, r in results.items() if r.get("verified")}
+                if ok:
+                    self.metrics["best_strategy"][scenario] = max(ok, key=lambda name: ok[name]["throughput_mb_s"])
+        except Exception as e:
+            self.logger.log_message(f"❌ 复制策略测试出错: {e}", "ERROR")
+            success = False
+        finally:
+            try:
+                host_source.unlink()
+                host_dir.rmdir()
+            except OSError:
+                pass
+
+        if self.metrics["copy"]:
+            self.logger.log_message(f"\n=== 复制策略测试结果（{self.metrics['filesystem'] or '未知文件系统'}）===")
+            self.logger.log_message(f"{'策略':>16}  " + "  ".join(f"{title:>10}" for _, title in self.SCENARIOS))
+            for strategy in self.strategies:
+                cells = []
+                for scenario, _ in self.SCENARIOS:
+                    r = self.metrics["copy"].get(scenario, {}).get(strategy, {})
+                    cells.append(f"{r['throughput_mb_s']:>10.2f}" if "throughput_mb_s" in r else f"{'N/A':>10}")
+                self.logger.log_message(f"{strategy:>16}  " + "  ".join(cells))
+            for scenario, title in self.SCENARIOS:
+                best = self.metrics["best_strategy"].get(scenario)
+                if best:
+                    self.logger.log_message(f"{title}最快策略: {best}")
+            self.logger.log_message(f"================")
+
+        if success:
+            self.logger.log_message("✅ 复制策略测试完成")
+        else:
+            self.logger.log_message("❌ 复制策略测试失败", "ERROR")
+
+        self._cleanup_test_files()
+        return success
+
+    def _cleanup_test_files(self):
+        """按清单清理复制策略测试生成的文件，目录已空时一并删除"""
+        try:
+            self.manifest.cleanup(self.logger, "复制策略测试文件")
+        except Exception as e:
+            self.logger.log_message(f"⚠️ 清理复制策略测试文件时出错: {e}", "WARNING")
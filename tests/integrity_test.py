@@ -1,58 +1,119 @@
-import os
-import hashlib
 from pathlib import Path
 from utils.logger import Logger
-from constants import TEST_DIR_NAME
+from utils.cleanup_manifest import CleanupManifest
+from utils.latency_histogram import LatencyRecorder
+from utils.data_generator import PatternGenerator
+from utils.hash_engine import HashEngine
+from constants import TEST_DIR_NAME, INTEGRITY_FILE_COUNT, INTEGRITY_FILE_SIZE
+
+_CHUNK_SIZE = 1024 * 1024
+_FILE_STRIDE_BITS = 32  # 每个文件在数据流中占 4GB 地址空间，文件起点总在扇区边界
+
 
 class IntegrityTest:
-    def __init__(self, usb_info, logger: Logger):
+    """
+    数据完整性测试：每个文件的内容由 (种子, 文件序号) 决定，
+    校验时按同样的种子即时重新生成期望数据逐块比较，不保存任何哈希或逐文件状态，
+    文件数量再多内存占用也保持不变。校验通过 HashEngine 在多个线程中并行进行。
+    """
+
+    def __init__(self, usb_info, logger: Logger, seed=None,
+                 file_count=INTEGRITY_FILE_COUNT, file_size=INTEGRITY_FILE_SIZE):
         self.usb_info = usb_info
         self.logger = logger
         self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
         self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "integrity")
+        self.file_count = file_count
+        self.file_size = file_size
+        self.generator = PatternGenerator(seed)
+        self.hash_engine = HashEngine()
+        self.latency = LatencyRecorder()
+        self.metrics = {"seed": self.generator.seed}
+        self._chunk = bytearray(min(file_size, _CHUNK_SIZE))
 
-    def generate_test_file(self, filename, size):
-        filepath = self.test_dir / filename
-        with open(filepath, "wb") as f:
-            f.write(os.urandom(size))
+    def _file_path(self, index):
+        return self.test_dir / f"integrity_test_{index:03d}.txt"
+
+    @staticmethod
+    def _file_offset(index):
+        """文件在数据流中的起始偏移"""
+        return index << _FILE_STRIDE_BITS
+
+    def generate_test_file(self, index):
+        filepath = self._file_path(index)
+        base = self._file_offset(index)
+        chunk = memoryview(self._chunk)
+        self.manifest.add(filepath)
+        with self.latency.measure("write"):
+            with open(filepath, "wb", buffering=0) as f:
+                for offset in range(0, self.file_size, len(chunk)):
+                    n = min(len(chunk), self.file_size - offset)
+                    self.generator.fill(chunk[:n], base + offset)
+                    f.write(chunk[:n])
         return filepath
 
-    def calculate_file_hash(self, filepath):
-        hash_sha256 = hashlib.sha256()
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+    def verify_test_file(self, index):
+        """
+        重新生成期望数据并与文件内容逐块比较（在校验引擎的工作线程中执行）。
+
+        Returns:
+            str | None: 失败原因，None 表示通过。
+        """
+        filepath = self._file_path(index)
+        if not filepath.exists():
+            return "丢失"
+        base = self._file_offset(index)
+        expected = memoryview(bytearray(min(self.file_size, self.hash_engine.buffer_size)))
+        state = {"error": None}
+
+        def compare(view, offset):
+            n = len(view)
+            if offset + n > self.file_size:
+                state["error"] = "大小不符"
+                return False
+            self.generator.fill(expected[:n], base + offset)
+            if view != expected[:n]:
+                state["error"] = f"在偏移 {offset} 附近数据不一致"
+                return False
+            return True
+
+        size = self.hash_engine.scan_file(filepath, compare)
+        if state["error"] is None and size != self.file_size:
+            state["error"] = "大小不符"
+        return state["error"]
 
     def run(self):
-        self.logger.log_message("开始数据完整性测试...")
-        small_files = []
-        hashes = {}
-
-        # 创建50个1KB文件
-        for i in range(50):
-            filename = f"integrity_test_{i:03d}.txt"
-            filepath = self.generate_test_file(filename, 1024)
-            small_files.append(filepath)
-            hashes[str(filepath)] = self.calculate_file_hash(filepath)
-
-        # 验证所有文件
-        all_passed = True
-        for filepath_str in hashes:
-            filepath = Path(filepath_str)
-            if filepath.exists():
-                current_hash = self.calculate_file_hash(filepath)
-                if current_hash != hashes[filepath_str]:
-                    self.logger.log_message(f"文件 {filepath.name} 完整性验证失败", "ERROR")
-                    all_passed = False
-            else:
-                self.logger.log_message(f"文件 {filepath.name} 丢失", "ERROR")
-                all_passed = False
+        self.logger.log_message(
+            f"开始数据完整性测试（{self.file_count} 个文件，每个 {self.file_size} 字节，种子: {self.generator.seed}）..."
+        )
+
+        for index in range(self.file_count):
+            self.generate_test_file(index)
+
+        # 并行验证所有文件
+        failed = 0
+        for index, error, exc in self.hash_engine.map(self.verify_test_file, range(self.file_count)):
+            if exc is not None:
+                error = f"读取出错: {exc}"
+            if error:
+                self.logger.log_message(f"文件 {self._file_path(index).name} 完整性验证失败: {error}", "ERROR")
+                failed += 1
+
+        all_passed = failed == 0
+        self.metrics["file_count"] = self.file_count
+        self.metrics["failed_files"] = failed
 
         if all_passed:
             self.logger.log_message("✅ 数据完整性测试通过")
         else:
-            self.logger.log_message("❌ 数据完整性测试失败", "ERROR")
+            self.logger.log_message(f"❌ 数据完整性测试失败（{failed}/{self.file_count} 个文件）", "ERROR")
+
+        self.hash_engine.log_summary(self.logger, "完整性校验")
+        self.metrics["verify"] = self.hash_engine.stats()
+        self.latency.merge(self.hash_engine.latency())
+        self.latency.log_summary(self.logger, "数据完整性测试延迟分布")
+        self.metrics["latency"] = self.latency.summary()
 
         # 清理测试文件
         self._cleanup_test_files()
@@ -60,23 +121,8 @@ class IntegrityTest:
         return all_passed
 
     def _cleanup_test_files(self):
-        """清理完整性测试生成的所有文件"""
+        """按清单清理完整性测试生成的文件，目录已空时一并删除"""
         try:
-            if self.test_dir.exists():
-                # 清理所有测试文件
-                for test_file in self.test_dir.glob("integrity_test_*.txt"):
-                    if test_file.is_file():
-                        test_file.unlink()
-                        self.logger.log_message(f"✅ 已清理完整性测试文件: {test_file.name}")
-                
-                # 清理其他可能的临时文件
-                for temp_file in self.test_dir.glob("*.tmp"):
-                    if temp_file.is_file():
-                        temp_file.unlink()
-                        
-                # 如果目录为空，删除目录
-                if not any(self.test_dir.iterdir()):
-                    self.test_dir.rmdir()
-                    self.logger.log_message(f"✅ 已清理测试目录: {self.test_dir.name}")
+            self.manifest.cleanup(self.logger, f"完整性测试文件")
         except Exception as e:
-            self.logger.log_message(f"⚠️ 清理完整性测试文件时出错: {e}", "WARNING")
\ No newline at end of file
+            self.logger.log_message(f"⚠️ 清理完整性测试文件时出错: {e}", "WARNING")
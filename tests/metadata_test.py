@@ -0,0 +1,178 @@
+import os
+import time
+import random
+from pathlib import Path
+from utils.logger import Logger
+from utils.cleanup_manifest import CleanupManifest
+from utils.latency_histogram import LatencyRecorder
+from constants import TEST_DIR_NAME, METADATA_FILE_COUNT, METADATA_DIR_FAN_OUT, METADATA_SAMPLE_SIZE
+
+
+class MetadataTest:
+    """
+    小文件元数据性能测试：分别测量 create / stat / open-close / rename / list / unlink 的 ops/s。
+    目录按 100、1000、10000 ... 个文件的检查点逐步增长，每到一个检查点测一轮，
+    以观察 FAT32 / exFAT 等文件系统的元数据性能随目录变大如何变化。
+    """
+
+    def __init__(self, usb_info, logger: Logger, file_count=METADATA_FILE_COUNT,
+                 fan_out=METADATA_DIR_FAN_OUT, sample_size=METADATA_SAMPLE_SIZE, seed=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "metadata")
+        self.bench_dir = self.test_dir / "metadata_bench"
+        self.file_count = max(1, file_count)
+        self.fan_out = max(1, fan_out)
+        self.sample_size = max(1, sample_size)
+        self.rng = random.Random(seed)
+        self.latency = LatencyRecorder()
+        self.metrics = {"file_count": self.file_count, "fan_out": self.fan_out, "checkpoints": []}
+
+    def _checkpoints(self):
+        """目录增长的检查点：100、1000、10000 ... 以及最终文件数"""
+        points = []
+        n = 100
+        while n < self.file_count:
+            points.append(n)
+            n *= 10
+        points.append(self.file_count)
+        return points
+
+    def _path(self, index):
+        # 8.3 兼容的短文件名，避免 FAT 长文件名目录项影响结果
+        return self.bench_dir / f"d{index % self.fan_out:04d}" / f"m{index:06d}.dat"
+
+    @staticmethod
+    def _rate(ops, elapsed):
+        return round(ops / elapsed, 1) if elapsed > 0 else 0
+
+    def _create(self, start, end):
+        """创建 [start, end) 号文件，返回实际创建到的文件数（目录项耗尽时提前结束）"""
+        measure = self.latency.measure
+        self.manifest.add_many(self._path(index) for index in range(start, end))
+        for index in range(start, end):
+            try:
+                with measure("create"):
+                    open(self._path(index), "xb").close()
+            except OSError as e:
+                self.logger.log_message(f"⚠️ 创建第 {index + 1} 个文件失败，目录可能已达文件系统上限: {e}", "WARNING")
+                return index
+        return end
+
+    def _timed(self, op, paths, action):
+        """对每个路径执行 action 并计时，返回 ops/s"""
+        measure = self.latency.measure
+        start_time = time.perf_counter()
+        for path in paths:
+            with measure(op):
+                action(path)
+        return self._rate(len(paths), time.perf_counter() - start_time)
+
+    def _rename_pair(self, path):
+        renamed = path.with_suffix(".ren")
+        os.rename(path, renamed)
+        os.rename(renamed, path)
+
+    def _list_all(self):
+        """遍历全部子目录，返回 (目录项数, 目录项/秒)"""
+        entries = 0
+        start_time = time.perf_counter()
+        for d in range(self.fan_out):
+            with self.latency.measure("list"):
+                with os.scandir(self.bench_dir / f"d{d:04d}") as it:
+                    for _ in it:
+                        entries += 1
+        return entries, self._rate(entries, time.perf_counter() - start_time)
+
+    def _run_checkpoint(self, created, create_rate):
+        """在当前目录大小下测一轮 stat / open-close / rename / list"""
+        sample = [self._path(i) for i in self.rng.sample(range(created), min(self.sample_size, created))]
+        point = {
+            "files": created,
+            "files_per_dir": round(created / self.fan_out, 1),
+            "create": create_rate,
+            "stat": self._timed("stat", sample, os.stat),
+            "open_close": self._timed("open_close", sample, lambda p: open(p, "rb").close()),
+        }
+        start_time = time.perf_counter()
+        for path in sample:
+            with self.latency.measure("rename"):
+                self._rename_pair(path)
+        point["rename"] = self._rate(2 * len(sample), time.perf_counter() - start_time)
+        _, point["list"] = self._list_all()
+        return point
+
+    def run(self):
+        self.logger.log_message(
+            f"开始小文件元数据性能测试（{self.file_count} 个文件，分布在 {self.fan_out} 个目录）..."
+        )
+        try:
+            self.manifest.add_dir(self.bench_dir)
+            for d in range(self.fan_out):
+                self.manifest.add_dir(self.bench_dir / f"d{d:04d}")
+                (self.bench_dir / f"d{d:04d}").mkdir(parents=True, exist_ok=True)
+
+            created = 0
+            for target in self._checkpoints():
+                start_time = time.perf_counter()
+                reached = self._create(created, target)
+                create_rate = self._rate(reached - created, time.perf_counter() - start_time)
+                created = reached
+                if created == 0:
+                    break
+                point = self._run_checkpoint(created, create_rate)
+                self.metrics["checkpoints"].append(point)
+                self.logger.log_message(
+                    f"目录规模 {created} 个文件（每目录 {point['files_per_dir']:g}）: "
+                    f"create {point['create']:.0f}/s，stat {point['stat']:.0f}/s，open/close {point['open_close']:.0f}/s，"
+                    f"rename {point['rename']:.0f}/s，list {point['list']:.0f} 项/s"
+                )
+                if created < target:
+                    break
+
+            # 删除阶段：全部删除并计时
+            paths = [self._path(i) for i in range(created)]
+            self.metrics["unlink"] = self._timed("unlink", paths, os.unlink)
+            self.metrics["created_files"] = created
+        except Exception as e:
+            self.logger.log_message(f"❌ 元数据性能测试出错: {e}", "ERROR")
+            self._cleanup_test_files()
+            return False
+
+        self._log_summary()
+        self._cleanup_test_files()
+        return bool(self.metrics["checkpoints"])
+
+    def _log_summary(self):
+        points = self.metrics["checkpoints"]
+        self.logger.log_message(f"\n=== 小文件元数据性能结果 ===")
+        self.logger.log_message(f"{'文件数':>10}{'create/s':>12}{'stat/s':>12}{'open/s':>12}{'rename/s':>12}{'list项/s':>12}")
+        for p in points:
+            self.logger.log_message(
+                f"{p['files']:>10}{p['create']:>12.0f}{p['stat']:>12.0f}{p['open_close']:>12.0f}"
+                f"{p['rename']:>12.0f}{p['list']:>12.0f}"
+            )
+        self.logger.log_message(f"unlink: {self.metrics['unlink']:.0f}/s（{self.metrics['created_files']} 个文件）")
+
+        # 随目录增长的速度变化
+        if len(points) > 1:
+            first, last = points[0], points[-1]
+            scaling = {}
+            for phase in ("create", "stat", "open_close", "rename", "list"):
+                if first[phase] > 0:
+                    scaling[phase] = round(last[phase] / first[phase], 2)
+            self.metrics["scaling"] = scaling
+            changes = "，".join(f"{phase} ×{ratio:g}" for phase, ratio in scaling.items())
+            self.logger.log_message(f"目录由 {first['files']} 增长到 {last['files']} 个文件时速度变化: {changes}")
+        self.latency.log_summary(self.logger, "元数据操作延迟分布")
+        self.metrics["latency"] = self.latency.summary()
+        self.logger.log_message(f"================")
+
+    def _cleanup_test_files(self):
+        """按清单清理元数据测试生成的文件，目录已空时一并删除"""
+        try:
+            self.manifest.cleanup(self.logger, f"元数据测试文件")
+        except Exception as e:
+            self.logger.log_message(f"⚠️ 清理元数据测试文件时出错: {e}", "WARNING")
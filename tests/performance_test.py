@@ -3,208 +3,142 @@ import time
 import shutil
 from pathlib import Path
 from utils.logger import Logger
-from constants import TEST_DIR_NAME
+from utils.cleanup_manifest import CleanupManifest
+from utils.data_generator import PatternGenerator
+from utils.latency_histogram import LatencyRecorder
+from utils.throughput_sampler import ThroughputSampler
+from utils.direct_io import AlignedBuffer, DirectFile, evict_page_cache, align_down
+from utils.mmap_bench import MmapBenchmark
+from constants import TEST_DIR_NAME, DIRECT_IO_BLOCK_SIZE, PERF_MMAP_ENABLED, PERF_MMAP_SIZE
 
 class PerformanceTest:
-    def __init__(self, usb_info, logger: Logger):
+    def __init__(self, usb_info, logger: Logger, seed=None, mmap_bench=PERF_MMAP_ENABLED):
         self.usb_info = usb_info
         self.logger = logger
         self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
         self.test_dir.mkdir(exist_ok=True)
+        self.generator = PatternGenerator(seed)
+        self.mmap_bench = mmap_bench
+        self.latency = LatencyRecorder()
+        self.metrics = {"seed": self.generator.seed}
+        self.manifest = CleanupManifest(self.test_dir, "performance")
 
-    def _cleanup_test_files(self, local_test_file, usb_test_file, local_temp_dir, total_size_gb):
-        """自动清理测试过程中创建的所有文件和目录"""
-        self.logger.log_message("开始清理测试文件...")
-        cleanup_success = True
-        
+    def _cleanup_test_files(self, usb_test_file, total_size_gb):
+        """按清单清理测试过程中创建的所有文件，并在目录已空时删除测试目录"""
+        self.logger.log_message(f"开始清理测试文件（{usb_test_file.name}，{total_size_gb}GB）...")
         try:
-            # 1. 清理U盘测试文件
-            if usb_test_file and usb_test_file.exists():
-                try:
-                    usb_test_file.unlink()
-                    self.logger.log_message(f"✅ 已清理U盘测试文件: {usb_test_file.name} ({total_size_gb}GB)")
-                except Exception as e:
-                    self.logger.log_message(f"❌ 清理U盘测试文件失败: {e}", "WARNING")
-                    cleanup_success = False
-            
-            # 2. 彻底清理U盘测试目录及所有内容
-            try:
-                test_dir = usb_test_file.parent if usb_test_file else self.test_dir
-                if test_dir.exists():
-                    self.logger.log_message(f"正在清理U盘测试目录: {test_dir}")
-                    
-                    # 清理目录中的所有文件（包括所有类型的文件）
-                    for item in test_dir.rglob("*"):  # 递归获取所有文件和子目录
-                        if item.is_file():
-                            try:
-                                item.unlink()
-                                self.logger.log_message(f"✅ 已清理文件: {item.name}")
-                            except Exception as e:
-                                self.logger.log_message(f"❌ 清理文件失败 {item.name}: {e}", "WARNING")
-                                cleanup_success = False
-                    
-                    # 清理所有空目录（从最深层开始）
-                    for item in sorted(test_dir.rglob("*"), key=lambda x: len(str(x)), reverse=True):
-                        if item.is_dir() and item != test_dir:
-                            try:
-                                if not any(item.iterdir()):  # 目录为空
-                                    item.rmdir()
-                                    self.logger.log_message(f"✅ 已清理空目录: {item.name}")
-                            except Exception as e:
-                                self.logger.log_message(f"❌ 清理目录失败 {item.name}: {e}", "WARNING")
-                                cleanup_success = False
-                    
-                    # 最后清理主测试目录
-                    try:
-                        if not any(test_dir.iterdir()):  # 目录为空
-                            test_dir.rmdir()
-                            self.logger.log_message(f"✅ 已彻底清理U盘测试目录: {test_dir.name}")
-                        else:
-                            remaining_files = list(test_dir.iterdir())
-                            self.logger.log_message(f"⚠️ U盘测试目录仍有文件，未删除目录: {[f.name for f in remaining_files]}", "WARNING")
-                            cleanup_success = False
-                    except Exception as e:
-                        self.logger.log_message(f"❌ 清理主测试目录失败: {e}", "WARNING")
-                        cleanup_success = False
-                        
-            except Exception as e:
-                self.logger.log_message(f"❌ 清理U盘测试目录失败: {e}", "WARNING")
-                cleanup_success = False
-            
-            # 3. 清理本地E盘测试文件
-            if local_test_file and local_test_file.exists():
-                try:
-                    local_test_file.unlink()
-                    self.logger.log_message(f"✅ 已清理本地测试文件: {local_test_file.name} ({total_size_gb}GB)")
-                except Exception as e:
-                    self.logger.log_message(f"❌ 清理本地测试文件失败: {e}", "WARNING")
-                    cleanup_success = False
-            
-            # 4. 清理本地E盘临时目录中的其他文件
-            if local_temp_dir and local_temp_dir.exists():
-                try:
-                    # 清理目录中的所有文件
-                    for temp_file in local_temp_dir.iterdir():
-                        if temp_file.is_file():
-                            try:
-                                temp_file.unlink()
-                                self.logger.log_message(f"✅ 已清理本地临时文件: {temp_file.name}")
-                            except Exception as e:
-                                self.logger.log_message(f"❌ 清理本地临时文件失败 {temp_file.name}: {e}", "WARNING")
-                                cleanup_success = False
-                    
-                    # 如果目录为空，删除目录
-                    if not any(local_temp_dir.iterdir()):
-                        local_temp_dir.rmdir()
-                        self.logger.log_message("✅ 已清理本地临时目录")
-                    else:
-                        self.logger.log_message("⚠️ 本地临时目录不为空，未删除目录", "WARNING")
-                        
-                except Exception as e:
-                    self.logger.log_message(f"❌ 清理本地临时目录失败: {e}", "WARNING")
-                    cleanup_success = False
-            
-            # 5. 强制垃圾回收
-            import gc
-            gc.collect()
-            
-            if cleanup_success:
+            if self.manifest.cleanup(self.logger, "性能测试文件")["ok"]:
                 self.logger.log_message("🎉 所有测试文件清理完成")
             else:
                 self.logger.log_message("⚠️ 部分测试文件清理失败，请手动检查", "WARNING")
-                
         except Exception as e:
             self.logger.log_message(f"❌ 清理过程发生异常: {e}", "ERROR")
 
-    def _copy_large_file(self, source_file, target_file):
-        """分块复制大文件，解决FAT32文件系统4GB限制"""
+    def _direct_read_pass(self, test_file):
+        """以绕过页缓存的方式顺序读取测试文件，返回 MB/s（失败返回 None）"""
+        self.logger.log_message("正在进行绕过页缓存的读取测试...")
         try:
-            chunk_size = 100 * 1024 * 1024  # 100MB块
-            copied_bytes = 0
-            total_bytes = source_file.stat().st_size
-            
-            with open(source_file, 'rb') as src, open(target_file, 'wb') as dst:
-                while True:
-                    chunk = src.read(chunk_size)
-                    if not chunk:
+            read_size = align_down(test_file.stat().st_size)
+            with AlignedBuffer(DIRECT_IO_BLOCK_SIZE) as buf, DirectFile(test_file, "r") as f:
+                self.metrics["direct_io_method"] = f.method
+                if not f.direct:
+                    # 无法直接I/O：逐出页缓存并校验
+                    evicted, resident = evict_page_cache(test_file)
+                    self.metrics["direct_read_verified"] = evicted
+                    if resident is not None:
+                        self.logger.log_message(f"页缓存逐出后驻留比例: {resident * 100:.1f}%")
+                    self.metrics["direct_io_method"] = "fadvise" if evicted else "buffered"
+
+                read_bytes = 0
+                start_time = time.perf_counter()
+                while read_bytes < read_size:
+                    with self.latency.measure("read_direct"):
+                        n = f.readinto(buf.view)
+                    if not n:
                         break
-                    dst.write(chunk)
-                    dst.flush()
-                    copied_bytes += len(chunk)
-                    
-                    # 显示进度
-                    progress = (copied_bytes / total_bytes) * 100
-                    if copied_bytes % (500 * 1024 * 1024) == 0:  # 每500MB显示
-                        self.logger.log_message(f"复制进度: {progress:.1f}% ({copied_bytes / (1024*1024*1024):.2f}GB)")
-                        
-                # 强制刷盘
-                dst.flush()
-                os.fsync(dst.fileno())
-                
+                    read_bytes += n
+                elapsed = time.perf_counter() - start_time
+
+            speed = (read_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+            self.logger.log_message(f"绕过缓存读取速度: {speed:.2f} MB/s ({self.metrics['direct_io_method']})")
+            return speed
         except Exception as e:
-            self.logger.log_message(f"分块复制失败: {e}", "ERROR")
-            raise
+            self.logger.log_message(f"绕过缓存读取测试失败: {e}", "WARNING")
+            return None
+
+    def _mmap_pass(self, test_file):
+        """在测试文件上运行 mmap 顺序/随机缺页读取与脏页写入（msync），返回结果字典（失败返回 None）"""
+        self.logger.log_message("正在进行内存映射I/O测试...")
+        try:
+            results = MmapBenchmark(test_file, PERF_MMAP_SIZE, self.latency, self.generator.seed).run()
+        except Exception as e:
+            self.logger.log_message(f"内存映射I/O测试失败: {e}", "WARNING")
+            return None
+        for key, title in (("sequential_read", "顺序缺页读取"), ("random_read", "随机缺页读取"), ("dirty_write", "脏页写入+msync")):
+            r = results[key]
+            faults = f"{r['faults_per_s']:.0f} 次缺页/s" if r["faults_per_s"] is not None else "缺页数不可用"
+            self.logger.log_message(f"mmap {title}: {r['throughput_mb_s']:.2f} MB/s, {faults}")
+        self.logger.log_message(f"mmap msync 耗时: {results['dirty_write']['msync_s']:.3f} s")
+        return results
+
+    def _direct_write_pass(self, test_file, total_size_bytes):
+        """以绕过页缓存的方式顺序写入测试文件，返回 MB/s（失败返回 None）"""
+        self.logger.log_message("正在进行绕过页缓存的写入测试...")
+        try:
+            total_size_bytes = align_down(total_size_bytes, DIRECT_IO_BLOCK_SIZE)
+            sampler = ThroughputSampler()
+            with AlignedBuffer(DIRECT_IO_BLOCK_SIZE) as buf:
+                with DirectFile(test_file, "w") as f:
+                    written_bytes = 0
+                    start_time = time.perf_counter()
+                    sampler.start()
+                    for chunk in self.generator.stream(total_size_bytes, DIRECT_IO_BLOCK_SIZE, buf.view):
+                        with self.latency.measure("write_direct"):
+                            n = f.write(chunk)
+                        written_bytes += n
+                        sampler.add(n)
+                    with self.latency.measure("fsync_direct"):
+                        f.sync()
+                    sampler.finish()
+                    elapsed = time.perf_counter() - start_time
+                    method = f.method
+
+            # 绕过缓存的写入直达设备，是判断 SLC 缓存断崖的主要依据
+            sampler.log_summary(self.logger, "绕过缓存写入吞吐采样")
+            self.metrics["direct_write_throughput"] = sampler.to_dict()
+            self.metrics["direct_write_cliff"] = sampler.detect_cliff()
+
+            speed = (written_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+            self.logger.log_message(f"绕过缓存写入速度: {speed:.2f} MB/s ({method})")
+            return speed
+        except Exception as e:
+            self.logger.log_message(f"绕过缓存写入测试失败: {e}", "WARNING")
+            return None
 
     def run(self):
-        self.logger.log_message("开始性能测试（E盘预先生成+U盘传输）...")
-        
-        # 本地E盘临时目录
-        local_temp_dir = Path("E:/temp_usb_test")
-        local_temp_dir.mkdir(exist_ok=True)
-        local_test_file = local_temp_dir / "perf_test_source.dat"
-        self.logger.log_message(f"使用E盘临时目录: {local_temp_dir}")
-        
+        self.logger.log_message("开始性能测试（种子数据流直接写入U盘）...")
+
         # U盘目标文件
         usb_test_file = self.test_dir / "perf_test.dat"
-        
+
         # 🔧 临时修改：使用较小文件避免FAT32限制
         chunk_size_mb = 10     # 每次读写 10MB 数据块
         total_size_gb = 2      # 临时改为 2GB进行测试
         chunk_size_bytes = chunk_size_mb * 1024 * 1024  # 10MB = 10,485,760 字节
         total_size_bytes = total_size_gb * 1024 * 1024 * 1024   # 2GB 字节数
-        
+
         # 验证计算结果
         self.logger.log_message(f"文件大小验证: 块大小={chunk_size_bytes:,}字节, 总大小={total_size_bytes:,}字节")
         self.logger.log_message(f"预期循环次数: {total_size_bytes // chunk_size_bytes}次")
 
-        # 第一步：在本地E盘创建测试文件
-        self.logger.log_message(f"正在本地E盘创建{total_size_gb}GB测试文件...")
-        start_time = time.perf_counter()
-        written_bytes = 0
-        loop_count = 0
-        
-        try:
-            with open(local_test_file, "wb") as f:
-                while written_bytes < total_size_bytes:
-                    # 每次写入 10MB 随机数据
-                    data = os.urandom(chunk_size_bytes)
-                    f.write(data)
-                    written_bytes += chunk_size_bytes
-                    loop_count += 1
-                    f.flush()
-                    
-                    # 每100MB显示一次进度
-                    if loop_count % 10 == 0:
-                        progress_mb = written_bytes // (1024 * 1024)
-                        progress_gb = progress_mb / 1024
-                        self.logger.log_message(f"E盘创建进度: {progress_gb:.2f}GB / {total_size_gb}GB")
-        
-        except Exception as e:
-            self.logger.log_message(f"E盘文件创建错误: {e}", "ERROR")
-            return False
-            
-        local_create_time = time.perf_counter() - start_time
-        actual_size_gb = local_test_file.stat().st_size / (1024 * 1024 * 1024)
-        self.logger.log_message(f"本地{total_size_gb}GB文件创建完成，实际大小: {actual_size_gb:.2f}GB，耗时: {local_create_time:.2f} 秒")
-
-        # 第二步：检查U盘空间并将文件复制到U盘进行写入性能测试
+        # 第一步：检查U盘空间
         self.logger.log_message(f"正在检查U盘空间并准备写入{total_size_gb}GB文件...")
         
         # 检查U盘路径和空间
         try:
-            # 获取U盘路径，确保以反斜杠结尾
+            # 获取U盘路径，Windows 盘符确保以反斜杠结尾
             usb_path_str = self.usb_info["path"]
-            if not usb_path_str.endswith('\\'):
+            if os.name == 'nt' and not usb_path_str.endswith('\\'):
                 usb_path_str += '\\'
             usb_path = Path(usb_path_str)
             
@@ -233,6 +167,7 @@ class PerformanceTest:
         
         # 先进行小文件测试验证U盘写入功能
         test_small_file = usb_test_file.parent / "test_small.tmp"
+        self.manifest.add(test_small_file)
         try:
             self.logger.log_message("正在进行小文件测试...")
             with open(test_small_file, "wb") as f:
@@ -250,16 +185,8 @@ class PerformanceTest:
             self.logger.log_message(f"❌ 小文件测试失败: {e}", "ERROR")
             return False
         
-        start_time = time.perf_counter()
-        
-        try:
-            self.logger.log_message(f"开始复制文件从 {local_test_file} 到 {usb_test_file}")
-            
-            # 检查源文件大小
-            source_size_gb = local_test_file.stat().st_size / (1024 * 1024 * 1024)
-            self.logger.log_message(f"源文件大小: {source_size_gb:.2f}GB")
-            
-            # 检查U盘文件系统类型
+        # 检查U盘文件系统类型
+        if os.name == 'nt':
             import subprocess
             try:
                 result = subprocess.run(['fsutil', 'fsinfo', 'volumeinfo', usb_path_str.rstrip('\\')], 
@@ -270,27 +197,34 @@ class PerformanceTest:
                     self.logger.log_message(f"无法获取文件系统信息: {result.stderr}")
             except Exception as e:
                 self.logger.log_message(f"获取文件系统信息失败: {e}")
-            
-            # 尝试使用分块复制方式（避免FAT32 4GB限制）
-            if source_size_gb > 4.0:
-                self.logger.log_message("检测到大文件(>4GB)，使用分块复制方式...")
-                self._copy_large_file(local_test_file, usb_test_file)
-            else:
-                # 使用标准复制
-                shutil.copy2(str(local_test_file), str(usb_test_file))
-            
-            # 验证复制结果
-            if usb_test_file.exists():
-                copied_size_gb = usb_test_file.stat().st_size / (1024 * 1024 * 1024)
-                self.logger.log_message(f"✅ 文件复制成功，大小: {copied_size_gb:.2f}GB")
-            else:
-                self.logger.log_message(f"❌ 文件复制失败，目标文件不存在", "ERROR")
-                return False
-            
-            # 强制刷盘确保数据真实写入U盘
-            with open(usb_test_file, "r+b") as f:
-                f.flush()
-                os.fsync(f.fileno())
+
+        # 第二步：将种子数据流直接写入U盘进行写入性能测试（无本地中转文件）
+        self.manifest.add_many((usb_test_file, self.test_dir / "perf_test_direct.dat"))
+        self.logger.log_message(f"开始写入 {usb_test_file}（数据种子: {self.generator.seed}）")
+        written_bytes = 0
+        loop_count = 0
+        sampler = ThroughputSampler()
+        start_time = time.perf_counter()
+        sampler.start()
+        
+        try:
+            with open(usb_test_file, "wb", buffering=0) as f:
+                for chunk in self.generator.stream(total_size_bytes, chunk_size_bytes):
+                    with self.latency.measure("write"):
+                        f.write(chunk)
+                    written_bytes += len(chunk)
+                    sampler.add(len(chunk))
+                    loop_count += 1
+
+                    # 每500MB显示一次进度
+                    if loop_count % 50 == 0:
+                        progress_gb = written_bytes / (1024 * 1024 * 1024)
+                        self.logger.log_message(f"U盘写入进度: {progress_gb:.2f}GB / {total_size_gb}GB")
+
+                # 强制刷盘确保数据真实写入U盘
+                with self.latency.measure("fsync"):
+                    os.fsync(f.fileno())
+                sampler.finish()
                 
         except PermissionError as e:
             self.logger.log_message(f"❌ 权限错误：{e}", "ERROR")
@@ -318,27 +252,14 @@ class PerformanceTest:
             return False
         
         write_time = time.perf_counter() - start_time
-        write_speed_mb_s = (total_size_bytes / (1024 * 1024)) / write_time if write_time > 0 else 0
+        write_speed_mb_s = (written_bytes / (1024 * 1024)) / write_time if write_time > 0 else 0
         self.logger.log_message(f"U盘写入速度: {write_speed_mb_s:.2f} MB/s", "INFO")
+        sampler.log_summary(self.logger, "缓冲写入吞吐采样")
+        self.metrics["write_throughput"] = sampler.to_dict()
+        self.metrics["write_cliff"] = sampler.detect_cliff()
 
-        # 第三步：从U盘进行读取性能测试（彻底清理缓存）
-        self.logger.log_message(f"正在进行{total_size_gb}GB U盘读取性能测试...")
-        
-        # 清理系统缓存
-        import gc
-        gc.collect()
-        time.sleep(3)  # 等待系统完成I/O操作
-        
-        # Windows系统清理缓存
-        try:
-            if os.name == 'nt':
-                import subprocess
-                subprocess.run(['powershell', '-Command', 
-                              'Clear-RecycleBin -Confirm:$false; [System.GC]::Collect()'], 
-                             capture_output=True, timeout=10)
-                self.logger.log_message("已清理Windows系统缓存")
-        except Exception as e:
-            self.logger.log_message(f"系统缓存清理失败: {e}", "WARNING")
+        # 第三步：从U盘进行缓冲读取性能测试（数据可能仍在页缓存中）
+        self.logger.log_message(f"正在进行{total_size_gb}GB U盘缓冲读取性能测试...")
         
         read_bytes = 0
         start_time = time.perf_counter()
@@ -349,7 +270,8 @@ class PerformanceTest:
             
             with open(usb_test_file, "rb") as f:
                 while read_bytes < total_size_bytes:
-                    data = f.read(read_chunk_size)
+                    with self.latency.measure("read"):
+                        data = f.read(read_chunk_size)
                     if not data:
                         break
                     read_bytes += len(data)
@@ -366,47 +288,68 @@ class PerformanceTest:
         read_time = time.perf_counter() - start_time
         read_speed_mb_s = (total_size_bytes / (1024 * 1024)) / read_time if read_time > 0 else 0
 
+        # 第四步：绕过页缓存的读取测试（O_DIRECT / 无缓冲I/O / 逐出缓存后读取）
+        direct_read_speed_mb_s = self._direct_read_pass(usb_test_file)
+
+        # 第五步：内存映射I/O测试（在删除缓冲测试文件之前，复用其中的数据）
+        mmap_results = self._mmap_pass(usb_test_file) if self.mmap_bench else None
+
+        # 第六步：绕过页缓存的写入测试
+        try:
+            usb_test_file.unlink()
+        except OSError:
+            pass
+        direct_test_file = self.test_dir / "perf_test_direct.dat"
+        direct_write_speed_mb_s = self._direct_write_pass(direct_test_file, total_size_bytes)
+
+        self.metrics.update({
+            "write_speed_mb_s": round(write_speed_mb_s, 2),
+            "read_speed_mb_s": round(read_speed_mb_s, 2),
+            "direct_write_speed_mb_s": round(direct_write_speed_mb_s, 2) if direct_write_speed_mb_s is not None else None,
+            "direct_read_speed_mb_s": round(direct_read_speed_mb_s, 2) if direct_read_speed_mb_s is not None else None,
+            "mmap": mmap_results,
+            "latency": self.latency.summary(),
+        })
+
         # 计算并输出结果
+        def fmt(speed):
+            return f"{speed:10.2f} MB/s" if speed is not None else "        N/A"
+
         self.logger.log_message(f"\n=== 性能测试结果 ====")
-        self.logger.log_message(f"U盘写入速度: {write_speed_mb_s:.2f} MB/s", "INFO")
-        self.logger.log_message(f"U盘读取速度: {read_speed_mb_s:.2f} MB/s", "INFO")
+        self.logger.log_message(f"          缓冲I/O        绕过缓存({self.metrics.get('direct_io_method', 'N/A')})")
+        self.logger.log_message(f"写入速度: {fmt(write_speed_mb_s)}  {fmt(direct_write_speed_mb_s)}", "INFO")
+        self.logger.log_message(f"读取速度: {fmt(read_speed_mb_s)}  {fmt(direct_read_speed_mb_s)}", "INFO")
+        if mmap_results:
+            def fmt_faults(result):
+                rate = result["faults_per_s"]
+                return f"{rate:10.0f} 缺页/s" if rate is not None else "        N/A"
+
+            self.logger.log_message(f"mmap顺序读: {fmt(mmap_results['sequential_read']['throughput_mb_s'])}  "
+                                    f"{fmt_faults(mmap_results['sequential_read'])}", "INFO")
+            self.logger.log_message(f"mmap随机读: {fmt(mmap_results['random_read']['throughput_mb_s'])}  "
+                                    f"{fmt_faults(mmap_results['random_read'])}", "INFO")
+            self.logger.log_message(f"mmap写入:   {fmt(mmap_results['dirty_write']['throughput_mb_s'])}  "
+                                    f"{fmt_faults(mmap_results['dirty_write'])}（含msync）", "INFO")
+        if not self.metrics.get("direct_read_verified", True):
+            self.logger.log_message("⚠️ 未能确认页缓存已逐出，绕过缓存的读取速度可能偏高", "WARNING")
+        self.latency.log_summary(self.logger, "性能测试单次I/O延迟分布")
         self.logger.log_message(f"================")
 
         # 清理测试文件
-        self._cleanup_test_files(local_test_file, usb_test_file, local_temp_dir, total_size_gb)
+        try:
+            direct_test_file.unlink()
+        except OSError:
+            pass
+        self._cleanup_test_files(usb_test_file, total_size_gb)
 
         self.logger.log_message("✅ 性能测试完成")
         return True
     
     def __del__(self):
-        """析构函数：确保对象销毁时彻底清理临时文件和目录"""
+        """析构函数：测试中途退出时按清单清理遗留的性能测试文件"""
         try:
-            # 最后的安全清理：删除可能遗留的临时文件
-            local_temp_dir = Path("E:/temp_usb_test")
-            if local_temp_dir.exists():
-                # 清理所有性能测试相关文件
-                for temp_file in local_temp_dir.glob("perf_test_*.dat"):
-                    if temp_file.exists():
-                        temp_file.unlink()
-                        
-                # 如果目录为空，尝试删除目录
-                if local_temp_dir.exists() and not any(local_temp_dir.iterdir()):
-                    local_temp_dir.rmdir()
-                        
-            # 清理U盘测试目录中的性能测试文件
-            if hasattr(self, 'test_dir') and self.test_dir.exists():
-                # 清理所有性能测试相关文件
-                for temp_file in self.test_dir.glob("perf_test*.dat"):
-                    if temp_file.exists():
-                        temp_file.unlink()
-                        
-                # 尝试清理所有临时文件
-                for temp_file in self.test_dir.glob("*.tmp"):
-                    if temp_file.exists():
-                        temp_file.unlink()
-                        
-                # 如果目录为空，尝试删除目录
-                if self.test_dir.exists() and not any(self.test_dir.iterdir()):
-                    self.test_dir.rmdir()
+            # 正常结束时清单已被删除，这里不会再访问U盘
+            if hasattr(self, 'manifest') and self.manifest.path.exists():
+                self.manifest.cleanup()
         except:
-            pass  # 析构函数中不抛出异常
\ No newline at end of file
+            pass  # 析构函数中不抛出异常
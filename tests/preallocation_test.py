@@ -0,0 +1,152 @@
+import os
+import time
+from pathlib import Path
+from utils.logger import Logger
+from utils.cleanup_manifest import CleanupManifest
+from utils.data_generator import PatternGenerator
+from utils.direct_io import AlignedBuffer, DirectFile, align_up
+from constants import TEST_DIR_NAME, DIRECT_IO_BLOCK_SIZE, PREALLOC_BENCH_SIZE
+
+_MB = 1024 * 1024
+
+
+class PreallocationTest:
+    """
+    预分配与追加写入对比测试：同样的数据量分别以三种方式写入，区分空间分配与数据传输的耗时。
+    - append：边写边增长文件（每次扩展都要分配簇、更新 FAT 链 / exFAT 位图）
+    - fallocate：先 posix_fallocate 预分配，再在已分配的空间上写入
+    - truncate：先 ftruncate 扩展文件长度（稀疏扩展，FAT 等文件系统会在此时填零），再写入
+    以“在已分配文件上原地覆盖写入”的耗时作为纯数据传输基准，总耗时超出基准的部分计为分配开销。
+    数据写入使用绕过缓存的I/O，所有耗时都包含 fsync。
+    """
+
+    MODES = (("append", "追加增长"), ("fallocate", "fallocate预分配"), ("truncate", "ftruncate扩展"))
+
+    def __init__(self, usb_info, logger: Logger, size=PREALLOC_BENCH_SIZE, seed=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "preallocation")
+        self.size = align_up(size, DIRECT_IO_BLOCK_SIZE)
+        self.generator = PatternGenerator(seed)
+        self.test_file = self.test_dir / "prealloc_test.dat"
+        self.metrics = {"size": self.size, "filesystem": usb_info.get("filesystem"), "preallocation": {}}
+
+    def _write_data(self, mode, buf):
+        """以绕过缓存的方式写入全部数据并刷盘，返回耗时；mode 为 "w"（新建追加）或 "rw"（覆盖已有空间）"""
+        with DirectFile(self.test_file, mode) as f:
+            start_time = time.perf_counter()
+            for chunk in self.generator.stream(self.size, DIRECT_IO_BLOCK_SIZE, buf.view):
+                f.write(chunk)
+            f.sync()
+            return time.perf_counter() - start_time
+
+    def _allocate(self, mode):
+        """新建文件并预分配空间（含刷盘），返回耗时"""
+        fd = os.open(self.test_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            start_time = time.perf_counter()
+            if mode == "fallocate":
+                os.posix_fallocate(fd, 0, self.size)
+            else:
+                os.ftruncate(fd, self.size)
+            os.fsync(fd)
+            return time.perf_counter() - start_time
+        finally:
+            os.close(fd)
+
+    def _run_mode(self, mode, buf):
+        """返回 {allocate_s, write_s, total_s}"""
+        if mode == "append":
+            allocate_s = 0.0
+            write_s = self._write_data("w", buf)
+        else:
+            allocate_s = self._allocate(mode)
+            write_s = self._write_data("rw", buf)
+        return {"allocate_s": allocate_s, "write_s": write_s, "total_s": allocate_s + write_s}
+
+    def _remove_test_file(self):
+        try:
+            self.test_file.unlink()
+        except FileNotFoundError:
+            pass
+
+    def run(self):
+        self.logger.log_message(f"开始预分配与追加写入对比测试（每种方式写入 {self.size // _MB}MB）...")
+        self.manifest.add(self.test_file)
+        results = self.metrics["preallocation"]
+        baseline_s = None
+        success = True
+
+        try:
+            with AlignedBuffer(DIRECT_IO_BLOCK_SIZE) as buf:
+                for mode, title in self.MODES:
+                    if mode == "fallocate" and not hasattr(os, "posix_fallocate"):
+                        self.logger.log_message(f"{title}: 当前平台不支持，跳过")
+                        continue
+                    try:
+                        result = self._run_mode(mode, buf)
+                    except OSError as e:
+                        self.logger.log_message(f"{title}: 失败或文件系统不支持 ({e})", "WARNING")
+                        results[mode] = {"error": str(e)}
+                        self._remove_test_file()
+                        continue
+                    if baseline_s is None:
+                        # 文件已完整分配：原地覆盖写入一遍，作为纯数据传输基准
+                        baseline_s = self._write_data("rw", buf)
+                        self.metrics["overwrite_s"] = round(baseline_s, 3)
+                        self.metrics["overwrite_mb_s"] = round(self.size / _MB / baseline_s, 2) if baseline_s > 0 else 0
+                    self._remove_test_file()
+                    results[mode] = result
+                    self.logger.log_message(
+                        f"{title}: 分配 {result['allocate_s']:.3f} 秒 + 写入 {result['write_s']:.3f} 秒"
+                    )
+        except Exception as e:
+            self.logger.log_message(f"❌ 预分配测试出错: {e}", "ERROR")
+            success = False
+
+        for result in results.values():
+            if "total_s" not in result:
+                continue
+            total_s = result["total_s"]
+            overhead_s = max(total_s - baseline_s, 0.0)
+            result["throughput_mb_s"] = round(self.size / _MB / total_s, 2) if total_s > 0 else 0
+            result["allocation_overhead_s"] = round(overhead_s, 3)
+            result["allocation_share"] = round(overhead_s / total_s, 3) if total_s > 0 else 0
+            for key in ("allocate_s", "write_s", "total_s"):
+                result[key] = round(result[key], 3)
+
+        measured = {mode: r for mode, r in results.items() if "total_s" in r}
+        if measured:
+            self.logger.log_message(f"\n=== 预分配对比结果（{self.metrics['filesystem'] or '未知文件系统'}）===")
+            self.logger.log_message(f"纯数据传输基准（原地覆盖写入）: {self.metrics['overwrite_mb_s']:.2f} MB/s")
+            self.logger.log_message(f"{'方式':>16}  {'MB/s':>8}  {'预分配(s)':>9}  {'写入(s)':>8}  {'分配开销占比':>10}")
+            for mode, title in self.MODES:
+                r = measured.get(mode)
+                if r:
+                    self.logger.log_message(
+                        f"{title:>16}  {r['throughput_mb_s']:>8.2f}  {r['allocate_s']:>9.3f}  "
+                        f"{r['write_s']:>8.3f}  {r['allocation_share'] * 100:>9.1f}%"
+                    )
+            best = min(measured, key=lambda mode: measured[mode]["total_s"])
+            self.metrics["best_mode"] = best
+            self.logger.log_message(f"最快的文件布局方式: {dict(self.MODES)[best]}")
+            self.logger.log_message(f"================")
+        else:
+            success = False
+
+        if success:
+            self.logger.log_message("✅ 预分配与追加写入对比测试完成")
+
+        # 清理测试文件
+        self._cleanup_test_files()
+
+        return success
+
+    def _cleanup_test_files(self):
+        """按清单清理预分配测试生成的文件，目录已空时一并删除"""
+        try:
+            self.manifest.cleanup(self.logger, "预分配测试文件")
+        except Exception as e:
+            self.logger.log_message(f"⚠️ 清理预分配测试文件时出错: {e}", "WARNING")
@@ -0,0 +1,148 @@
+import time
+import random
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import Logger
+from utils.cleanup_manifest import CleanupManifest
+from utils.data_generator import PatternGenerator
+from utils.direct_io import AlignedBuffer, DirectFile, evict_page_cache, align_up
+from constants import (TEST_DIR_NAME, DIRECT_IO_BLOCK_SIZE, RANDOM_IO_BLOCK_SIZE, RANDOM_IO_QUEUE_DEPTH,
+                       RANDOM_IO_READ_RATIO, RANDOM_IO_REGION_SIZE, RANDOM_IO_DURATION)
+
+
+class RandomIOTest:
+    """随机小块读写（IOPS）测试：在预分配区域上使用定位I/O，QD1 与多队列深度各测一轮"""
+
+    def __init__(self, usb_info, logger: Logger, block_size=RANDOM_IO_BLOCK_SIZE,
+                 queue_depth=RANDOM_IO_QUEUE_DEPTH, read_ratio=RANDOM_IO_READ_RATIO,
+                 region_size=RANDOM_IO_REGION_SIZE, duration=RANDOM_IO_DURATION, seed=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "random_io")
+        self.block_size = align_up(block_size)
+        self.queue_depth = max(1, queue_depth)
+        self.read_ratio = read_ratio
+        self.region_size = align_up(region_size, DIRECT_IO_BLOCK_SIZE)
+        self.duration = duration
+        self.generator = PatternGenerator(seed)
+        self.test_file = self.test_dir / "random_io_test.dat"
+        self.direct = True
+        self.metrics = {"random_io": []}
+
+    def _prepare_region(self):
+        """顺序写入并刷盘，预分配测试区域"""
+        self.logger.log_message(f"正在预分配随机I/O测试区域: {self.region_size // (1024 * 1024)}MB")
+        self.manifest.add(self.test_file)
+        with AlignedBuffer(DIRECT_IO_BLOCK_SIZE) as buf, DirectFile(self.test_file, "w") as f:
+            for chunk in self.generator.stream(self.region_size, DIRECT_IO_BLOCK_SIZE, buf.view):
+                f.write(chunk)
+            f.sync()
+            self.direct = f.direct
+            self.metrics["direct_io_method"] = f.method
+        if not self.direct:
+            self.logger.log_message(
+                f"⚠️ 当前文件系统不支持绕过缓存的I/O（{self.metrics['direct_io_method']}），"
+                f"每个测试点前逐出页缓存，随机读可能仍部分命中缓存，IOPS 偏高", "WARNING"
+            )
+
+    def _worker(self, worker_id, read_ratio, deadline):
+        """单个在途请求：循环发起同步随机I/O直到截止时间"""
+        rng = random.Random(self.generator.seed + worker_id)
+        blocks = self.region_size // self.block_size
+        reads = writes = 0
+        with AlignedBuffer(self.block_size) as buf, DirectFile(self.test_file, "rw") as f:
+            self.generator.fill(buf.view, worker_id * self.block_size)
+            while time.perf_counter() < deadline:
+                offset = rng.randrange(blocks) * self.block_size
+                if rng.random() < read_ratio:
+                    f.pread_into(buf.view, offset)
+                    reads += 1
+                else:
+                    f.pwrite(buf.view, offset)
+                    writes += 1
+        return reads, writes
+
+    def _evict(self):
+        """无法直接I/O时逐出测试区域的页缓存（同时刷出上一测试点的脏页），返回是否确认已逐出"""
+        evicted, resident = evict_page_cache(self.test_file)
+        if resident is not None and not evicted:
+            self.logger.log_message(f"页缓存逐出后驻留比例: {resident * 100:.1f}%", "WARNING")
+        return evicted
+
+    def _run_point(self, queue_depth, read_ratio, label):
+        """以指定队列深度和读写比例运行一个测试点"""
+        evicted = self._evict() if not self.direct else None
+        deadline = time.perf_counter() + self.duration
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=queue_depth) as pool:
+            futures = [pool.submit(self._worker, i, read_ratio, deadline) for i in range(queue_depth)]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start_time
+
+        reads = sum(r for r, _ in results)
+        writes = sum(w for _, w in results)
+        ops = reads + writes
+        iops = ops / elapsed if elapsed > 0 else 0
+        mb_s = iops * self.block_size / (1024 * 1024)
+
+        point = {
+            "pattern": label,
+            "queue_depth": queue_depth,
+            "read_ratio": read_ratio,
+            "block_size": self.block_size,
+            "read_ops": reads,
+            "write_ops": writes,
+            "iops": round(iops, 1),
+            "mb_s": round(mb_s, 2),
+        }
+        if evicted is not None:
+            point["cache_evicted"] = evicted
+        self.metrics["random_io"].append(point)
+        self.logger.log_message(f"QD{queue_depth:<3} {label:<6}: {iops:10.1f} IOPS  {mb_s:8.2f} MB/s")
+        return point
+
+    def run(self):
+        self.logger.log_message(
+            f"开始随机I/O测试（块大小 {self.block_size // 1024}KB，队列深度 1/{self.queue_depth}，"
+            f"每项 {self.duration} 秒）..."
+        )
+
+        try:
+            self._prepare_region()
+        except Exception as e:
+            self.logger.log_message(f"❌ 预分配测试区域失败: {e}", "ERROR")
+            self._cleanup_test_files()
+            return False
+
+        patterns = [
+            ("随机读", 1.0),
+            ("随机写", 0.0),
+            (f"混合{int(self.read_ratio * 100)}%读", self.read_ratio),
+        ]
+        queue_depths = sorted({1, self.queue_depth})
+
+        success = True
+        try:
+            for queue_depth in queue_depths:
+                for label, read_ratio in patterns:
+                    self._run_point(queue_depth, read_ratio, label)
+        except Exception as e:
+            self.logger.log_message(f"❌ 随机I/O测试出错: {e}", "ERROR")
+            success = False
+
+        if success:
+            self.logger.log_message("✅ 随机I/O测试完成")
+
+        # 清理测试文件
+        self._cleanup_test_files()
+
+        return success
+
+    def _cleanup_test_files(self):
+        """按清单清理随机I/O测试生成的文件，目录已空时一并删除"""
+        try:
+            self.manifest.cleanup(self.logger, f"随机I/O测试文件")
+        except Exception as e:
+            self.logger.log_message(f"⚠️ 清理随机I/O测试文件时出错: {e}", "WARNING")
@@ -1,83 +1,174 @@
 import os
 import time
-import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 from utils.logger import Logger
-from constants import TEST_DIR_NAME, STRESS_TEST_DURATION
+from utils.cleanup_manifest import CleanupManifest
+from utils.latency_histogram import LatencyRecorder
+from utils.data_generator import PatternGenerator
+from constants import (TEST_DIR_NAME, STRESS_TEST_DURATION, STRESS_WORKERS, STRESS_WORKER_MODE,
+                       STRESS_FILE_SIZE, STRESS_FSYNC)
 
-class StressTest:
-    def __init__(self, usb_info, logger: Logger):
-        self.usb_info = usb_info
-        self.logger = logger
-        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
-        self.test_dir.mkdir(exist_ok=True)
-        self.is_running = False
+_MB = 1024 * 1024
 
-    def stress_worker(self, worker_id):
-        file_count = 0
-        while self.is_running:
-            try:
-                filename = f"stress_{worker_id}_{file_count:04d}.tmp"
-                filepath = self.test_dir / filename
 
-                # 写入
-                with open(filepath, "wb") as f:
-                    f.write(os.urandom(1024))
+def _stress_worker(test_dir, worker_id, file_size, duration, seed, fsync=True):
+    """
+    单个压力测试工作者：在 duration 秒内循环执行 写-读-删。
+    fsync 时每次写入后刷盘并丢弃该文件的页缓存，读回才会真正访问设备。
+    定义在模块级以便在进程模式下被子进程调用；计数与延迟各自记录，结束后由主进程合并。
+    """
+    drop_cache = fsync and hasattr(os, "posix_fadvise")
+    generator = PatternGenerator(seed)
+    buffer = bytearray(file_size)
+    latency = LatencyRecorder()
+    measure = latency.measure
+    stats = {"worker_id": worker_id, "operations": 0, "bytes_written": 0, "bytes_read": 0,
+             "error": None, "elapsed_s": 0.0, "latency": latency}
 
-                # 读取
-                with open(filepath, "rb") as f:
-                    f.read()
+    start = time.monotonic()
+    deadline = start + duration
+    file_count = 0
+    filepath = None
+    while time.monotonic() < deadline:
+        try:
+            filepath = Path(test_dir) / f"stress_{worker_id}_{file_count:04d}.tmp"
+            generator.fill(buffer, file_count * file_size)
+
+            # 写入
+            with measure("open"):
+                f = open(filepath, "wb", buffering=0)
+            with f:
+                with measure("write"):
+                    written = f.write(buffer)
+                if fsync:
+                    with measure("fsync"):
+                        os.fsync(f.fileno())
+                    if drop_cache:
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+            # 读取
+            with measure("open"):
+                f = open(filepath, "rb", buffering=0)
+            with f:
+                with measure("read"):
+                    read = f.readinto(buffer)
+            if read != file_size:
+                raise IOError(f"读回 {read} 字节，期望 {file_size} 字节")
 
-                # 删除
+            # 删除
+            with measure("unlink"):
                 filepath.unlink()
-                file_count += 1
 
-            except Exception as e:
-                self.logger.log_message(f"压力测试线程 {worker_id} 出错: {e}", "ERROR")
-                break
+            file_count += 1
+            stats["bytes_written"] += written
+            stats["bytes_read"] += read
+        except Exception as e:
+            stats["error"] = str(e)
+            # 只有出错时当前文件才可能残留，记入清单由主进程统一清理
+            if filepath is not None:
+                manifest = CleanupManifest(test_dir, "stress")
+                manifest.add(filepath)
+                manifest.close()
+            break
+    stats["operations"] = file_count
+    stats["elapsed_s"] = time.monotonic() - start
+    return stats
+
+
+class StressTest:
+    """
+    压力测试：多个工作者（线程或进程）并发执行 写-读-删 循环，
+    统计持续 ops/s 与 MB/s，以便真正压满设备并在不同U盘间比较。
+    """
+
+    def __init__(self, usb_info, logger: Logger, workers=STRESS_WORKERS, mode=STRESS_WORKER_MODE,
+                 file_size=STRESS_FILE_SIZE, duration=STRESS_TEST_DURATION, fsync=STRESS_FSYNC, seed=None):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"未知的工作模式: {mode}（可选: thread / process）")
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "stress")
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.file_size = file_size
+        self.duration = duration
+        self.fsync = fsync
+        self.seed = PatternGenerator(seed).seed
+        self.worker_stats = {}  # worker_id -> 统计字典
+        self.latency = LatencyRecorder()
+        self.metrics = {"seed": self.seed}
+
+    def _executor(self):
+        if self.mode == "process":
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return ThreadPoolExecutor(max_workers=self.workers)
 
     def run(self):
-        self.logger.log_message(f"开始压力测试（持续 {STRESS_TEST_DURATION} 秒）...")
-        self.is_running = True
+        mode_name = "进程" if self.mode == "process" else "线程"
+        self.logger.log_message(
+            f"开始压力测试（{self.workers} 个{mode_name}，每次 {self.file_size // 1024}KB，持续 {self.duration} 秒，"
+            f"{'每次写入后 fsync' if self.fsync else '不刷盘'}）..."
+        )
 
-        threads = []
-        for i in range(3):  # 3个并发线程
-            t = threading.Thread(target=self.stress_worker, args=(i,))
-            t.daemon = True
-            t.start()
-            threads.append(t)
+        with self._executor() as executor:
+            futures = [
+                executor.submit(_stress_worker, str(self.test_dir), i, self.file_size, self.duration, self.seed + i,
+                                self.fsync)
+                for i in range(self.workers)
+            ]
+            results = [future.result() for future in futures]
+        # 以工作者各自的实际运行时长计算吞吐，不计入进程启动开销
+        elapsed = max(stats["elapsed_s"] for stats in results)
 
-        time.sleep(STRESS_TEST_DURATION)
-        self.is_running = False
+        total_ops = total_written = total_read = 0
+        errors = 0
+        for stats in results:
+            worker_id = stats["worker_id"]
+            self.worker_stats[worker_id] = stats
+            total_ops += stats["operations"]
+            total_written += stats["bytes_written"]
+            total_read += stats["bytes_read"]
+            self.latency.merge(stats["latency"])
+            self.logger.log_message(f"压力测试{mode_name} {worker_id}: 完成 {stats['operations']} 次写-读-删循环", "DEBUG")
+            if stats["error"]:
+                errors += 1
+                self.logger.log_message(f"压力测试{mode_name} {worker_id} 出错: {stats['error']}", "ERROR")
 
-        for t in threads:
-            t.join(timeout=1)
+        ops_per_s = total_ops / elapsed if elapsed > 0 else 0
+        write_mb_s = (total_written / _MB) / elapsed if elapsed > 0 else 0
+        read_mb_s = (total_read / _MB) / elapsed if elapsed > 0 else 0
+
+        self.logger.log_message(f"✅ 压力测试完成，共执行 {total_ops} 次写-读-删循环")
+        self.logger.log_message(
+            f"持续吞吐: {ops_per_s:.1f} 次循环/秒，写入 {write_mb_s:.2f} MB/s，读取 {read_mb_s:.2f} MB/s"
+        )
+        self.latency.log_summary(self.logger, "压力测试延迟分布")
+        self.metrics.update({
+            "workers": self.workers,
+            "mode": self.mode,
+            "file_size": self.file_size,
+            "fsync": self.fsync,
+            "duration_s": round(elapsed, 2),
+            "operations": total_ops,
+            "ops_per_s": round(ops_per_s, 1),
+            "write_mb_s": round(write_mb_s, 2),
+            "read_mb_s": round(read_mb_s, 2),
+            "worker_errors": errors,
+            "latency": self.latency.summary(),
+        })
 
-        self.logger.log_message("✅ 压力测试完成")
-        
         # 清理测试文件
         self._cleanup_test_files()
-        
-        return True
+
+        return errors == 0
 
     def _cleanup_test_files(self):
-        """清理压力测试生成的所有文件"""
+        """按清单清理压力测试生成的文件，目录已空时一并删除"""
         try:
-            if self.test_dir.exists():
-                # 清理所有压力测试相关文件
-                for test_file in self.test_dir.glob("stress_*.tmp"):
-                    if test_file.is_file():
-                        test_file.unlink()
-                        self.logger.log_message(f"✅ 已清理压力测试文件: {test_file.name}")
-                
-                # 清理其他可能的临时文件
-                for temp_file in self.test_dir.glob("*.tmp"):
-                    if temp_file.is_file():
-                        temp_file.unlink()
-                        
-                # 如果目录为空，删除目录
-                if not any(self.test_dir.iterdir()):
-                    self.test_dir.rmdir()
-                    self.logger.log_message(f"✅ 已清理测试目录: {self.test_dir.name}")
+            self.manifest.cleanup(self.logger, f"压力测试文件")
         except Exception as e:
-            self.logger.log_message(f"⚠️ 清理压力测试文件时出错: {e}", "WARNING")
\ No newline at end of file
+            self.logger.log_message(f"⚠️ 清理压力测试文件时出错: {e}", "WARNING")
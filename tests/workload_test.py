@@ -0,0 +1,123 @@
+import os
+import shutil
+from pathlib import Path
+from utils.logger import Logger
+from utils.cleanup_manifest import CleanupManifest
+from utils.latency_histogram import LatencyRecorder
+from utils.workload import WorkloadEngine, load_job_file, format_size
+from constants import TEST_DIR_NAME, WORKLOAD_JOB_FILE, WORKLOAD_SPACE_RESERVE
+
+_PROGRAM_DIR = Path(__file__).resolve().parent.parent
+
+
+def resolve_job_file(job_file):
+    """相对路径先在运行目录中查找，找不到时再到程序目录中查找"""
+    path = Path(job_file)
+    if not path.is_absolute() and not path.exists() and (_PROGRAM_DIR / path).exists():
+        return _PROGRAM_DIR / path
+    return path
+
+
+class WorkloadTest:
+    """
+    自定义负载测试：按任务文件（TOML/JSON）中描述的读写比例、顺序/随机、块大小、文件数、线程数、
+    时长与刷盘策略依次执行各个任务，用来在候选U盘上复现生产环境的访问模式。
+    """
+
+    def __init__(self, usb_info, logger: Logger, job_file=WORKLOAD_JOB_FILE, seed=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.test_dir = Path(usb_info["path"]) / TEST_DIR_NAME
+        self.test_dir.mkdir(exist_ok=True)
+        self.manifest = CleanupManifest(self.test_dir, "workload")
+        self.job_file = resolve_job_file(job_file)
+        self.jobs = load_job_file(self.job_file)
+        self.seed = seed
+        self.latency = LatencyRecorder()
+        self.metrics = {"job_file": str(self.job_file), "jobs": {}}
+
+    def _describe(self, job):
+        rw = job["rw"] if job["rw"] != "mixed" else f"mixed(读 {job['read_ratio'] * 100:.0f}%)"
+        duration = f"{job['duration']:g} 秒" if job["duration"] else "完整一遍"
+        sync = job["sync"] if job["sync"] != "each" else f"每 {job['sync_every']} 次写入"
+        return (f"{rw} / {job['pattern']}，块 {format_size(job['block_size'])}，"
+                f"{job['file_count']} 个文件 × {format_size(job['file_size'])}，{job['threads']} 线程，"
+                f"{duration}，fsync: {sync}，{'绕过缓存' if job['direct'] else '缓冲I/O'}")
+
+    def _run_job(self, index, job):
+        """执行单个任务，返回是否成功"""
+        self.logger.log_message(f"任务 {job['name']}: {self._describe(job)}")
+        needed = job["file_count"] * job["file_size"] + WORKLOAD_SPACE_RESERVE
+        free = shutil.disk_usage(self.test_dir).free
+        if free < needed:
+            self.logger.log_message(
+                f"❌ 任务 {job['name']}: U盘剩余空间不足（需要 {needed / (1024 ** 3):.2f}GB，"
+                f"剩余 {free / (1024 ** 3):.2f}GB）", "ERROR"
+            )
+            self.metrics["jobs"][job["name"]] = {"error": "剩余空间不足"}
+            return False
+
+        engine = WorkloadEngine(job, os.path.join(self.test_dir, f"wl{index:02d}"), self.manifest,
+                                None if self.seed is None else self.seed + index)
+        try:
+            result = engine.run()
+        finally:
+            engine.remove_files()
+
+        for op, hist in engine.latency.histograms.items():
+            self.latency.histogram(f"{job['name']}/{op}").merge(hist)
+        result["latency"] = engine.latency.summary()
+        result["seed"] = engine.generator.seed
+        self.metrics["jobs"][job["name"]] = result
+
+        if job["direct"] and result["method"] == "buffered":
+            self.logger.log_message(
+                f"⚠️ 任务 {job['name']}: 当前文件系统不支持绕过缓存的I/O，已退回缓冲I/O，结果包含页缓存的影响", "WARNING"
+            )
+        self.logger.log_message(
+            f"任务 {job['name']}: 读取 {result['read_mb_s']:.2f} MB/s，写入 {result['write_mb_s']:.2f} MB/s，"
+            f"{result['iops']:.0f} IOPS（{result['read_ops'] + result['write_ops']} 次操作，{result['elapsed_s']:.2f} 秒）"
+        )
+        ok = True
+        for error in result["errors"]:
+            self.logger.log_message(f"❌ 任务 {job['name']} 出错: {error}", "ERROR")
+            ok = False
+        if result["verify_errors"]:
+            self.logger.log_message(f"❌ 任务 {job['name']}: {result['verify_errors']} 个数据块校验失败", "ERROR")
+            ok = False
+        return ok
+
+    def run(self):
+        self.logger.log_message(f"开始自定义负载测试（{self.job_file}，{len(self.jobs)} 个任务）...")
+        success = True
+        for index, job in enumerate(self.jobs):
+            try:
+                success &= self._run_job(index, job)
+            except Exception as e:
+                self.logger.log_message(f"❌ 任务 {job['name']} 执行异常: {e}", "ERROR")
+                self.metrics["jobs"][job["name"]] = {"error": str(e)}
+                success = False
+
+        results = {name: r for name, r in self.metrics["jobs"].items() if "iops" in r}
+        if results:
+            self.logger.log_message(f"\n=== 自定义负载测试结果 ===")
+            self.logger.log_message(f"{'任务':<24}{'读取 MB/s':>12}{'写入 MB/s':>12}{'IOPS':>12}")
+            for name, r in results.items():
+                self.logger.log_message(f"{name:<24}{r['read_mb_s']:>12.2f}{r['write_mb_s']:>12.2f}{r['iops']:>12.0f}")
+            self.latency.log_summary(self.logger, "自定义负载延迟分布")
+            self.logger.log_message(f"================")
+
+        if success:
+            self.logger.log_message("✅ 自定义负载测试完成")
+
+        # 清理测试文件
+        self._cleanup_test_files()
+
+        return success
+
+    def _cleanup_test_files(self):
+        """按清单清理自定义负载测试生成的文件，目录已空时一并删除"""
+        try:
+            self.manifest.cleanup(self.logger, "自定义负载测试文件")
+        except Exception as e:
+            self.logger.log_message(f"⚠️ 清理自定义负载测试文件时出错: {e}", "WARNING")
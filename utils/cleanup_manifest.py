@@ -0,0 +1,185 @@
+# utils/cleanup_manifest.py
+"""
+测试文件清单（manifest）
+每个测试创建文件/目录时把相对路径追加写入 U盘测试目录下自己的清单文件，
+清理时只删除清单中的条目：文件由线程池并行删除，目录按深度自底向上删除，
+不再对测试目录做 rglob / iterdir 扫描，日志中也只汇报数量而不是逐个文件输出。
+"""
+
+import os
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from constants import MANIFEST_DIR_NAME, CLEANUP_WORKERS
+
+_FILE = "f"
+_DIR = "d"
+
+
+def remove_file(path):
+    """删除单个文件，返回 (状态, 错误信息)，状态为 removed / missing / failed"""
+    try:
+        os.unlink(path)
+        return "removed", None
+    except FileNotFoundError:
+        return "missing", None
+    except OSError as e:
+        return "failed", f"{path}: {e}"
+
+
+class CleanupManifest:
+    """
+    单个测试的只追加清单，一行一条记录："f\\t相对路径" 或 "d\\t相对路径"。
+    可在多个线程中调用 add()；进程模式的工作者可以各自打开同名清单追加写入。
+    每次 add() / add_many() 的记录都立即写入操作系统，测试进程被终止时不会丢失。
+    """
+
+    def __init__(self, test_dir, name):
+        self.root = Path(test_dir)
+        self.name = name
+        self.path = self.root / MANIFEST_DIR_NAME / f"{name}.lst"
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _write(self, kind, paths):
+        lines = "".join(f"{kind}\t{os.path.relpath(p, self.root)}\n" for p in paths)
+        if not lines:
+            return
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(lines)
+            self._file.flush()  # 每批只有一次小的追加写入，相比创建文件本身可以忽略
+
+    def add(self, path):
+        """记录一个将要创建的文件（在创建之前调用，中途崩溃也能清理）"""
+        self._write(_FILE, (path,))
+
+    def add_many(self, paths):
+        self._write(_FILE, paths)
+
+    def add_dir(self, path):
+        """记录一个将要创建的目录（目录内的文件仍需单独记录）"""
+        self._write(_DIR, (path,))
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def entries(self):
+        """
+        读取清单。
+
+        Returns:
+            tuple: (文件路径列表, 目录路径列表)，已去重并转换为绝对路径。
+        """
+        files, dirs = {}, {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    kind, _, rel = line.rstrip("\n").partition("\t")
+                    if not rel:
+                        continue  # 崩溃时写了一半的行
+                    (dirs if kind == _DIR else files)[rel] = None
+        except FileNotFoundError:
+            pass
+        return [self.root / rel for rel in files], [self.root / rel for rel in dirs]
+
+    def cleanup(self, logger=None, label="测试文件", workers=CLEANUP_WORKERS):
+        """
+        删除清单中的全部条目，全部成功后删除清单本身，并尝试删除已空的测试目录。
+
+        Returns:
+            dict: files / dirs / missing / failed（失败条目说明列表）/ ok
+        """
+        self.close()
+        files, dirs = self.entries()
+        summary = {"files": 0, "dirs": 0, "missing": 0, "failed": []}
+
+        if files:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as pool:
+                for status, error in pool.map(remove_file, files, chunksize=64):
+                    if status == "removed":
+                        summary["files"] += 1
+                    elif status == "missing":
+                        summary["missing"] += 1
+                    else:
+                        summary["failed"].append(error)
+
+        # 目录自底向上删除：按路径层级从深到浅
+        for directory in sorted(dirs, key=lambda d: len(d.parts), reverse=True):
+            try:
+                directory.rmdir()
+                summary["dirs"] += 1
+            except FileNotFoundError:
+                summary["missing"] += 1
+            except OSError as e:
+                summary["failed"].append(f"{directory}: {e}")
+
+        if not summary["failed"]:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            _remove_if_empty(self.path.parent, self.root)
+
+        summary["ok"] = not summary["failed"]
+        if logger is not None and (files or dirs):
+            log_summary(logger, summary, label)
+        return summary
+
+
+def _remove_if_empty(*directories):
+    """依次尝试删除目录，非空或不存在时直接跳过（不遍历目录内容）"""
+    for directory in directories:
+        try:
+            os.rmdir(directory)
+        except FileNotFoundError:
+            continue
+        except OSError:
+            return
+
+
+def log_summary(logger, summary, label="测试文件"):
+    """输出一行清理汇总，失败时最多列出前几个失败条目"""
+    text = f"删除 {summary['files']} 个文件、{summary['dirs']} 个目录"
+    if summary["missing"]:
+        text += f"（{summary['missing']} 项已不存在）"
+    if summary["failed"]:
+        logger.log_message(f"⚠️ 清理{label}: {text}，{len(summary['failed'])} 项删除失败", "WARNING")
+        for error in summary["failed"][:5]:
+            logger.log_message(f"   {error}", "WARNING")
+    else:
+        logger.log_message(f"✅ 已清理{label}: {text}")
+
+
+def cleanup_all(test_dir, logger=None, workers=CLEANUP_WORKERS):
+    """
+    清理测试目录下所有测试的清单（只列出清单目录本身）。
+
+    Returns:
+        dict: 各清单汇总结果的合计。
+    """
+    total = {"files": 0, "dirs": 0, "missing": 0, "failed": []}
+    manifest_dir = Path(test_dir) / MANIFEST_DIR_NAME
+    try:
+        names = sorted(Path(n).stem for n in os.listdir(manifest_dir) if n.endswith(".lst"))
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        summary = CleanupManifest(test_dir, name).cleanup(workers=workers)
+        for key in ("files", "dirs", "missing"):
+            total[key] += summary[key]
+        total["failed"].extend(summary["failed"])
+    total["ok"] = not total["failed"]
+    if logger is not None and names:
+        log_summary(logger, total, f"测试清单（{len(names)} 个）")
+    return total
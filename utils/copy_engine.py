@@ -0,0 +1,177 @@
+# utils/copy_engine.py
+"""
+文件复制引擎
+提供可选择的复制策略，统一返回耗时与吞吐，便于在不同主机/文件系统上比较：
+- copy_file_range：内核内复制（同一文件系统上可能直接在设备端完成），不经过用户态
+- sendfile：内核内从文件到文件的复制（Linux）
+- pipelined：读取线程与写入线程通过有限个复用缓冲区交替工作（双缓冲），读写重叠
+- buffered：单个复用缓冲区的普通读写
+auto 按上面的顺序使用第一个当前环境支持的策略，内核策略不被支持时自动退回下一种。
+"""
+
+import os
+import sys
+import time
+import errno
+from utils.pipeline import run_pipeline
+from constants import COPY_CHUNK_SIZE, COPY_PIPELINE_DEPTH, COPY_PROGRESS_BYTES
+
+STRATEGIES = ("copy_file_range", "sendfile", "pipelined", "buffered")
+
+# 内核复制在第一次调用时返回这些错误，说明当前文件系统组合不支持（而不是I/O错误）
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                       getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+
+class _Unsupported(Exception):
+    """内核复制策略不可用（尚未写入任何数据）"""
+
+
+def available_strategies():
+    """当前平台可用的复制策略（按 auto 的优先顺序）"""
+    strategies = []
+    if hasattr(os, "copy_file_range"):
+        strategies.append("copy_file_range")
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        strategies.append("sendfile")  # 其他系统的 sendfile 只能写入套接字
+    strategies += ["pipelined", "buffered"]
+    return strategies
+
+
+class _Progress:
+    """按累计字节跨过的整数倍阈值回调进度（不依赖块大小恰好整除）"""
+
+    def __init__(self, callback, total, every):
+        self.callback = callback
+        self.total = total
+        self.every = every
+        self.copied = 0
+        self._next = every
+
+    def add(self, n):
+        self.copied += n
+        if self.callback is not None and self.copied >= self._next:
+            self._next = (self.copied // self.every + 1) * self.every
+            self.callback(self.copied, self.total)
+
+
+def _write_all(dst, view):
+    """无缓冲文件的 write 可能只写入一部分"""
+    written = 0
+    while written < len(view):
+        written += dst.write(view[written:])
+    return written
+
+
+def _kernel_copy(call, src, dst, total, chunk_size, progress):
+    """copy_file_range / sendfile 的公共循环；call(src_fd, dst_fd, offset, count) -> 复制字节数"""
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    offset = 0
+    while offset < total:
+        try:
+            n = call(src_fd, dst_fd, offset, min(chunk_size, total - offset))
+        except OSError as e:
+            if offset == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+                raise _Unsupported(e) from e
+            raise
+        if n == 0:
+            if offset == 0:
+                raise _Unsupported(OSError(errno.ENOSYS, "内核复制没有复制任何数据"))
+            break  # 源文件在复制过程中变短
+        offset += n
+        progress.add(n)
+    return offset
+
+
+def _copy_file_range(src, dst, total, chunk_size, progress):
+    return _kernel_copy(lambda s, d, off, count: os.copy_file_range(s, d, count, off, off),
+                        src, dst, total, chunk_size, progress)
+
+
+def _sendfile(src, dst, total, chunk_size, progress):
+    # 指定 offset 时按 pread 语义读取源文件，目标文件位置随写入前进
+    return _kernel_copy(lambda s, d, off, count: os.sendfile(d, s, off, count),
+                        src, dst, total, chunk_size, progress)
+
+
+def _pipelined(src, dst, total, chunk_size, progress):
+    copied = [0]
+
+    def consume(view, index):
+        n = _write_all(dst, view)
+        copied[0] += n
+        progress.add(n)
+
+    run_pipeline(lambda view, index: src.readinto(view) or 0, consume, chunk_size, depth=COPY_PIPELINE_DEPTH)
+    return copied[0]
+
+
+def _buffered(src, dst, total, chunk_size, progress):
+    view = memoryview(bytearray(chunk_size))
+    copied = 0
+    while True:
+        n = src.readinto(view)
+        if not n:
+            break
+        _write_all(dst, view[:n])
+        copied += n
+        progress.add(n)
+    return copied
+
+
+_IMPLEMENTATIONS = {
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+    "pipelined": _pipelined,
+    "buffered": _buffered,
+}
+
+
+def copy_file(src, dst, strategy="auto", chunk_size=COPY_CHUNK_SIZE, progress=None,
+              progress_every=COPY_PROGRESS_BYTES, sync=True):
+    """
+    复制单个文件（只复制内容，不复制时间戳/权限）。
+
+    Args:
+        strategy (str): auto 或 STRATEGIES 之一。
+        progress (callable | None): progress(已复制字节, 总字节)，每复制 progress_every 字节回调一次。
+        sync (bool): 结束前 fsync 目标文件，计时包含刷盘时间。
+
+    Returns:
+        dict: strategy（实际使用的策略）/ bytes / elapsed_s / throughput_mb_s
+
+    Raises:
+        ValueError: 未知策略。
+        OSError: 复制失败，或显式指定的内核策略在当前文件系统上不可用。
+    """
+    if strategy == "auto":
+        candidates = available_strategies()
+    elif strategy in _IMPLEMENTATIONS:
+        candidates = [strategy]
+    else:
+        raise ValueError(f"未知的复制策略: {strategy}（可选: auto, {', '.join(STRATEGIES)}）")
+
+    total = os.path.getsize(src)
+    with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+        for name in candidates:
+            tracker = _Progress(progress, total, progress_every)
+            start_time = time.perf_counter()
+            try:
+                copied = _IMPLEMENTATIONS[name](fsrc, fdst, total, chunk_size, tracker)
+            except _Unsupported as e:
+                if strategy != "auto":
+                    raise e.args[0] from None
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+                continue
+            if sync:
+                os.fsync(fdst.fileno())
+            elapsed = time.perf_counter() - start_time
+            return {
+                "strategy": name,
+                "bytes": copied,
+                "elapsed_s": round(elapsed, 3),
+                "throughput_mb_s": round(copied / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0,
+            }
+    raise OSError(errno.ENOSYS, "没有可用的复制策略")  # 不会到达：buffered 总是可用
@@ -0,0 +1,221 @@
+# utils/device_scheduler.py
+"""
+多设备并行测试调度器
+每台设备在独立的工作进程中运行完整的测试计划（结果、日志、异常互不影响），
+调度器负责：
+- 全局并发上限（同时测试的设备数）
+- Hub/控制器感知：同一 Hub 下同时测试的设备数受限，
+  并记录每台设备测试期间同 Hub 并发的峰值，带宽可能被挤占时在结果中标出
+- 汇总各设备的结果；工作进程崩溃时记为失败而不影响其他设备
+- 监视模式下运行期间可随时加入新插入的设备（配合 DeviceWatcher），close() 后等待进行中的测试结束
+"""
+
+import time
+import queue
+import threading
+import multiprocessing
+from collections import Counter
+
+from utils.test_runner import TestRunner
+from constants import MULTI_DEVICE_MAX_WORKERS, MULTI_DEVICE_MAX_PER_HUB
+
+
+def device_key(usb_info):
+    """设备在调度结果中的标识"""
+    return usb_info.get("drive") or usb_info.get("path")
+
+
+def hub_key(usb_info):
+    """设备所在的 Hub/控制器标识，未知时返回 None（视为独占带宽）"""
+    return usb_info.get("hub") or usb_info.get("controller")
+
+
+class _QueueLogger:
+    """工作进程中的日志器：把日志转发给调度进程统一输出"""
+
+    def __init__(self, key, result_queue):
+        self.key = key
+        self.queue = result_queue
+
+    def log_message(self, message, level="INFO"):
+        self.queue.put((self.key, "log", (message, level)))
+
+
+def _device_worker(usb_info, test_ids, result_queue, cleanup, options):
+    """工作进程入口：在本进程内运行该设备的完整测试计划"""
+    key = device_key(usb_info)
+    logger = _QueueLogger(key, result_queue)
+    try:
+        runner = TestRunner(usb_info, logger, cleanup=cleanup, options=options,
+                            listener=lambda event, data: result_queue.put((key, event, data)))
+        runner.run(test_ids)
+    except Exception as e:
+        result_queue.put((key, "error", str(e)))
+
+
+class DeviceScheduler:
+    """
+    在多台设备上并行执行同一测试计划。
+
+    listener(device, event, data) 可选，接收各设备的 test_start / test_end / run_end 等事件。
+    watch=True 时 run() 在设备全部完成后继续等待 add_device() 加入的新设备，直到调用 close()。
+    options 原样传给每台设备的 TestRunner（各测试类的额外构造参数）。
+    """
+
+    def __init__(self, devices, logger, max_workers=MULTI_DEVICE_MAX_WORKERS,
+                 max_per_hub=MULTI_DEVICE_MAX_PER_HUB, listener=None, cleanup=True, watch=False,
+                 options=None):
+        keys = [device_key(d) for d in devices]
+        if len(set(keys)) != len(keys):
+            raise ValueError("设备列表中存在重复的设备")
+        self.devices = list(devices)
+        self.logger = logger
+        self.max_workers = max(1, max_workers)
+        self.max_per_hub = max(1, max_per_hub) if max_per_hub else None
+        self.listener = listener
+        self.cleanup = cleanup
+        self.options = options or {}
+        self._incoming = queue.SimpleQueue()
+        self._closed = threading.Event()
+        if not watch:
+            self._closed.set()
+
+    def add_device(self, usb_info):
+        """运行期间加入新设备（可在任意线程调用，例如 DeviceWatcher 的监听器）"""
+        self._incoming.put(usb_info)
+
+    def close(self):
+        """不再接收新设备；run() 在进行中的测试结束后返回"""
+        self._closed.set()
+
+    def _accept_incoming(self, pending, known):
+        while True:
+            try:
+                usb_info = self._incoming.get_nowait()
+            except queue.Empty:
+                return
+            key = device_key(usb_info)
+            if key in known:
+                self.logger.log_message(f"[{key}] 设备已在本次运行中，忽略重复加入", "DEBUG")
+                continue
+            known.add(key)
+            self.devices.append(usb_info)
+            pending.append(usb_info)
+            self.logger.log_message(f"[{key}] 检测到新设备，已加入测试队列")
+
+    def _can_start(self, usb_info, hub_running, running_count):
+        if running_count >= self.max_workers:
+            return False
+        hub = hub_key(usb_info)
+        return hub is None or self.max_per_hub is None or hub_running[hub] < self.max_per_hub
+
+    def _emit(self, key, event, data):
+        if self.listener:
+            try:
+                self.listener(key, event, data)
+            except Exception as e:
+                self.logger.log_message(f"⚠️ 结果监听器出错: {e}", "WARNING")
+
+    def run(self, test_ids):
+        """
+        调度所有设备直到全部完成。
+
+        Returns:
+            dict: passed / duration_s / max_workers / max_per_hub / devices{设备: 单设备报告}
+        """
+        ctx = multiprocessing.get_context("spawn")
+        result_queue = ctx.Queue()
+        pending = list(self.devices)
+        running = {}  # key -> (进程, hub)
+        hub_running = Counter()
+        hub_peak = {}  # key -> 测试期间同 Hub 并发峰值
+        results = {}
+        start_time = time.perf_counter()
+
+        self.logger.log_message(
+            f"开始多设备并行测试: {len(self.devices)} 台设备，并发上限 {self.max_workers}，"
+            f"每个 Hub 上限 {self.max_per_hub or '不限'}"
+        )
+
+        known = {device_key(d) for d in self.devices}
+        while pending or running or not self._closed.is_set():
+            self._accept_incoming(pending, known)
+            # 1. 在并发限制内启动新的工作进程
+            for usb_info in list(pending):
+                if not self._can_start(usb_info, hub_running, len(running)):
+                    continue
+                pending.remove(usb_info)
+                key, hub = device_key(usb_info), hub_key(usb_info)
+                proc = ctx.Process(target=_device_worker, name=f"usb-test-{key}",
+                                   args=(usb_info, test_ids, result_queue, self.cleanup, self.options))
+                proc.start()
+                running[key] = (proc, hub)
+                hub_peak[key] = 1
+                if hub is not None:
+                    hub_running[hub] += 1
+                    for other, (_, other_hub) in running.items():
+                        if other_hub == hub:
+                            hub_peak[other] = max(hub_peak[other], hub_running[hub])
+                self.logger.log_message(f"[{key}] 已启动测试进程（Hub: {hub or '未知'}）")
+
+            # 2. 收集工作进程的日志与事件
+            try:
+                self._drain(result_queue, results, timeout=0.2)
+            except KeyboardInterrupt:
+                if self._closed.is_set():
+                    raise
+                self.close()
+                self.logger.log_message("停止接收新设备，等待进行中的测试结束（再次按 Ctrl+C 强制退出）", "WARNING")
+
+            # 3. 回收已结束的工作进程
+            for key, (proc, hub) in list(running.items()):
+                if proc.is_alive():
+                    continue
+                proc.join()
+                self._drain(result_queue, results, timeout=0)
+                del running[key]
+                if hub is not None:
+                    hub_running[hub] -= 1
+                if key not in results:
+                    results[key] = {"passed": False, "error": f"工作进程异常退出（退出码 {proc.exitcode}）", "tests": []}
+                    self.logger.log_message(f"[{key}] ❌ 工作进程异常退出（退出码 {proc.exitcode}）", "ERROR")
+                results[key]["hub"] = hub
+                results[key]["hub_peers_peak"] = hub_peak[key]
+                if hub_peak[key] > 1:
+                    self.logger.log_message(
+                        f"[{key}] ⚠️ 测试期间同一 Hub 上最多有 {hub_peak[key]} 台设备同时测试，吞吐数据可能受带宽挤占影响",
+                        "WARNING"
+                    )
+                self.logger.log_message(f"[{key}] 测试结束: {'通过' if results[key]['passed'] else '失败'}")
+
+        passed = all(r["passed"] for r in results.values())
+        self.logger.log_message(
+            f"多设备测试完成: {sum(r['passed'] for r in results.values())}/{len(results)} 台设备通过"
+        )
+        return {
+            "passed": passed,
+            "duration_s": round(time.perf_counter() - start_time, 2),
+            "max_workers": self.max_workers,
+            "max_per_hub": self.max_per_hub,
+            "devices": {device_key(d): results[device_key(d)] for d in self.devices},
+        }
+
+    def _drain(self, result_queue, results, timeout):
+        """处理队列中的所有消息；timeout > 0 时最多等待这么久获取第一条"""
+        block = timeout > 0
+        while True:
+            try:
+                key, event, data = result_queue.get(block, timeout) if block else result_queue.get_nowait()
+            except queue.Empty:
+                return
+            block = False
+            if event == "log":
+                message, level = data
+                self.logger.log_message(f"[{key}] {message}", level)
+                continue
+            if event == "run_end":
+                results[key] = data
+            elif event == "error":
+                results[key] = {"passed": False, "error": data, "tests": []}
+                self.logger.log_message(f"[{key}] ❌ 测试进程出错: {data}", "ERROR")
+            self._emit(key, event, data)
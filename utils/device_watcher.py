@@ -0,0 +1,270 @@
+# utils/device_watcher.py
+"""
+热插拔设备监视器
+后台线程维护一份设备清单缓存，只在系统报告设备变化时才重新枚举，
+并把新增 / 移除 / 变化的差异推送给监听器：
+- Linux：内核 uevent（netlink）通知块设备增删，/proc/self/mounts 的 POLLPRI 通知挂载变化
+- Windows：比较 GetLogicalDrives() 盘符位图（一次系统调用），位图变化时才重新枚举
+"""
+
+import os
+import select
+import logging
+import threading
+
+from constants import DEVICE_WATCH_SETTLE_S, DEVICE_WATCH_POLL_INTERVAL_S, DEVICE_WATCH_FALLBACK_RESCAN_S
+
+_log = logging.getLogger(__name__)
+
+_NETLINK_KOBJECT_UEVENT = 15
+_UEVENT_KERNEL_GROUP = 1
+
+
+def default_key(device):
+    """设备在清单中的标识"""
+    return device.get("device_path") or device.get("drive") or device.get("path")
+
+
+def default_scan():
+    """默认的设备枚举函数"""
+    from utils.usb_detector import get_detector
+    return get_detector().find_usb_drives()
+
+
+def _logical_drives():
+    """Windows 盘符位图（每一位对应一个盘符）"""
+    import ctypes
+    return ctypes.windll.kernel32.GetLogicalDrives()
+
+
+class _UeventSource:
+    """内核 uevent 套接字，只关心块设备（SUBSYSTEM=block）的事件"""
+
+    def __init__(self):
+        import socket
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, _NETLINK_KOBJECT_UEVENT)
+        self.sock.bind((0, _UEVENT_KERNEL_GROUP))
+        self.sock.setblocking(False)
+        self.events = select.POLLIN
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def drain(self):
+        relevant = False
+        while True:
+            try:
+                message = self.sock.recv(65536)
+            except BlockingIOError:
+                return relevant
+            relevant = relevant or b"\0SUBSYSTEM=block\0" in message
+
+    def close(self):
+        self.sock.close()
+
+
+class _MountsSource:
+    """挂载表变化时 /proc/self/mounts 上会出现 POLLPRI"""
+
+    def __init__(self):
+        self.fd = os.open("/proc/self/mounts", os.O_RDONLY)
+        self.events = select.POLLPRI | select.POLLERR
+
+    def fileno(self):
+        return self.fd
+
+    def drain(self):
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DeviceWatcher:
+    """
+    listener(event, device) 在监视线程中调用，event 为：
+    added / removed / changed（如插入后才完成挂载）/ error（device 为错误信息）。
+    界面等需要在主线程处理的调用方应自行转发（例如放入队列由 after() 取出）。
+    """
+
+    def __init__(self, scan=None, key=default_key, settle=DEVICE_WATCH_SETTLE_S,
+                 poll_interval=DEVICE_WATCH_POLL_INTERVAL_S, fallback_rescan=DEVICE_WATCH_FALLBACK_RESCAN_S):
+        self.scan = scan or default_scan
+        self.key = key
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.fallback_rescan = fallback_rescan
+        self.last_error = None
+        self._inventory = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._wake_r = self._wake_w = None
+        self._open_wake_pipe()
+        self._thread = None
+
+    def _open_wake_pipe(self):
+        """Linux 上监视线程阻塞在 poll() 中，通过管道唤醒"""
+        if os.name != "nt" and self._wake_r is None:
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_w, False)
+
+    def _close_wake_pipe(self):
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._wake_r = self._wake_w = None
+
+    def add_listener(self, listener, replay=True):
+        """注册监听器；replay 时先把当前清单逐个以 added 推送"""
+        with self._lock:
+            self._listeners.append(listener)
+            current = list(self._inventory.values())
+        if replay:
+            for device in current:
+                self._call(listener, "added", device)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def devices(self):
+        """当前缓存的设备清单（不会触发枚举）"""
+        with self._lock:
+            return list(self._inventory.values())
+
+    def _call(self, listener, event, device):
+        try:
+            listener(event, device)
+        except Exception:
+            _log.exception("设备监听器处理 %s 事件时出错", event)
+
+    def _notify(self, event, device):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            self._call(listener, event, device)
+
+    def refresh(self):
+        """
+        重新枚举一次并推送差异（可在任意线程调用）。
+
+        Returns:
+            tuple: (新增设备列表, 移除设备列表)
+        """
+        try:
+            found = {self.key(d): d for d in self.scan()}
+        except Exception as e:
+            self.last_error = str(e)
+            self._notify("error", str(e))
+            return [], []
+        self.last_error = None
+
+        with self._lock:
+            old, self._inventory = self._inventory, found
+        added = [d for k, d in found.items() if k not in old]
+        removed = [d for k, d in old.items() if k not in found]
+        changed = [d for k, d in found.items() if k in old and old[k] != d]
+        for device in removed:
+            self._notify("removed", device)
+        for device in added:
+            self._notify("added", device)
+        for device in changed:
+            self._notify("changed", device)
+        return added, removed
+
+    def request_refresh(self):
+        """请求监视线程尽快重新枚举（例如界面上的“刷新设备”按钮）"""
+        self._wake.set()
+        wake_w = self._wake_w
+        if wake_w is not None:
+            try:
+                os.write(wake_w, b"\0")
+            except OSError:
+                pass  # 已有未处理的唤醒请求，或监视器正在停止、管道已关闭
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._open_wake_pipe()
+            self._thread = threading.Thread(target=self._run, name="device-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self.request_refresh()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return  # 线程仍在退出中，管道留给它，避免关闭后文件描述符被复用
+            self._thread = None
+        self._close_wake_pipe()
+
+    def _run(self):
+        self.refresh()
+        if os.name == "nt":
+            self._run_drive_mask()
+        else:
+            self._run_event_sources()
+
+    def _run_drive_mask(self):
+        """Windows：盘符位图变化（或手动请求）时才重新枚举"""
+        mask = _logical_drives()
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            requested = self._wake.is_set()
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            current = _logical_drives()
+            if requested or current != mask:
+                if not requested:
+                    self._stop.wait(self.settle)  # 等盘符分配与文件系统挂载完成
+                mask = _logical_drives()
+                self.refresh()
+
+    def _open_sources(self):
+        sources = []
+        for source_cls in (_UeventSource, _MountsSource):
+            try:
+                sources.append(source_cls())
+            except OSError:
+                pass  # 容器等环境中可能无法订阅，退化为定期枚举
+        return sources
+
+    def _run_event_sources(self):
+        """Linux：阻塞等待 uevent / 挂载表变化，事件平息后统一枚举一次"""
+        sources = self._open_sources()
+        poller = select.poll()
+        handlers = {}
+        for source in sources:
+            poller.register(source.fileno(), source.events)
+            handlers[source.fileno()] = source.drain
+        poller.register(self._wake_r, select.POLLIN)
+        handlers[self._wake_r] = lambda: os.read(self._wake_r, 4096) and True
+        timeout = None if sources else self.fallback_rescan * 1000
+
+        try:
+            while not self._stop.is_set():
+                events = poller.poll(timeout)
+                if self._stop.is_set():
+                    break
+                relevant = not events  # 超时（定期枚举模式）
+                for fd, _ in events:
+                    relevant = handlers[fd]() or relevant
+                if not relevant:
+                    continue
+                # 去抖：一次插拔会产生一串事件，安静 settle 秒后再统一枚举
+                while not self._stop.is_set():
+                    events = poller.poll(self.settle * 1000)
+                    if not events:
+                        break
+                    for fd, _ in events:
+                        handlers[fd]()
+                self.refresh()
+        finally:
+            for source in sources:
+                source.close()
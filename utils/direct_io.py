@@ -0,0 +1,324 @@
+# utils/direct_io.py
+"""
+直接I/O引擎：绕过操作系统页缓存读写测试文件
+- Linux: O_DIRECT
+- Windows: CreateFileW + FILE_FLAG_NO_BUFFERING
+- macOS: fcntl(F_NOCACHE)
+均不可用时退回缓冲I/O，并通过 posix_fadvise(DONTNEED) + mincore 校验缓存是否已被逐出
+"""
+
+import io
+import os
+import sys
+import mmap
+import ctypes
+import ctypes.util
+from constants import DIRECT_IO_ALIGNMENT
+
+# Windows CreateFileW 常量
+_GENERIC_READ = 0x80000000
+_GENERIC_WRITE = 0x40000000
+_FILE_SHARE_READ = 0x00000001
+_FILE_SHARE_WRITE = 0x00000002
+_CREATE_ALWAYS = 2
+_OPEN_EXISTING = 3
+_FILE_FLAG_NO_BUFFERING = 0x20000000
+_FILE_FLAG_WRITE_THROUGH = 0x80000000
+_INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+_FSCTL_LOCK_VOLUME = 0x00090018
+_FSCTL_UNLOCK_VOLUME = 0x0009001C
+_FSCTL_DISMOUNT_VOLUME = 0x00090020
+
+# macOS fcntl 常量
+_F_NOCACHE = 48
+
+
+def align_up(value, alignment=DIRECT_IO_ALIGNMENT):
+    """向上对齐到 alignment 的整数倍"""
+    return (value + alignment - 1) // alignment * alignment
+
+
+def align_down(value, alignment=DIRECT_IO_ALIGNMENT):
+    """向下对齐到 alignment 的整数倍"""
+    return value // alignment * alignment
+
+
+class AlignedBuffer:
+    """页对齐的可复用缓冲区（匿名 mmap 天然按页对齐，满足 O_DIRECT 要求）"""
+
+    def __init__(self, size, alignment=DIRECT_IO_ALIGNMENT):
+        self.size = align_up(size, alignment)
+        self._map = mmap.mmap(-1, self.size)
+        self.view = memoryview(self._map)
+
+    def fill(self, data):
+        """用 data 循环填充整个缓冲区"""
+        pos = 0
+        while pos < self.size:
+            n = min(len(data), self.size - pos)
+            self.view[pos:pos + n] = data[:n]
+            pos += n
+
+    def close(self):
+        try:
+            self.view.release()
+            self._map.close()
+        except (BufferError, ValueError):
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class DirectFile:
+    """
+    以绕过页缓存的方式打开文件。
+
+    打开后 self.direct 表示是否真正绕过了缓存，self.method 记录使用的机制。
+    direct 为 False 时读写仍可进行，但调用方需要自行调用 evict_page_cache()。
+    读写长度须为 DIRECT_IO_ALIGNMENT 的整数倍，缓冲区须来自 AlignedBuffer。
+
+    mode: "r" 只读，"w" 创建/截断写入，"rw" 读写已存在的文件（用于随机I/O）。
+    direct=False 时不尝试绕过缓存，以相同的接口进行普通缓冲I/O（用于对比页缓存的影响）。
+    exclusive=True 时以 O_EXCL 打开（Linux 下块设备已挂载或被占用时打开失败，返回 EBUSY）。
+    """
+
+    def __init__(self, path, mode="r", direct=True, exclusive=False):
+        if mode not in ("r", "w", "rw"):
+            raise ValueError(f"不支持的模式: {mode}")
+        self.path = str(path)
+        self.mode = mode
+        self.use_direct = direct
+        self.exclusive = exclusive
+        self.direct = False
+        self.method = "buffered"
+        self.fd = self._open()
+        self._raw = io.FileIO(self.fd, {"r": "rb", "w": "wb", "rw": "r+b"}[mode], closefd=False)
+
+    def _open(self):
+        if os.name == "nt" and self.use_direct:
+            fd = self._open_windows_unbuffered()
+            if fd is not None:
+                return fd
+
+        flags = {
+            "r": os.O_RDONLY,
+            "w": os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+            "rw": os.O_RDWR,
+        }[self.mode]
+        flags |= getattr(os, "O_BINARY", 0)
+        if self.exclusive:
+            flags |= os.O_EXCL
+
+        o_direct = getattr(os, "O_DIRECT", 0) if self.use_direct else 0
+        if o_direct:
+            try:
+                fd = os.open(self.path, flags | o_direct, 0o644)
+                self.direct = True
+                self.method = "O_DIRECT"
+                return fd
+            except OSError:
+                pass  # 文件系统不支持 O_DIRECT（如 tmpfs），退回缓冲I/O
+
+        fd = os.open(self.path, flags, 0o644)
+        if sys.platform == "darwin" and self.use_direct:
+            try:
+                import fcntl
+                fcntl.fcntl(fd, _F_NOCACHE, 1)
+                self.direct = True
+                self.method = "F_NOCACHE"
+            except OSError:
+                pass
+        return fd
+
+    def _open_windows_unbuffered(self):
+        """Windows 下通过 CreateFileW 以无缓冲方式打开，返回 CRT 文件描述符"""
+        writing = self.mode != "r"
+        try:
+            import msvcrt
+            kernel32 = ctypes.windll.kernel32
+            kernel32.CreateFileW.restype = ctypes.c_void_p
+            kernel32.CreateFileW.argtypes = [
+                ctypes.c_wchar_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p,
+                ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p,
+            ]
+            access = {"r": _GENERIC_READ, "w": _GENERIC_WRITE, "rw": _GENERIC_READ | _GENERIC_WRITE}[self.mode]
+            disposition = _CREATE_ALWAYS if self.mode == "w" else _OPEN_EXISTING
+            flags = _FILE_FLAG_NO_BUFFERING | (_FILE_FLAG_WRITE_THROUGH if writing else 0)
+            handle = kernel32.CreateFileW(
+                self.path, access, _FILE_SHARE_READ | _FILE_SHARE_WRITE,
+                None, disposition, flags, None,
+            )
+            if handle is None or handle == _INVALID_HANDLE_VALUE:
+                return None
+            crt_flags = {"r": os.O_RDONLY, "w": os.O_WRONLY, "rw": os.O_RDWR}[self.mode] | os.O_BINARY
+            fd = msvcrt.open_osfhandle(handle, crt_flags)
+            self.direct = True
+            self.method = "FILE_FLAG_NO_BUFFERING"
+            return fd
+        except (AttributeError, OSError, ImportError):
+            return None
+
+    def write(self, view):
+        """写入整个缓冲区，返回写入字节数"""
+        total = 0
+        length = len(view)
+        while total < length:
+            n = self._raw.write(view[total:])
+            if not n:
+                raise OSError("直接I/O写入返回0字节")
+            total += n
+        return total
+
+    def readinto(self, view):
+        """读取到缓冲区，返回读取字节数（0 表示文件结束）"""
+        # FileIO.readinto 直接读入调用方缓冲区，保证对齐且无额外拷贝
+        return self._raw.readinto(view) or 0
+
+    def pread_into(self, view, offset):
+        """在指定偏移处读取到缓冲区（不移动文件指针，线程安全）"""
+        if hasattr(os, "preadv"):
+            return os.preadv(self.fd, [view], offset)
+        # Windows 无 pread：每个线程应持有独立的 DirectFile
+        os.lseek(self.fd, offset, os.SEEK_SET)
+        return self.readinto(view)
+
+    def pwrite(self, view, offset):
+        """在指定偏移处写入缓冲区（不移动文件指针，线程安全）"""
+        if hasattr(os, "pwrite"):
+            return os.pwrite(self.fd, view, offset)
+        os.lseek(self.fd, offset, os.SEEK_SET)
+        return self.write(view)
+
+    def size(self):
+        """文件或块设备的大小（字节）"""
+        return os.lseek(self.fd, 0, os.SEEK_END)
+
+    def sync(self):
+        os.fsync(self.fd)
+
+    def close(self):
+        if self.fd is not None:
+            self._raw.close()
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _volume_ioctl(fd, code):
+    import msvcrt
+    kernel32 = ctypes.windll.kernel32
+    returned = ctypes.c_uint32()
+    handle = ctypes.c_void_p(msvcrt.get_osfhandle(fd))
+    return bool(kernel32.DeviceIoControl(handle, code, None, 0, None, 0, ctypes.byref(returned), None))
+
+
+def lock_volume(fd):
+    """
+    Windows 下锁定并卸载以 \\\\.\\X: 打开的卷，之后才允许直接写入卷扇区。
+    其他平台没有等价操作，直接返回 True：调用方需要以 DirectFile(exclusive=True) 打开
+    并确认卷未挂载。
+    """
+    if os.name != "nt":
+        return True
+    try:
+        if not _volume_ioctl(fd, _FSCTL_LOCK_VOLUME):
+            # 仍有其他句柄打开时强制卸载后重试
+            _volume_ioctl(fd, _FSCTL_DISMOUNT_VOLUME)
+            return _volume_ioctl(fd, _FSCTL_LOCK_VOLUME)
+        _volume_ioctl(fd, _FSCTL_DISMOUNT_VOLUME)
+        return True
+    except (AttributeError, OSError, ImportError):
+        return False
+
+
+def unlock_volume(fd):
+    """解除 lock_volume() 的锁定，文件系统会在下次访问时自动重新挂载"""
+    if os.name != "nt":
+        return
+    try:
+        _volume_ioctl(fd, _FSCTL_UNLOCK_VOLUME)
+    except (AttributeError, OSError, ImportError):
+        pass
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int,
+                              ctypes.c_int, ctypes.c_int, ctypes.c_long]
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def resident_fraction(path):
+    """
+    通过 mincore 查询文件在页缓存中的驻留比例。
+
+    Returns:
+        float | None: 0.0~1.0 的驻留比例；平台不支持时返回 None。
+    """
+    libc = _load_libc()
+    if libc is None:
+        return None
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0.0
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        addr = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+        if addr is None or addr == ctypes.c_void_p(-1).value:
+            return None
+        try:
+            pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+            vec = (ctypes.c_ubyte * pages)()
+            if libc.mincore(addr, size, vec) != 0:
+                return None
+            resident = sum(1 for b in vec if b & 1)
+            return resident / pages
+        finally:
+            libc.munmap(addr, size)
+    finally:
+        os.close(fd)
+
+
+def evict_page_cache(path, max_resident=0.01):
+    """
+    刷盘并请求内核逐出文件的页缓存，随后校验逐出结果。
+
+    Returns:
+        tuple[bool, float | None]: (是否确认已逐出, 剩余驻留比例)。
+        无法校验（如 Windows）时返回 (False, None)。
+    """
+    fd = os.open(str(path), os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass  # 只读打开在部分平台上不允许 fsync
+        if not hasattr(os, "posix_fadvise"):
+            return False, None
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+    fraction = resident_fraction(str(path))
+    if fraction is None:
+        return False, None
+    return fraction <= max_resident, fraction
@@ -0,0 +1,228 @@
+# utils/hash_engine.py
+"""
+并行、流水线化的文件校验引擎（完整性/兼容性测试共用）
+- 大块读取并复用缓冲区，减少系统调用次数
+- 大文件通过双缓冲流水线让读取与哈希/比较计算重叠
+- 多个文件分配到线程池并行处理（hashlib / zlib 计算时会释放 GIL）
+- 分别统计设备读取速度与校验计算速度，便于判断瓶颈在设备还是校验端
+"""
+
+import os
+import time
+import zlib
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.pipeline import run_pipeline
+from utils.latency_histogram import LatencyRecorder
+from constants import HASH_ALGORITHM, HASH_BUFFER_SIZE, HASH_PIPELINE_DEPTH, HASH_WORKERS
+
+HASH_ALGORITHMS = ("sha256", "blake2b", "crc32")
+
+_MB = 1024 * 1024
+
+
+class _Crc32:
+    """与 hashlib 对象接口一致的 CRC32"""
+
+    name = "crc32"
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self):
+        return f"{self.value:08x}"
+
+
+def new_hasher(algorithm=HASH_ALGORITHM):
+    """创建指定算法的哈希对象"""
+    if algorithm == "crc32":
+        return _Crc32()
+    if algorithm in HASH_ALGORITHMS:
+        return hashlib.new(algorithm)
+    raise ValueError(f"不支持的校验算法: {algorithm}（可选: {', '.join(HASH_ALGORITHMS)}）")
+
+
+class _ThreadStats:
+    """单个工作线程的统计，结束后统一汇总，避免加锁"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.read_ns = 0
+        self.process_ns = 0
+        self.latency = LatencyRecorder()
+        self.buffer = None
+
+
+class HashEngine:
+    """文件校验引擎：scan_file() 流式处理单个文件，map() / hash_files() 在线程池中并行处理多个文件"""
+
+    def __init__(self, algorithm=HASH_ALGORITHM, buffer_size=HASH_BUFFER_SIZE,
+                 workers=HASH_WORKERS, depth=HASH_PIPELINE_DEPTH):
+        new_hasher(algorithm)  # 提前校验算法名
+        self.algorithm = algorithm
+        self.buffer_size = buffer_size
+        self.workers = max(1, workers)
+        self.depth = depth
+        self._local = threading.local()
+        self._all_stats = []
+        self._stats_lock = threading.Lock()
+        self._wall_ns = 0
+
+    def _thread_stats(self):
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            stats = self._local.stats = _ThreadStats()
+            with self._stats_lock:
+                self._all_stats.append(stats)
+        return stats
+
+    @staticmethod
+    def _read_full(f, view):
+        """尽量读满 view，返回实际读取字节数（到文件末尾时不足）"""
+        got = 0
+        while got < len(view):
+            n = f.readinto(view[got:])
+            if not n:
+                break
+            got += n
+        return got
+
+    def scan_file(self, path, consume):
+        """
+        流式读取文件并把每个数据块交给 consume 处理。
+
+        Args:
+            path: 文件路径。
+            consume (callable): consume(view, offset) -> bool | None，返回 False 时提前结束。
+
+        Returns:
+            int: 读取的字节数。
+        """
+        stats = self._thread_stats()
+        buffer_size = self.buffer_size
+        start = time.perf_counter_ns()
+        total = 0
+        with open(path, "rb", buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= buffer_size:
+                # 小文件：一次读完，复用线程自己的缓冲区，不启动流水线
+                if stats.buffer is None:
+                    stats.buffer = memoryview(bytearray(buffer_size))
+                t0 = time.perf_counter_ns()
+                total = self._read_full(f, stats.buffer)
+                t1 = time.perf_counter_ns()
+                consume(stats.buffer[:total], 0)
+                stats.read_ns += t1 - t0
+                stats.process_ns += time.perf_counter_ns() - t1
+            else:
+                def produce(view, index):
+                    t0 = time.perf_counter_ns()
+                    n = self._read_full(f, view)
+                    stats.read_ns += time.perf_counter_ns() - t0
+                    return n
+
+                def consume_chunk(view, index):
+                    nonlocal total
+                    t0 = time.perf_counter_ns()
+                    keep_going = consume(view, index * buffer_size)
+                    stats.process_ns += time.perf_counter_ns() - t0
+                    total += len(view)
+                    return keep_going
+
+                run_pipeline(produce, consume_chunk, buffer_size, depth=self.depth)
+        stats.bytes += total
+        stats.latency.record("read", time.perf_counter_ns() - start)
+        return total
+
+    def hash_file(self, path):
+        """返回文件内容的十六进制摘要"""
+        hasher = new_hasher(self.algorithm)
+        self.scan_file(path, lambda view, offset: hasher.update(view))
+        return hasher.hexdigest()
+
+    def map(self, func, items):
+        """
+        在线程池中对每个元素执行 func，按完成顺序逐个产出结果。
+        同时在途的任务最多为线程数的 2 倍，元素按需从 items 中取出，文件数很多时内存占用保持不变。
+
+        Yields:
+            tuple: (元素, 结果, 异常)，成功时异常为 None。
+        """
+        def call(item):
+            try:
+                return item, func(item), None
+            except Exception as e:
+                return item, None, e
+
+        window = self.workers * 2
+        items = iter(items)
+        start = time.perf_counter_ns()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+            try:
+                while True:
+                    for item in items:
+                        pending.add(pool.submit(call, item))
+                        if len(pending) >= window:
+                            break
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+                self._wall_ns += time.perf_counter_ns() - start
+
+    def hash_files(self, paths):
+        """
+        并行计算多个文件的摘要。
+
+        Returns:
+            dict: {路径: 摘要}，文件不存在或读取失败时为 None。
+        """
+        return {path: digest for path, digest, error in self.map(self.hash_file, paths)}
+
+    def latency(self):
+        """汇总各线程记录的单文件读取+校验延迟"""
+        merged = LatencyRecorder()
+        for stats in self._all_stats:
+            merged.merge(stats.latency)
+        return merged
+
+    def stats(self):
+        """
+        设备读取速度与校验计算速度（均按单线程累计时间计算），以及并行后的总体速度（MB/s）
+        """
+        total = sum(s.bytes for s in self._all_stats)
+        read_ns = sum(s.read_ns for s in self._all_stats)
+        process_ns = sum(s.process_ns for s in self._all_stats)
+
+        def rate(ns):
+            return round((total / _MB) / (ns / 1e9), 2) if ns > 0 else 0
+
+        return {
+            "algorithm": self.algorithm,
+            "workers": self.workers,
+            "bytes": total,
+            "device_mb_s": rate(read_ns),
+            "hash_mb_s": rate(process_ns),
+            "total_mb_s": rate(self._wall_ns),
+        }
+
+    def log_summary(self, logger, title="文件校验"):
+        stats = self.stats()
+        if not stats["bytes"]:
+            return
+        logger.log_message(
+            f"{title}（{stats['algorithm']}，{stats['workers']} 线程）: 共 {stats['bytes'] / _MB:.2f}MB，"
+            f"设备读取 {stats['device_mb_s']:.2f} MB/s，校验计算 {stats['hash_mb_s']:.2f} MB/s，"
+            f"总体 {stats['total_mb_s']:.2f} MB/s"
+        )
+        if 0 < stats["hash_mb_s"] < stats["device_mb_s"]:
+            logger.log_message("⚠️ 校验计算速度低于设备读取速度，瓶颈在校验端而非U盘", "WARNING")
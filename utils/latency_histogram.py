@@ -0,0 +1,160 @@
+# utils/latency_histogram.py
+"""
+低开销、固定内存的延迟直方图（HDR 风格对数-线性分桶）
+每个 2 的幂区间再细分为 2^(SUB_BUCKET_BITS-1) 个线性子桶，相对误差约 1.6%，
+记录一次只需一次位运算和一次列表自增，内存占用与样本数量无关。
+"""
+
+import time
+from contextlib import contextmanager
+
+SUB_BUCKET_BITS = 7  # 每个 2 的幂区间 64 个子桶
+MAX_VALUE_BITS = 42  # 最大可记录约 73 分钟（纳秒）
+
+_HALF = 1 << (SUB_BUCKET_BITS - 1)
+_BUCKET_COUNT = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 2) * _HALF
+_MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+
+# 报告中输出的百分位
+REPORT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _bucket_index(value):
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return shift * _HALF + (value >> shift)
+
+
+def _bucket_value(index):
+    """返回桶所代表区间的中点（纳秒）"""
+    if index < (1 << SUB_BUCKET_BITS):
+        return index
+    shift = index // _HALF - 1
+    mantissa = index - shift * _HALF
+    low = mantissa << shift
+    return low + ((1 << shift) >> 1)
+
+
+class LatencyHistogram:
+    """单一操作类型的延迟直方图，单位纳秒。非线程安全：每个线程/进程各自记录后再 merge()"""
+
+    def __init__(self):
+        self.counts = [0] * _BUCKET_COUNT
+        self.total_count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def record(self, value_ns):
+        value_ns = min(max(int(value_ns), 0), _MAX_VALUE)
+        self.counts[_bucket_index(value_ns)] += 1
+        self.total_count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+        if self.min_ns is None or value_ns < self.min_ns:
+            self.min_ns = value_ns
+
+    def merge(self, other):
+        """合并另一个直方图（用于汇总多线程/多进程结果）"""
+        if other.total_count == 0:
+            return
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.total_count += other.total_count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        if self.min_ns is None or (other.min_ns is not None and other.min_ns < self.min_ns):
+            self.min_ns = other.min_ns
+
+    def percentile(self, percent):
+        """返回给定百分位（0~100）的延迟（纳秒），无样本时返回 0"""
+        if self.total_count == 0:
+            return 0
+        if percent >= 100:
+            return self.max_ns
+        target = max(1, int(self.total_count * percent / 100.0 + 0.5))
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return min(_bucket_value(index), self.max_ns)
+        return self.max_ns
+
+    def mean(self):
+        return self.total_ns / self.total_count if self.total_count else 0
+
+    def summary(self):
+        """以微秒为单位的统计摘要"""
+        result = {
+            "count": self.total_count,
+            "mean_us": round(self.mean() / 1000, 1),
+            "min_us": round((self.min_ns or 0) / 1000, 1),
+        }
+        for p in REPORT_PERCENTILES:
+            key = f"p{p:g}".replace(".", "_") + "_us"
+            result[key] = round(self.percentile(p) / 1000, 1)
+        result["max_us"] = round(self.max_ns / 1000, 1)
+        return result
+
+    def to_dict(self):
+        """紧凑的可序列化形式（只保留非零桶）"""
+        return {
+            "sub_bucket_bits": SUB_BUCKET_BITS,
+            "buckets": {i: c for i, c in enumerate(self.counts) if c},
+            "total_ns": self.total_ns,
+            "min_ns": self.min_ns,
+            "max_ns": self.max_ns,
+        }
+
+
+class LatencyRecorder:
+    """按操作类型（open / write / fsync / read / unlink ...）分别记录延迟"""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def histogram(self, op):
+        hist = self.histograms.get(op)
+        if hist is None:
+            hist = self.histograms[op] = LatencyHistogram()
+        return hist
+
+    def record(self, op, value_ns):
+        self.histogram(op).record(value_ns)
+
+    @contextmanager
+    def measure(self, op):
+        """计时上下文：with recorder.measure("write"): f.write(data)"""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.histogram(op).record(time.perf_counter_ns() - start)
+
+    def merge(self, other):
+        for op, hist in other.histograms.items():
+            self.histogram(op).merge(hist)
+
+    def summary(self):
+        return {op: hist.summary() for op, hist in self.histograms.items()}
+
+    def log_summary(self, logger, title="延迟分布"):
+        """以表格形式输出各操作的延迟百分位（微秒）"""
+        if not self.histograms:
+            return
+        header = f"{'操作':<8}{'次数':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>12}"
+        logger.log_message(f"--- {title}（微秒） ---")
+        logger.log_message(header)
+        for op, hist in self.histograms.items():
+            if not hist.total_count:
+                continue
+            logger.log_message(
+                f"{op:<8}{hist.total_count:>10}"
+                f"{hist.percentile(50) / 1000:>10.1f}{hist.percentile(90) / 1000:>10.1f}"
+                f"{hist.percentile(99) / 1000:>10.1f}{hist.percentile(99.9) / 1000:>10.1f}"
+                f"{hist.max_ns / 1000:>12.1f}"
+            )
@@ -1,16 +1,22 @@
 # utils/logger.py
-import tkinter as tk
+import os
 import logging
+from collections import deque
 from datetime import datetime
+from constants import LOG_DIR, LOG_FLUSH_INTERVAL_MS, LOG_MAX_VISIBLE_LINES
 
 
 class Logger:
     """
-    自定义日志记录器，用于在GUI中显示日志信息。
+    自定义日志记录器，用于在GUI中显示日志信息；
+    不传入 text_widget 时只输出到控制台（命令行/无界面模式，不需要 tkinter）。
+    调用 start_file_log() 后完整日志同时写入文件。
     """
 
     def __init__(self, text_widget=None):
         self.text_widget = text_widget
+        self.file_handler = None
+        self.text_handler = None
 
         # 配置日志格式
         self.formatter = logging.Formatter('%(asctime)s [%(levelname)s]: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
@@ -27,30 +33,82 @@ class Logger:
         if not self.logger.handlers:
             self.logger.addHandler(console_handler)
             if self.text_widget:
-                gui_handler = self.TextHandler(self.text_widget)
-                gui_handler.setFormatter(self.formatter)
-                self.logger.addHandler(gui_handler)
+                self.text_handler = self.TextHandler(self.text_widget)
+                self.text_handler.setFormatter(self.formatter)
+                self.logger.addHandler(self.text_handler)
 
     class TextHandler(logging.Handler):
-        """自定义日志处理器，将日志输出到tk.Text组件"""
+        """
+        自定义日志处理器，将日志输出到tk.Text组件。
+        emit() 只把日志放入有界缓冲区（可在任意线程调用），
+        界面线程按固定帧率一次性取出并批量插入，日志框最多保留 max_lines 行。
+        """
 
-        def __init__(self, text_widget):
+        def __init__(self, text_widget, interval_ms=LOG_FLUSH_INTERVAL_MS, max_lines=LOG_MAX_VISIBLE_LINES):
             super().__init__()
             self.text_widget = text_widget
+            self.interval_ms = interval_ms
+            self.max_lines = max_lines
+            self.pending = deque(maxlen=max_lines)  # 超出部分反正不会显示，直接丢弃最旧的
+            self.dropped = 0
+            # 必须在主线程中创建：启动界面刷新循环
+            self.text_widget.after(self.interval_ms, self.flush_pending)
 
         def emit(self, record):
             msg = self.format(record)
-            # 确保在主线程中更新GUI
-            self.text_widget.after(0, self.append_message, msg)
+            if len(self.pending) == self.max_lines:
+                self.dropped += 1
+            self.pending.append(msg)
 
-        def append_message(self, msg):
+        def flush_pending(self):
+            """在主线程中批量写入待显示的日志，并重新调度下一帧"""
+            import tkinter as tk
             try:
-                self.text_widget.config(state=tk.NORMAL)
-                self.text_widget.insert(tk.END, msg + '\n')
-                self.text_widget.see(tk.END)  # 自动滚动到底部
-                self.text_widget.config(state=tk.DISABLED)
+                if self.pending:
+                    lines = []
+                    if self.dropped:
+                        lines.append(f"... 省略 {self.dropped} 行日志（完整内容见日志文件）")
+                        self.dropped = 0
+                    while self.pending:
+                        lines.append(self.pending.popleft())
+
+                    self.text_widget.config(state=tk.NORMAL)
+                    self.text_widget.insert(tk.END, "\n".join(lines) + "\n")
+                    # 只保留最近 max_lines 行
+                    line_count = int(self.text_widget.index("end-1c").split(".")[0]) - 1
+                    if line_count > self.max_lines:
+                        self.text_widget.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+                    self.text_widget.see(tk.END)  # 自动滚动到底部
+                    self.text_widget.config(state=tk.DISABLED)
+                self.text_widget.after(self.interval_ms, self.flush_pending)
             except tk.TclError:
-                pass  # 避免窗口关闭后报错
+                pass  # 窗口已关闭，停止刷新
+
+        def clear(self):
+            """丢弃尚未显示的日志（界面清空日志框时调用）"""
+            self.pending.clear()
+            self.dropped = 0
+
+    def start_file_log(self, name_prefix="usb_test"):
+        """
+        开始把完整日志写入 LOG_DIR 下以时间命名的新文件（替换之前的日志文件）。
+
+        Returns:
+            str: 日志文件路径。
+        """
+        self.stop_file_log()
+        os.makedirs(LOG_DIR, exist_ok=True)
+        path = os.path.join(LOG_DIR, f"{name_prefix}_{datetime.now():%Y%m%d_%H%M%S}.log")
+        self.file_handler = logging.FileHandler(path, encoding="utf-8")
+        self.file_handler.setFormatter(self.formatter)
+        self.logger.addHandler(self.file_handler)
+        return path
+
+    def stop_file_log(self):
+        if self.file_handler:
+            self.logger.removeHandler(self.file_handler)
+            self.file_handler.close()
+            self.file_handler = None
 
     def log_message(self, message, level="INFO"):
         """
@@ -61,4 +119,4 @@ class Logger:
             level (str): 日志级别 ("INFO", "WARNING", "ERROR")。
         """
         level = getattr(logging, level.upper(), logging.INFO)
-        self.logger.log(level, message)
\ No newline at end of file
+        self.logger.log(level, message)
@@ -0,0 +1,173 @@
+# utils/mmap_bench.py
+"""
+内存映射I/O基准
+把已写好的测试文件映射到内存后逐页访问，测量缺页驱动的读写行为：
+- 顺序 / 随机逐页读取：每页只读一个字节，数据由缺页处理从设备读入
+- 脏页写入：把数据写进映射区域，再用 msync 刷回设备
+缺页次数来自 getrusage（Linux/macOS，区分主缺页）或 GetProcessMemoryInfo（Windows，仅总数）。
+"""
+
+import os
+import mmap
+import time
+import random
+from utils.direct_io import evict_page_cache
+from utils.data_generator import PatternGenerator
+from constants import PERF_MMAP_RANDOM_DURATION
+
+PAGE_SIZE = mmap.PAGESIZE
+_MB = 1024 * 1024
+_WRITE_CHUNK = 1024 * 1024
+
+
+def _windows_page_faults():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PageFaultCount
+
+
+def page_faults():
+    """
+    当前线程（不支持时为整个进程）的缺页计数。
+
+    Returns:
+        tuple: (主缺页数, 总缺页数)，无法区分或获取时对应项为 None。
+    """
+    try:
+        import resource
+    except ImportError:
+        return None, _windows_page_faults()
+    usage = resource.getrusage(getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF))
+    return usage.ru_majflt, usage.ru_majflt + usage.ru_minflt
+
+
+def _delta(before, after):
+    return after - before if before is not None and after is not None else None
+
+
+def _madvise(mapping, name):
+    advice = getattr(mmap, name, None)
+    if advice is not None and hasattr(mapping, "madvise"):
+        try:
+            mapping.madvise(advice)
+        except OSError:
+            pass
+
+
+class MmapBenchmark:
+    """在 path 的前 size 字节上运行 mmap 顺序读 / 随机读 / 脏页写"""
+
+    def __init__(self, path, size, latency=None, seed=None, random_duration=PERF_MMAP_RANDOM_DURATION):
+        self.path = str(path)
+        self.size = min(size, os.path.getsize(self.path)) // PAGE_SIZE * PAGE_SIZE
+        self.pages = self.size // PAGE_SIZE
+        self.latency = latency
+        self.generator = PatternGenerator(seed)
+        self.random_duration = random_duration
+        if self.pages == 0:
+            raise ValueError(f"测试文件太小，无法映射: {self.path}")
+
+    def _result(self, pages, elapsed, faults_before, faults_after, evicted):
+        major = _delta(faults_before[0], faults_after[0])
+        faults = _delta(faults_before[1], faults_after[1])
+        return {
+            "pages": pages,
+            "bytes": pages * PAGE_SIZE,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_mb_s": round(pages * PAGE_SIZE / _MB / elapsed, 2) if elapsed > 0 else 0,
+            "faults": faults,
+            "major_faults": major,
+            "faults_per_s": round(faults / elapsed, 1) if faults is not None and elapsed > 0 else None,
+            "cache_evicted": evicted,
+        }
+
+    def _evict(self):
+        evicted, _ = evict_page_cache(self.path)
+        return evicted
+
+    def sequential_read(self):
+        """按地址顺序逐页读取一个字节"""
+        evicted = self._evict()
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ) as m:
+            _madvise(m, "MADV_SEQUENTIAL")
+            checksum = 0
+            faults_before = page_faults()
+            start = time.perf_counter()
+            for offset in range(0, self.size, PAGE_SIZE):
+                checksum += m[offset]
+            elapsed = time.perf_counter() - start
+            faults_after = page_faults()
+        return self._result(self.pages, elapsed, faults_before, faults_after, evicted)
+
+    def random_read(self):
+        """随机逐页读取，直到达到设定时长或访问次数等于总页数"""
+        evicted = self._evict()
+        rng = random.Random(self.generator.seed)
+        hist = self.latency.histogram("mmap_fault") if self.latency is not None else None
+        clock = time.perf_counter_ns
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ) as m:
+            _madvise(m, "MADV_RANDOM")
+            checksum = 0
+            touched = 0
+            faults_before = page_faults()
+            start = time.perf_counter()
+            deadline = start + self.random_duration
+            while touched < self.pages and (touched & 255 or time.perf_counter() < deadline):
+                offset = rng.randrange(self.pages) * PAGE_SIZE
+                t0 = clock()
+                checksum += m[offset]
+                if hist is not None:
+                    hist.record(clock() - t0)
+                touched += 1
+            elapsed = time.perf_counter() - start
+            faults_after = page_faults()
+        return self._result(touched, elapsed, faults_before, faults_after, evicted)
+
+    def dirty_write(self):
+        """把种子数据写入映射区域（产生脏页），再 msync 刷回设备；吞吐按含 msync 的总耗时计算"""
+        evicted = self._evict()
+        chunk = bytearray(min(_WRITE_CHUNK, self.size))
+        with open(self.path, "r+b") as f, mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_WRITE) as m:
+            _madvise(m, "MADV_SEQUENTIAL")
+            faults_before = page_faults()
+            start = time.perf_counter()
+            for offset in range(0, self.size, len(chunk)):
+                n = min(len(chunk), self.size - offset)
+                self.generator.fill(memoryview(chunk)[:n], offset)
+                m[offset:offset + n] = chunk[:n]
+            dirty_done = time.perf_counter()
+            m.flush()  # msync
+            elapsed = time.perf_counter() - start
+            faults_after = page_faults()
+            if self.latency is not None:
+                self.latency.record("msync", int((elapsed - (dirty_done - start)) * 1e9))
+        result = self._result(self.pages, elapsed, faults_before, faults_after, evicted)
+        result["dirty_s"] = round(dirty_done - start, 3)
+        result["msync_s"] = round(elapsed - (dirty_done - start), 3)
+        return result
+
+    def run(self):
+        """
+        Returns:
+            dict: sequential_read / random_read / dirty_write 三项结果
+        """
+        return {
+            "size": self.size,
+            "page_size": PAGE_SIZE,
+            "sequential_read": self.sequential_read(),
+            "random_read": self.random_read(),
+            "dirty_write": self.dirty_write(),
+        }
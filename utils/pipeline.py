@@ -0,0 +1,80 @@
+# utils/pipeline.py
+"""
+双缓冲（多缓冲）流水线
+后台线程执行 produce、当前线程执行 consume，两者通过一组复用的对齐缓冲区交替工作，
+使设备 I/O 与 CPU 计算（生成数据/校验/哈希）重叠进行。
+"""
+
+import queue
+import threading
+from utils.direct_io import AlignedBuffer
+
+
+def run_pipeline(produce, consume, buffer_size, count=None, depth=2):
+    """
+    运行生产者/消费者流水线。
+
+    Args:
+        produce (callable): produce(view, index) -> int，在后台线程中填充缓冲区，
+            返回有效字节数；返回值小于 buffer_size 视为最后一块。
+        consume (callable): consume(view, index) -> bool | None，在当前线程中处理有效数据，
+            返回 False 时提前终止流水线。
+        buffer_size (int): 每个缓冲区大小。
+        count (int | None): 最多处理的块数，None 表示直到 produce 返回不足一块。
+        depth (int): 缓冲区数量（2 即双缓冲）。
+
+    Returns:
+        int: consume 处理过的块数。
+    """
+    free_q = queue.Queue()
+    full_q = queue.Queue()
+    stop = threading.Event()
+    errors = []
+    buffers = [AlignedBuffer(buffer_size) for _ in range(max(depth, 2))]
+    for buf in buffers:
+        free_q.put(buf)
+
+    def producer():
+        index = 0
+        try:
+            while count is None or index < count:
+                buf = free_q.get()
+                if buf is None or stop.is_set():
+                    break
+                n = produce(buf.view, index)
+                full_q.put((buf, index, n))
+                index += 1
+                if n < buf.size:
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            full_q.put(None)
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+
+    consumed = 0
+    try:
+        while True:
+            item = full_q.get()
+            if item is None:
+                break
+            buf, index, n = item
+            keep_going = True
+            if n > 0:
+                keep_going = consume(buf.view[:n], index) is not False
+                consumed += 1
+            free_q.put(buf)
+            if not keep_going:
+                break
+    finally:
+        stop.set()
+        free_q.put(None)  # 唤醒可能在等待空闲缓冲区的生产者
+        thread.join()
+        for buf in buffers:
+            buf.close()
+
+    if errors:
+        raise errors[0]
+    return consumed
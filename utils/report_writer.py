@@ -0,0 +1,75 @@
+# utils/report_writer.py
+"""
+结构化结果报告
+运行过程中把测试引擎的每个事件（run_start / test_start / test_end / run_end）
+立即追加写入 JSON Lines 文件并刷盘，程序崩溃时已完成的测试结果也不会丢失；
+运行结束后再原子地写出一份完整的汇总 JSON 文档，供批量分析工具直接读取。
+"""
+
+import os
+import json
+from datetime import datetime
+from constants import REPORT_FILE, REPORT_DIR, REPORT_SCHEMA_VERSION
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+class ReportWriter:
+    """
+    可直接作为 TestRunner 的 listener 使用：
+        writer = ReportWriter()
+        TestRunner(usb_info, logger, listener=writer).run(tests)
+    多设备调度时使用 device_listener 作为 DeviceScheduler 的 listener，并在结束后调用 write_summary()。
+    """
+
+    def __init__(self, directory=REPORT_DIR, name=None):
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.splitext(REPORT_FILE)[0]
+        name = name or f"{stem}_{datetime.now():%Y%m%d_%H%M%S}"
+        self.events_path = os.path.join(directory, f"{name}.jsonl")
+        self.summary_path = os.path.join(directory, f"{name}.json")
+        self._file = open(self.events_path, "a", encoding="utf-8")
+
+    def write_event(self, event, data, device=None):
+        """追加一条事件记录并立即刷盘"""
+        record = {"schema_version": REPORT_SCHEMA_VERSION, "event": event,
+                  "time": datetime.now().isoformat(timespec="milliseconds")}
+        if device is not None:
+            record["device"] = device
+        record["data"] = data
+        self._file.write(_dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def __call__(self, event, data):
+        """单设备运行的监听器：run_end 时同时写出汇总文档"""
+        self.write_event(event, data)
+        if event == "run_end":
+            self.write_summary(data)
+
+    def device_listener(self, device, event, data):
+        """多设备调度的监听器：事件带上设备标识，汇总由调用方在全部完成后写出"""
+        self.write_event(event, data, device=device)
+
+    def write_summary(self, report):
+        """先写临时文件再替换，保证汇总文件要么完整要么不存在"""
+        document = dict(report)
+        document.setdefault("schema_version", REPORT_SCHEMA_VERSION)
+        tmp_path = self.summary_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.summary_path)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
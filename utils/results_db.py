@@ -0,0 +1,212 @@
+# utils/results_db.py
+"""
+历史结果数据库（SQLite）
+按设备指纹（型号、序列号、容量；无序列号时改用文件系统 UUID）保存每次运行的数值指标，
+新结果写入前先与该设备及同型号设备的历史中位数比较，
+吞吐类指标低于中位数超过设定比例时标记为性能回退。
+"""
+
+import json
+import sqlite3
+import hashlib
+from statistics import median
+from datetime import datetime
+from constants import (HISTORY_DB_FILE, HISTORY_REGRESSION_MARGIN, HISTORY_MIN_SAMPLES,
+                       HISTORY_WINDOW)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    fingerprint TEXT PRIMARY KEY,
+    model TEXT,
+    serial TEXT,
+    capacity_gb REAL,
+    fs_uuid TEXT,
+    first_seen TEXT,
+    last_seen TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL REFERENCES devices(fingerprint),
+    model TEXT,
+    started_at TEXT,
+    passed INTEGER,
+    regressions TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    fingerprint TEXT NOT NULL,
+    model TEXT,
+    test_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    started_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_device ON runs(fingerprint, started_at);
+CREATE INDEX IF NOT EXISTS idx_metrics_device ON metrics(fingerprint, test_id, metric, started_at);
+CREATE INDEX IF NOT EXISTS idx_metrics_model ON metrics(model, test_id, metric, started_at);
+"""
+
+# 不作为指标保存的键（随机种子等）
+_SKIPPED_KEYS = {"seed"}
+
+
+def fingerprint_capacity(device):
+    """
+    参与指纹计算的容量（GB）。
+    有序列号时设备一定来自检测器，使用检测器报告的整盘容量（size_gb），重新格式化不会改变；
+    没有序列号时 size_gb 可能来自检测器也可能来自文件系统，统一改用文件系统容量（fs_size_gb）。
+    """
+    capacity = device.get("size_gb") if str(device.get("serial") or "").strip() else device.get("fs_size_gb")
+    return round(float(capacity), 1) if capacity else None
+
+
+def device_fingerprint(device):
+    """
+    由设备信息计算稳定的指纹；缺失的字段按空值参与计算。
+    有序列号时按 型号 + 序列号 + 整盘容量 计算，重新格式化后仍是同一设备；
+    没有序列号时只能用 型号 + 文件系统容量 + 文件系统 UUID 区分，重新格式化后会作为新设备开始新的历史。
+    """
+    serial = str(device.get("serial") or "").strip()
+    capacity = fingerprint_capacity(device)
+    parts = [
+        str(device.get("model") or "").strip(),
+        serial,
+        f"{capacity:.1f}" if capacity else "",
+        "" if serial else str(device.get("fs_uuid") or "").strip(),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def flatten_metrics(metrics, prefix=""):
+    """把嵌套的指标字典展开为 {"a.b.c": 数值}，只保留数值型标量"""
+    flat = {}
+    for key, value in metrics.items():
+        if key in _SKIPPED_KEYS:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def is_higher_better(metric):
+    """吞吐类指标（越高越好），只对这些指标做回退检测"""
+    name = metric.rsplit(".", 1)[-1]
+    return name.endswith("_mb_s") or name in ("iops", "ops_per_s")
+
+
+class ResultsDatabase:
+    """历史结果数据库"""
+
+    def __init__(self, path=HISTORY_DB_FILE, margin=HISTORY_REGRESSION_MARGIN,
+                 min_samples=HISTORY_MIN_SAMPLES, window=HISTORY_WINDOW):
+        self.path = path
+        self.margin = margin
+        self.min_samples = min_samples
+        self.window = window
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def _history(self, column, key, test_id, metric):
+        rows = self.conn.execute(
+            f"SELECT value FROM metrics WHERE {column} = ? AND test_id = ? AND metric = ? "
+            f"ORDER BY started_at DESC LIMIT ?",
+            (key, test_id, metric, self.window),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def check_regressions(self, report):
+        """
+        把一次运行的吞吐指标与该设备、同型号设备的历史中位数比较。
+
+        Returns:
+            list[dict]: scope(device/model) / test / metric / value / median / change
+        """
+        device = report.get("device", {})
+        fingerprint = device_fingerprint(device)
+        model = device.get("model")
+        flags = []
+        for test in report.get("tests", []):
+            if not test.get("passed"):
+                continue  # 与保存时一致：失败测试的指标不参与历史，也不做回退比较
+            for metric, value in flatten_metrics(test.get("metrics", {})).items():
+                if not is_higher_better(metric):
+                    continue
+                for scope, column, key in (("device", "fingerprint", fingerprint), ("model", "model", model)):
+                    if key is None:
+                        continue
+                    history = self._history(column, key, test["id"], metric)
+                    if len(history) < self.min_samples:
+                        continue
+                    baseline = median(history)
+                    if baseline > 0 and value < baseline * (1 - self.margin):
+                        flags.append({
+                            "scope": scope, "test": test["id"], "metric": metric,
+                            "value": value, "median": round(baseline, 2),
+                            "change": round(value / baseline - 1, 3),
+                        })
+        return flags
+
+    def record_run(self, report):
+        """
+        检查回退后保存一次运行的结果。
+
+        Returns:
+            list[dict]: check_regressions() 的结果。
+        """
+        flags = self.check_regressions(report)
+        device = report.get("device", {})
+        fingerprint = device_fingerprint(device)
+        model = device.get("model")
+        started_at = report.get("started_at") or datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO devices (fingerprint, model, serial, capacity_gb, fs_uuid, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(fingerprint) DO UPDATE SET last_seen = excluded.last_seen",
+                (fingerprint, model, device.get("serial"), fingerprint_capacity(device), device.get("fs_uuid"),
+                 started_at, started_at),
+            )
+            run_id = self.conn.execute(
+                "INSERT INTO runs (fingerprint, model, started_at, passed, regressions) VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, model, started_at, int(bool(report.get("passed"))),
+                 json.dumps(flags, ensure_ascii=False)),
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO metrics (run_id, fingerprint, model, test_id, metric, value, started_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, fingerprint, model, test["id"], metric, value, started_at)
+                 for test in report.get("tests", []) if test.get("passed")
+                 for metric, value in flatten_metrics(test.get("metrics", {})).items()],
+            )
+        return flags
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record_history(report, logger, path=HISTORY_DB_FILE):
+    """保存结果并输出性能回退提示，把回退列表写回 report["regressions"]"""
+    try:
+        with ResultsDatabase(path) as db:
+            flags = db.record_run(report)
+    except sqlite3.Error as e:
+        logger.log_message(f"⚠️ 保存历史结果失败: {e}", "WARNING")
+        return []
+
+    report["regressions"] = flags
+    scope_names = {"device": "该设备", "model": "同型号"}
+    for flag in flags:
+        logger.log_message(
+            f"⚠️ 性能回退: {flag['test']} 的 {flag['metric']} = {flag['value']:.2f}，"
+            f"低于{scope_names[flag['scope']]}历史中位数 {flag['median']:.2f}（{flag['change'] * 100:+.1f}%）",
+            "WARNING",
+        )
+    return flags
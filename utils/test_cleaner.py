@@ -1,12 +1,15 @@
 # utils/test_cleaner.py
 """
 全局测试文件清理工具
-确保彻底清理U盘中的所有测试文件和目录
+按各测试记录的文件清单清理U盘中的测试文件和目录，清单之外的残留再整体清理
 """
 
+import os
 import shutil
 from pathlib import Path
-from constants import TEST_DIR_NAME
+from concurrent.futures import ThreadPoolExecutor
+from utils.cleanup_manifest import cleanup_all, log_summary, remove_file
+from constants import TEST_DIR_NAME, CLEANUP_WORKERS
 
 
 class TestCleaner:
@@ -25,7 +28,7 @@ class TestCleaner:
             print(f"[{level}] {message}")
     
     def cleanup_all_test_files(self):
-        """彻底清理U盘中的所有测试文件和目录"""
+        """按测试清单清理U盘中的测试文件；清单之外仍有残留时再整体清理测试目录"""
         self.log_message("🧹 开始全局测试文件清理...")
         
         try:
@@ -35,22 +38,25 @@ class TestCleaner:
             
             self.log_message(f"正在清理目录: {self.usb_test_dir}")
             
-            # 方法1: 递归删除所有文件和子目录
-            success = self._deep_cleanup()
+            # 方法1: 只删除各测试清单中记录的文件和目录
+            success = cleanup_all(self.usb_test_dir, self.logger or self)["ok"]
             
-            if success:
-                # 方法2: 如果方法1成功，尝试删除主目录
-                try:
-                    if self.usb_test_dir.exists():
-                        if not any(self.usb_test_dir.iterdir()):
-                            self.usb_test_dir.rmdir()
-                            self.log_message(f"✅ 已彻底删除测试目录: {TEST_DIR_NAME}")
-                        else:
-                            self.log_message(f"⚠️ 测试目录仍有文件残留: {list(self.usb_test_dir.iterdir())}", "WARNING")
-                            return False
-                except Exception as e:
-                    self.log_message(f"❌ 删除测试目录失败: {e}", "ERROR")
-                    return False
+            # 方法2: 尝试删除主目录；非空说明有清单之外的残留（旧版本遗留或测试异常中断）
+            try:
+                os.rmdir(self.usb_test_dir)
+                self.log_message(f"✅ 已彻底删除测试目录: {TEST_DIR_NAME}")
+            except FileNotFoundError:
+                pass
+            except OSError:
+                self.log_message("测试目录中有清单之外的文件，执行目录清理...")
+                success = self._deep_cleanup()
+                if success:
+                    try:
+                        self.usb_test_dir.rmdir()
+                        self.log_message(f"✅ 已彻底删除测试目录: {TEST_DIR_NAME}")
+                    except Exception as e:
+                        self.log_message(f"❌ 删除测试目录失败: {e}", "ERROR")
+                        return False
             
             return success
             
@@ -59,32 +65,29 @@ class TestCleaner:
             return False
     
     def _deep_cleanup(self):
-        """深度递归清理"""
-        success = True
+        """深度清理（后备方案）：一次自底向上遍历，文件交给线程池删除，只汇报数量"""
+        summary = {"files": 0, "dirs": 0, "missing": 0, "failed": []}
         
         try:
-            # 获取所有子项目，按深度排序（深的在前）
-            all_items = list(self.usb_test_dir.rglob("*"))
-            all_items.sort(key=lambda x: len(str(x)), reverse=True)
+            with ThreadPoolExecutor(max_workers=CLEANUP_WORKERS) as pool:
+                for root, dirnames, filenames in os.walk(self.usb_test_dir, topdown=False):
+                    results = pool.map(remove_file, [os.path.join(root, name) for name in filenames])
+                    for status, error in results:
+                        if status == "removed":
+                            summary["files"] += 1
+                        elif status == "failed":
+                            summary["failed"].append(error)
+                    # 子目录已在之前的迭代中清空（topdown=False）
+                    for name in dirnames:
+                        path = os.path.join(root, name)
+                        try:
+                            os.rmdir(path)
+                            summary["dirs"] += 1
+                        except OSError as e:
+                            summary["failed"].append(f"{path}: {e}")
             
-            for item in all_items:
-                try:
-                    if item.is_file():
-                        item.unlink()
-                        self.log_message(f"✅ 已删除文件: {item.name}")
-                    elif item.is_dir() and item != self.usb_test_dir:
-                        # 确保目录为空后再删除
-                        if not any(item.iterdir()):
-                            item.rmdir()
-                            self.log_message(f"✅ 已删除空目录: {item.name}")
-                        else:
-                            self.log_message(f"⚠️ 目录非空，跳过: {item.name}", "WARNING")
-                            success = False
-                except Exception as e:
-                    self.log_message(f"❌ 删除项目失败 {item.name}: {e}", "ERROR")
-                    success = False
-            
-            return success
+            log_summary(self.logger or self, summary, "清单之外的残留文件")
+            return not summary["failed"]
             
         except Exception as e:
             self.log_message(f"❌ 深度清理失败: {e}", "ERROR")
@@ -0,0 +1,203 @@
+# utils/test_runner.py
+"""
+无界面测试引擎
+负责测试项注册、按顺序执行测试、汇总机器可读的结果并执行全局清理，
+不依赖 tkinter：GUI（pages/test_setup.py）与命令行（cli.py）都只是它的调用方。
+"""
+
+import os
+import sys
+import time
+import socket
+import shutil
+import platform
+import importlib
+from collections import namedtuple
+from datetime import datetime
+
+from utils.test_cleaner import TestCleaner
+from utils.usb_detector import filesystem_uuid
+from constants import REPORT_SCHEMA_VERSION
+
+
+class TestSpec(namedtuple("TestSpec", ["id", "name", "target", "extended"])):
+    """
+    id: 命令行/报告中使用的标识；name: 界面显示名称；extended: 耗时较长，默认不选。
+    target 为 "模块:类名"，测试模块在第一次执行该测试时才导入（界面/命令行启动时不加载）。
+    """
+
+    __slots__ = ()
+
+    @property
+    def cls(self):
+        module, _, class_name = self.target.partition(":")
+        return getattr(importlib.import_module(module), class_name)
+
+
+TEST_REGISTRY = {
+    spec.id: spec for spec in (
+        TestSpec("compatibility", "数据兼容性测试", "tests.compatibility_test:CompatibilityTest", False),
+        TestSpec("integrity", "数据完整性测试", "tests.integrity_test:IntegrityTest", False),
+        TestSpec("performance", "性能测试", "tests.performance_test:PerformanceTest", False),
+        TestSpec("stress", "压力测试", "tests.stress_test:StressTest", False),
+        TestSpec("stability", "稳定性测试", "tests.stability_test:StabilityTest", False),
+        TestSpec("random_io", "随机IOPS测试", "tests.random_io_test:RandomIOTest", True),
+        TestSpec("block_sweep", "块大小扫描测试", "tests.block_size_sweep_test:BlockSizeSweepTest", True),
+        TestSpec("capacity", "全盘容量校验", "tests.capacity_test:CapacityTest", True),
+        TestSpec("capacity_probe", "快速容量探测", "tests.capacity_probe_test:CapacityProbeTest", True),
+        TestSpec("metadata", "小文件元数据测试", "tests.metadata_test:MetadataTest", True),
+        TestSpec("copy", "复制策略测试", "tests.copy_test:CopyTest", True),
+        TestSpec("preallocation", "预分配写入对比测试", "tests.preallocation_test:PreallocationTest", True),
+        TestSpec("workload", "自定义负载测试", "tests.workload_test:WorkloadTest", True),
+    )
+}
+
+DEFAULT_TESTS = [spec.id for spec in TEST_REGISTRY.values() if not spec.extended]
+
+
+def resolve_tests(names):
+    """
+    把测试 id 或显示名称解析为测试 id 列表（保持给定顺序）。
+
+    Raises:
+        ValueError: 存在未知的测试项。
+    """
+    by_name = {spec.name: spec.id for spec in TEST_REGISTRY.values()}
+    resolved = []
+    for name in names:
+        test_id = name if name in TEST_REGISTRY else by_name.get(name)
+        if test_id is None:
+            raise ValueError(f"未知的测试项: {name}（可选: {', '.join(TEST_REGISTRY)}）")
+        resolved.append(test_id)
+    return resolved
+
+
+def filesystem_size_gb(path):
+    """文件系统总容量（GB），设备指纹统一使用这一来源；无法获取时返回 None"""
+    try:
+        return round(shutil.disk_usage(path).total / (1024 ** 3), 1)
+    except (OSError, TypeError):
+        return None
+
+
+def make_usb_info(path, **extra):
+    """由挂载路径构造测试所需的设备信息（命令行/脚本使用）"""
+    path = os.path.abspath(path)
+    total = shutil.disk_usage(path).total
+    usb_info = {
+        "model": os.path.basename(path.rstrip("\\/")) or path,
+        "size_gb": total / (1024 ** 3),
+        "status": "OK",
+        "drive": os.path.splitdrive(path)[0] or path,
+        "path": path,
+        "label": os.path.basename(path.rstrip("\\/")) or path,
+        "fs_uuid": filesystem_uuid(path),
+    }
+    usb_info.update(extra)
+    return usb_info
+
+
+class TestRunner:
+    """
+    按顺序执行一组测试并返回结构化结果。
+
+    listener(event, data) 可选，用于实时获取进度，事件依次为：
+    run_start / test_start / test_end / run_end。
+    options 可选，为各测试类的额外构造参数，如 {"workload": {"job_file": "jobs/x.toml"}}。
+    """
+
+    def __init__(self, usb_info, logger, listener=None, cleanup=True, options=None):
+        self.usb_info = usb_info
+        self.logger = logger
+        self.listener = listener
+        self.cleanup = cleanup
+        self.options = options or {}
+
+    def _emit(self, event, data):
+        if self.listener:
+            try:
+                self.listener(event, data)
+            except Exception as e:
+                self.logger.log_message(f"⚠️ 结果监听器出错: {e}", "WARNING")
+
+    def run_test(self, test_id):
+        """执行单个测试，返回该测试的结果字典"""
+        spec = TEST_REGISTRY[test_id]
+        result = {"id": spec.id, "name": spec.name, "passed": False, "error": None,
+                  "started_at": datetime.now().isoformat(timespec="seconds"),
+                  "duration_s": 0.0, "metrics": {}, "histograms": {}}
+        self._emit("test_start", {"id": spec.id, "name": spec.name})
+        self.logger.log_message(f"--- 开始: {spec.name} ---", "INFO")
+
+        start_time = time.perf_counter()
+        try:
+            test = spec.cls(self.usb_info, self.logger, **self.options.get(test_id, {}))
+            result["passed"] = bool(test.run())
+            result["metrics"] = getattr(test, "metrics", {})
+            latency = getattr(test, "latency", None)
+            if latency is not None:
+                # 完整的延迟直方图（非零桶），便于跨报告合并或重新计算百分位
+                result["histograms"] = {op: hist.to_dict() for op, hist in latency.histograms.items()}
+            if result["passed"]:
+                self.logger.log_message(f"✅ {spec.name} 通过", "INFO")
+            else:
+                self.logger.log_message(f"❌ {spec.name} 失败", "ERROR")
+        except Exception as e:
+            result["error"] = str(e)
+            self.logger.log_message(f"❌ {spec.name} 执行异常: {e}", "ERROR")
+        result["duration_s"] = round(time.perf_counter() - start_time, 2)
+
+        self._emit("test_end", result)
+        return result
+
+    def run(self, test_ids):
+        """
+        依次执行测试并执行全局清理。
+
+        Returns:
+            dict: schema_version / host / device / started_at / finished_at / duration_s / passed / tests / cleanup
+        """
+        test_ids = resolve_tests(test_ids)
+        report = {
+            "schema_version": REPORT_SCHEMA_VERSION,
+            "host": {
+                "hostname": socket.gethostname(),
+                "platform": platform.platform(),
+                "python": sys.version.split()[0],
+            },
+            "device": {k: v for k, v in self.usb_info.items() if isinstance(v, (str, int, float, bool))},
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "tests": [],
+        }
+        report["device"].setdefault("fs_size_gb", filesystem_size_gb(self.usb_info.get("path")))
+        self._emit("run_start", {"host": report["host"], "device": report["device"], "tests": test_ids})
+        start_time = time.perf_counter()
+
+        for test_id in test_ids:
+            report["tests"].append(self.run_test(test_id))
+
+        passed = all(t["passed"] for t in report["tests"])
+        final = "🎉 所有测试通过！" if passed else "⚠️ 部分测试失败"
+        self.logger.log_message("-" * 50, "INFO")
+        self.logger.log_message(f"测试完成: {final}", "INFO")
+
+        report["cleanup"] = self._cleanup() if self.cleanup else None
+        report["passed"] = passed
+        report["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        report["duration_s"] = round(time.perf_counter() - start_time, 2)
+        self._emit("run_end", report)
+        return report
+
+    def _cleanup(self):
+        """执行全局清理"""
+        self.logger.log_message("-" * 50, "INFO")
+        self.logger.log_message("开始全局清理...", "INFO")
+        try:
+            cleaner = TestCleaner(self.usb_info, self.logger)
+            if cleaner.complete_cleanup():
+                self.logger.log_message("🎉 全局清理完成！U盘已恢复清洁状态", "INFO")
+                return True
+            self.logger.log_message("⚠️ 全局清理部分失败，请手动检查U盘", "WARNING")
+        except Exception as e:
+            self.logger.log_message(f"❌ 全局清理出错: {e}", "ERROR")
+        return False
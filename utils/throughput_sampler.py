@@ -0,0 +1,116 @@
+# utils/throughput_sampler.py
+"""
+写入吞吐时间序列采样器
+按固定间隔记录瞬时吞吐，用于发现廉价U盘在 SLC 缓存写满后的掉速断崖，
+并给出断崖位置（已写入 GB）和断崖后的稳态速度。
+"""
+
+import time
+from array import array
+from statistics import median
+from constants import THROUGHPUT_SAMPLE_INTERVAL, THROUGHPUT_CLIFF_RATIO
+
+_MB = 1024 * 1024
+_GB = 1024 * 1024 * 1024
+
+
+class ThroughputSampler:
+    """在写入循环中调用 add()，每隔 interval 秒生成一个瞬时吞吐样本"""
+
+    def __init__(self, interval=THROUGHPUT_SAMPLE_INTERVAL):
+        self.interval = interval
+        # 紧凑存储：采样时刻（秒）、瞬时吞吐（MB/s）、累计写入量（字节）
+        self.elapsed = array("d")
+        self.speeds = array("f")
+        self.positions = array("Q")
+        self._start = self._last_time = None
+        self._total = self._last_total = 0
+
+    def start(self):
+        self._start = self._last_time = time.perf_counter()
+        self._total = self._last_total = 0
+
+    def add(self, nbytes):
+        """记录新写入的字节数，到达采样间隔时生成样本"""
+        self._total += nbytes
+        now = time.perf_counter()
+        if now - self._last_time >= self.interval:
+            self._sample(now)
+
+    def finish(self):
+        """写入结束时补记最后一个不足间隔的样本"""
+        if self._start is not None and self._total > self._last_total:
+            self._sample(time.perf_counter())
+
+    def _sample(self, now):
+        delta_t = now - self._last_time
+        delta_b = self._total - self._last_total
+        self.elapsed.append(now - self._start)
+        self.speeds.append((delta_b / _MB) / delta_t if delta_t > 0 else 0.0)
+        self.positions.append(self._total)
+        self._last_time = now
+        self._last_total = self._total
+
+    def detect_cliff(self, drop_ratio=THROUGHPUT_CLIFF_RATIO, window=5):
+        """
+        检测写入掉速断崖。
+
+        以前 1/4 样本的中位数作为初始速度、后 1/4 样本的中位数作为稳态速度；
+        稳态低于初始速度 * drop_ratio 时，取平滑后速度首次持续低于两者中点的位置为断崖点。
+
+        Returns:
+            dict: detected / cliff_gb / initial_mb_s / steady_state_mb_s
+        """
+        count = len(self.speeds)
+        result = {"detected": False, "cliff_gb": None, "initial_mb_s": None, "steady_state_mb_s": None}
+        if count < 8:
+            return result
+
+        # 滑动中位数平滑，过滤单次抖动
+        half = window // 2
+        smoothed = [median(self.speeds[max(0, i - half):i + half + 1]) for i in range(count)]
+
+        quarter = max(count // 4, 2)
+        initial = median(smoothed[1:quarter + 1])  # 跳过首个样本（包含打开文件等开销）
+        steady = median(smoothed[-quarter:])
+        result["initial_mb_s"] = round(initial, 2)
+        result["steady_state_mb_s"] = round(steady, 2)
+
+        if initial <= 0 or steady >= initial * drop_ratio:
+            return result
+
+        threshold = (initial + steady) / 2
+        for i in range(1, count):
+            if smoothed[i] < threshold and median(smoothed[i:i + window]) < threshold:
+                result["detected"] = True
+                result["cliff_gb"] = round(self.positions[i - 1] / _GB, 3)
+                break
+        return result
+
+    def to_dict(self):
+        """可序列化的时间序列"""
+        return {
+            "interval_s": self.interval,
+            "elapsed_s": [round(t, 3) for t in self.elapsed],
+            "mb_s": [round(s, 2) for s in self.speeds],
+            "gb_written": [round(p / _GB, 4) for p in self.positions],
+        }
+
+    def log_summary(self, logger, title="写入吞吐采样"):
+        if not self.speeds:
+            return
+        cliff = self.detect_cliff()
+        logger.log_message(
+            f"{title}: {len(self.speeds)} 个样本（间隔 {self.interval}s），"
+            f"峰值 {max(self.speeds):.2f} MB/s，最低 {min(self.speeds):.2f} MB/s"
+        )
+        if cliff["detected"]:
+            logger.log_message(
+                f"⚠️ 检测到写入掉速断崖: 写入 {cliff['cliff_gb']:.2f}GB 后速度由 "
+                f"{cliff['initial_mb_s']:.2f} MB/s 降至稳态 {cliff['steady_state_mb_s']:.2f} MB/s",
+                "WARNING",
+            )
+        elif cliff["initial_mb_s"] is not None:
+            logger.log_message(
+                f"未检测到写入掉速断崖（初始 {cliff['initial_mb_s']:.2f} MB/s，末段 {cliff['steady_state_mb_s']:.2f} MB/s）"
+            )
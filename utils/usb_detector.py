@@ -1,20 +1,60 @@
-import ctypes
+import os
+import re
+import logging
+from abc import ABC, abstractmethod
 from pathlib import Path
 import shutil
 from constants import DRIVE_REMOVABLE, DRIVE_FIXED, DRIVE_LETTERS
 
-class USBDetector:
-    def __init__(self):
-        pass
+
+_log = logging.getLogger(__name__)
+
+
+class BaseDetector(ABC):
+    """
+    U盘检测接口：find_usb_drives() 返回设备信息字典列表，各平台实现字段一致：
+    model / vendor / serial / size_gb / status / device_path（整盘设备，只用于标识设备）/
+    volume_path（文件系统所在的分区/卷设备，如 /dev/sdb1 或 \\\\.\\E:，直接读写卷时使用）/
+    drive / path（已挂载分区及其挂载路径，未挂载时为 None）/ filesystem /
+    free_space_gb / total_space_gb / hub / controller（供多设备调度限制同一 Hub 的并发）
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def find_usb_drives(self):
+        """返回当前插入的U盘设备信息列表"""
+
+    @staticmethod
+    def _device(**fields):
+        device = dict.fromkeys(("model", "vendor", "serial", "size_gb", "status", "device_path", "volume_path",
+                                "drive", "path", "filesystem", "free_space_gb", "total_space_gb", "hub",
+                                "controller"))
+        device.update(fields)
+        if device["path"]:
+            try:
+                usage = shutil.disk_usage(device["path"])
+                device["free_space_gb"] = round(usage.free / (1024 ** 3), 2)
+                device["total_space_gb"] = round(usage.total / (1024 ** 3), 2)
+            except OSError:
+                pass
+        return device
+
+
+class WindowsDetector(BaseDetector):
+    """Windows：WMI 枚举 USB 可移动磁盘并通过分区关联到盘符；没有 wmi 模块时退化为逐个盘符检测"""
+
+    name = "windows"
 
     def get_drive_type(self, drive_letter):
         """获取驱动器类型"""
+        import ctypes
         kernel32 = ctypes.windll.kernel32
         drive_path = f"{drive_letter}:\\"
         return kernel32.GetDriveTypeW(drive_path)
 
-    def find_usb_drives(self):
-        """查找所有U盘"""
+    def find_removable_volumes(self):
+        """逐个盘符查找可移动卷（没有硬件型号等信息）"""
         usb_drives = []
         for letter in DRIVE_LETTERS:
             drive = f"{letter}:"
@@ -26,17 +66,210 @@ class USBDetector:
             drive_type = self.get_drive_type(letter)
             if drive_type == DRIVE_REMOVABLE and letter != 'C':
                 try:
-                    usage = shutil.disk_usage(str(drive_path))
-                    free_gb = usage.free / (1024 ** 3)
-                    total_gb = usage.total / (1024 ** 3)
-
-                    usb_drives.append({
-                        "drive": drive,
-                        "path": str(drive_path),
-                        "free_space_gb": round(free_gb, 2),
-                        "total_space_gb": round(total_gb, 2)
-                    })
+                    usb_drives.append(self._device(model="Unknown", status="OK", device_path=drive,
+                                                   volume_path=f"\\\\.\\{drive}", drive=drive,
+                                                   path=str(drive_path)))
                 except Exception as e:
-                    print(f"无法访问驱动器 {drive}: {e}")
+                    _log.warning("无法访问驱动器 %s: %s", drive, e)
+
+        return usb_drives
+
+    def find_usb_drives(self):
+        """查找所有U盘"""
+        try:
+            import wmi
+            import pythoncom  # pywin32，wmi 的依赖；每个使用 COM 的线程都需要初始化
+        except ImportError:
+            return self.find_removable_volumes()
+
+        pythoncom.CoInitialize()
+        try:
+            usb_drives = []
+            for disk in wmi.WMI().Win32_DiskDrive():
+                # 判断是否为USB可移动磁盘
+                if not ((disk.MediaType and "removable" in disk.MediaType.lower()) and
+                        (disk.InterfaceType and disk.InterfaceType.lower() == "usb")):
+                    continue
+                drive = None
+                for partition in disk.associators("Win32_DiskDriveToDiskPartition"):
+                    for logical in partition.associators("Win32_LogicalDiskToPartition"):
+                        drive = logical.DeviceID  # 如 "E:"
+                        break
+                    if drive:
+                        break
+                try:
+                    size_gb = round(int(disk.Size) / (1024 ** 3), 2) if disk.Size else 0
+                except (ValueError, TypeError):
+                    size_gb = 0
+                usb_drives.append(self._device(
+                    model=disk.Model.strip() if disk.Model else "Unknown",
+                    serial=disk.SerialNumber.strip() if disk.SerialNumber else None,
+                    size_gb=size_gb,
+                    status=disk.Status or "Unknown",
+                    device_path=disk.DeviceID,  # \\.\PHYSICALDRIVEn
+                    volume_path=f"\\\\.\\{drive}" if drive else None,
+                    drive=drive,
+                    path=f"{drive}\\" if drive else None,
+                ))
+            return usb_drives
+        finally:
+            pythoncom.CoUninitialize()
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _unescape_mount(field):
+    """mountinfo 中空格等字符以八进制转义（如 \\040）"""
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), field)
+
 
-        return usb_drives
\ No newline at end of file
+class LinuxSysfsDetector(BaseDetector):
+    """
+    Linux：一次遍历 /sys/block 找出 removable=1 且挂在 USB 总线上的块设备，
+    从 sysfs 读取厂商/型号/序列号/容量与所在 Hub、控制器，
+    再按设备号与 /proc/self/mountinfo 匹配挂载点（不调用任何子进程）。
+    """
+
+    name = "linux-sysfs"
+
+    def __init__(self, sys_block="/sys/block", mountinfo="/proc/self/mountinfo"):
+        self.sys_block = sys_block
+        self.mountinfo = mountinfo
+
+    def _mounts(self):
+        """设备号 "major:minor" -> (挂载点, 文件系统类型)，同一设备取第一个挂载点"""
+        mounts = {}
+        try:
+            with open(self.mountinfo, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    fields = line.split()
+                    try:
+                        sep = fields.index("-", 6)
+                    except ValueError:
+                        continue
+                    mounts.setdefault(fields[2], (_unescape_mount(fields[4]), fields[sep + 1]))
+        except OSError:
+            pass
+        return mounts
+
+    @staticmethod
+    def _usb_topology(device_dir):
+        """
+        从块设备向上找到 USB 设备目录（含 idVendor）。
+
+        Returns:
+            tuple: (USB 设备目录, Hub, 控制器)，不是 USB 设备时返回 None。
+        """
+        path = device_dir
+        while path and path != "/sys/devices" and path != os.path.dirname(path):
+            if os.path.exists(os.path.join(path, "idVendor")):
+                break
+            path = os.path.dirname(path)
+        else:
+            return None
+        parent = os.path.dirname(path)
+        hub = os.path.basename(parent) if os.path.exists(os.path.join(parent, "idVendor")) else None
+        controller = None
+        walk = path
+        while walk and walk != os.path.dirname(walk):
+            if re.fullmatch(r"usb\d+", os.path.basename(walk)):
+                controller = os.path.basename(os.path.dirname(walk))
+                break
+            walk = os.path.dirname(walk)
+        return path, hub, controller
+
+    def find_usb_drives(self):
+        """查找所有U盘"""
+        mounts = self._mounts()
+        usb_drives = []
+        try:
+            names = sorted(os.listdir(self.sys_block))
+        except OSError:
+            return usb_drives
+
+        for name in names:
+            block = os.path.join(self.sys_block, name)
+            if _read(os.path.join(block, "removable")) != "1":
+                continue
+            topology = self._usb_topology(os.path.realpath(os.path.join(block, "device")))
+            if topology is None:
+                continue
+            usb_dir, hub, controller = topology
+
+            sectors = _read(os.path.join(block, "size"))
+            size_gb = round(int(sectors) * 512 / (1024 ** 3), 2) if sectors and sectors.isdigit() else 0
+            if size_gb == 0:
+                continue  # 读卡器等没有插入介质
+
+            # 挂载点：优先分区，其次整盘
+            candidates = []
+            with os.scandir(block) as it:
+                for entry in it:
+                    if entry.name.startswith(name) and os.path.exists(os.path.join(entry.path, "partition")):
+                        candidates.append((entry.name, _read(os.path.join(entry.path, "dev"))))
+            candidates.sort()
+            candidates.append((name, _read(os.path.join(block, "dev"))))
+            drive = mount_path = filesystem = None
+            for part_name, dev in candidates:
+                if dev in mounts:
+                    drive = f"/dev/{part_name}"
+                    mount_path, filesystem = mounts[dev]
+                    break
+
+            vendor = _read(os.path.join(block, "device", "vendor")) or _read(os.path.join(usb_dir, "manufacturer"))
+            model = _read(os.path.join(block, "device", "model")) or _read(os.path.join(usb_dir, "product"))
+            usb_drives.append(self._device(
+                model=" ".join(filter(None, (vendor, model))) or "Unknown",
+                vendor=vendor,
+                serial=_read(os.path.join(usb_dir, "serial")),
+                size_gb=size_gb,
+                status="OK" if mount_path else "未挂载",
+                device_path=f"/dev/{name}",
+                volume_path=drive,  # 挂载的分区（整盘直接格式化时即整盘）
+                drive=drive,
+                path=mount_path,
+                filesystem=filesystem,
+                hub=hub,
+                controller=controller,
+            ))
+        return usb_drives
+
+
+def get_detector():
+    """返回当前平台的U盘检测实现"""
+    return WindowsDetector() if os.name == "nt" else LinuxSysfsDetector()
+
+
+# 兼容旧代码：USBDetector().find_usb_drives()
+USBDetector = WindowsDetector if os.name == "nt" else LinuxSysfsDetector
+
+
+def filesystem_uuid(path):
+    """
+    返回挂载路径所在文件系统的 UUID / 卷序列号，获取不到时返回 None。
+    Windows 使用卷序列号；Linux 通过 /dev/disk/by-uuid 匹配设备号。
+    """
+    if os.name == "nt":
+        import ctypes
+        serial = ctypes.c_uint32()
+        root = os.path.splitdrive(os.path.abspath(path))[0] + "\\"
+        ok = ctypes.windll.kernel32.GetVolumeInformationW(
+            ctypes.c_wchar_p(root), None, 0, ctypes.byref(serial), None, None, None, 0
+        )
+        return f"{serial.value:08X}" if ok else None
+
+    by_uuid = Path("/dev/disk/by-uuid")
+    try:
+        st_dev = os.stat(path).st_dev
+        for link in by_uuid.iterdir():
+            if os.stat(link).st_rdev == st_dev:
+                return link.name
+    except OSError:
+        pass
+    return None
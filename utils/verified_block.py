@@ -0,0 +1,76 @@
+# utils/verified_block.py
+"""
+自校验数据块格式（参考 H2testw / f3）
+每个块以固定块头开始：魔数、块在整个填充区中的逻辑偏移、种子、CRC32，
+其余部分为种子生成的数据。校验时只需读出块本身即可判断：
+- 数据是否完整（CRC）
+- 数据是否来自本次测试（种子）
+- 数据是否出现在它被写入的位置（偏移，用于发现扩容盘的地址回绕）
+无需在内存中保存任何哈希值。
+"""
+
+import struct
+import zlib
+from utils.data_generator import PatternGenerator
+
+BLOCK_MAGIC = b"USBTVBLK"
+BLOCK_HEADER = struct.Struct("<8sQQI4x")  # 魔数, 偏移, 种子, CRC32, 填充 -> 32 字节
+
+# 块校验结果
+BLOCK_OK = "ok"
+BLOCK_MISSING = "missing"  # 全 0 / 全 FF：数据丢失或从未写入
+BLOCK_CORRUPT = "corrupt"  # 魔数或 CRC 错误：数据损坏
+BLOCK_STALE = "stale"  # CRC 正确但种子不同：上次测试残留的数据
+BLOCK_MISPLACED = "misplaced"  # CRC 正确但偏移不符：地址回绕/别名
+
+_EMPTY_HEADERS = (bytes(BLOCK_HEADER.size), b"\xff" * BLOCK_HEADER.size)
+
+
+class VerifiedBlockFormat:
+    """按 (种子, 逻辑偏移) 构造和校验自校验块"""
+
+    def __init__(self, seed, block_size):
+        if block_size <= BLOCK_HEADER.size:
+            raise ValueError("块大小必须大于块头大小")
+        self.generator = PatternGenerator(seed)
+        self.seed = self.generator.seed
+        self.block_size = block_size
+
+    def _crc(self, view, offset):
+        crc = zlib.crc32(BLOCK_HEADER.pack(BLOCK_MAGIC, offset, self.seed, 0))
+        return zlib.crc32(view[BLOCK_HEADER.size:self.block_size], crc)
+
+    def build(self, view, offset):
+        """在 view 的前 block_size 字节构造逻辑偏移为 offset 的块"""
+        block = view[:self.block_size]
+        self.generator.fill(block, offset)
+        BLOCK_HEADER.pack_into(block, 0, BLOCK_MAGIC, offset, self.seed, self._crc(block, offset))
+
+    def build_many(self, view, first_offset):
+        """连续构造多个块，view 长度须为 block_size 的整数倍"""
+        for pos in range(0, len(view), self.block_size):
+            self.build(view[pos:pos + self.block_size], first_offset + pos)
+
+    def check(self, view, expected_offset):
+        """
+        校验一个块。
+
+        Returns:
+            tuple[str, int | None]: (校验结果, 块头中记录的偏移)
+        """
+        block = view[:self.block_size]
+        header = bytes(block[:BLOCK_HEADER.size])
+        if header in _EMPTY_HEADERS:
+            return BLOCK_MISSING, None
+        magic, offset, seed, crc = BLOCK_HEADER.unpack(header)
+        if magic != BLOCK_MAGIC:
+            return BLOCK_CORRUPT, None
+        actual = zlib.crc32(BLOCK_HEADER.pack(BLOCK_MAGIC, offset, seed, 0))
+        actual = zlib.crc32(block[BLOCK_HEADER.size:], actual)
+        if actual != crc:
+            return BLOCK_CORRUPT, None
+        if seed != self.seed:
+            return BLOCK_STALE, offset
+        if offset != expected_offset:
+            return BLOCK_MISPLACED, offset
+        return BLOCK_OK, offset
@@ -0,0 +1,347 @@
+# utils/workload.py
+"""
+声明式负载（类似 fio 的任务文件）
+任务文件（TOML 或 JSON）描述要模拟的访问模式，通用引擎按描述执行，无需修改测试代码：
+
+    [global]                # 可选，各任务的公共默认值
+    direct = true
+
+    [[job]]
+    name = "random-4k-mixed"
+    rw = "mixed"            # read / write / mixed
+    read_ratio = 0.7        # mixed 时读操作占比
+    pattern = "random"      # sequential / random
+    block_size = "4K"
+    file_size = "256M"
+    file_count = 1
+    threads = 4
+    duration = 10           # 秒；0 表示每个文件（区域）完整处理一遍后结束
+    sync = "end"            # none / end（结束时 fsync）/ each（每 sync_every 次写入 fsync 一次）
+
+JSON 格式为 {"global": {...}, "jobs": [{...}, ...]}。
+写入的数据由 (种子, 文件号, 偏移) 决定，verify = true 时读取到的数据会与之比对。
+"""
+
+import os
+import re
+import time
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+from utils.cleanup_manifest import remove_file
+from utils.data_generator import PatternGenerator
+from utils.latency_histogram import LatencyRecorder
+from utils.direct_io import AlignedBuffer, DirectFile
+from constants import DIRECT_IO_ALIGNMENT, DIRECT_IO_BLOCK_SIZE
+
+JOB_DEFAULTS = {
+    "name": None,
+    "rw": "write",
+    "read_ratio": 0.5,
+    "pattern": "sequential",
+    "block_size": "1M",
+    "file_size": "64M",
+    "file_count": 1,
+    "threads": 1,
+    "duration": 0,
+    "sync": "end",
+    "sync_every": 1,
+    "direct": True,
+    "verify": False,
+}
+RW_MODES = ("read", "write", "mixed")
+PATTERNS = ("sequential", "random")
+SYNC_POLICIES = ("none", "end", "each")
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(value):
+    """把 4096 / "4K" / "1.5M" / "2GiB" 解析为字节数（按 1024 进制）"""
+    if isinstance(value, bool):
+        raise ValueError(f"无效的大小: {value}")
+    if isinstance(value, int):
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*", str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"无效的大小: {value}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size):
+    for unit in ("G", "M", "K"):
+        if size >= _SIZE_UNITS[unit] and size % _SIZE_UNITS[unit] == 0:
+            return f"{size // _SIZE_UNITS[unit]}{unit}B"
+    return f"{size}B"
+
+
+def _choice(job, key, allowed):
+    if job[key] not in allowed:
+        raise ValueError(f"任务 {job['name']}: {key} 必须是 {' / '.join(allowed)}，而不是 {job[key]!r}")
+
+
+def _positive_int(job, key, minimum=1):
+    value = job[key]
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ValueError(f"任务 {job['name']}: {key} 必须是不小于 {minimum} 的整数")
+
+
+def normalize_job(raw, defaults=None, index=0):
+    """
+    合并默认值并校验单个任务。
+
+    Returns:
+        dict: 完整的任务参数（大小已换算为字节，file_size 已按块大小对齐）。
+
+    Raises:
+        ValueError: 参数未知或取值无效。
+    """
+    job = dict(JOB_DEFAULTS)
+    for source in (defaults or {}, raw):
+        unknown = set(source) - set(JOB_DEFAULTS)
+        if unknown:
+            raise ValueError(f"任务 {raw.get('name') or index + 1}: 未知参数 {', '.join(sorted(unknown))}")
+        job.update(source)
+    job["name"] = str(job["name"] or f"job{index + 1}")
+
+    _choice(job, "rw", RW_MODES)
+    _choice(job, "pattern", PATTERNS)
+    _choice(job, "sync", SYNC_POLICIES)
+    for key in ("file_count", "threads", "sync_every"):
+        _positive_int(job, key)
+    job["block_size"] = parse_size(job["block_size"])
+    job["file_size"] = parse_size(job["file_size"])
+    if job["block_size"] <= 0:
+        raise ValueError(f"任务 {job['name']}: block_size 必须大于 0")
+    if job["direct"] and job["block_size"] % DIRECT_IO_ALIGNMENT:
+        raise ValueError(f"任务 {job['name']}: 绕过缓存I/O时 block_size 必须是 {DIRECT_IO_ALIGNMENT} 的整数倍")
+    if job["file_size"] < job["block_size"]:
+        raise ValueError(f"任务 {job['name']}: file_size 不能小于 block_size")
+    job["file_size"] -= job["file_size"] % job["block_size"]
+    if not 0 <= float(job["read_ratio"]) <= 1:
+        raise ValueError(f"任务 {job['name']}: read_ratio 必须在 0 到 1 之间")
+    if float(job["duration"]) < 0:
+        raise ValueError(f"任务 {job['name']}: duration 不能为负数")
+    job["read_ratio"] = float(job["read_ratio"])
+    job["duration"] = float(job["duration"])
+    job["direct"] = bool(job["direct"])
+    job["verify"] = bool(job["verify"])
+    return job
+
+
+def load_job_file(path):
+    """
+    读取任务文件（.toml 或 .json），返回校验后的任务列表。
+
+    Raises:
+        ValueError: 文件格式或任务参数无效。
+        OSError: 无法读取文件。
+    """
+    path = str(path)
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("读取 TOML 任务文件需要 Python 3.11+ 或 tomli 模块，也可以改用 JSON 格式") from None
+        with open(path, "rb") as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"任务文件格式错误 {path}: {e}") from None
+    else:
+        with open(path, encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"任务文件格式错误 {path}: {e}") from None
+
+    if isinstance(data, list):
+        data = {"jobs": data}
+    if not isinstance(data, dict):
+        raise ValueError(f"任务文件格式错误 {path}: 顶层应为表/对象")
+    unknown = set(data) - {"global", "job", "jobs"}
+    if unknown:
+        raise ValueError(f"任务文件中存在未知的段: {', '.join(sorted(unknown))}")
+    raw_jobs = data.get("job", []) + data.get("jobs", [])
+    if not raw_jobs:
+        raise ValueError(f"任务文件中没有任务: {path}")
+
+    jobs = [normalize_job(raw, data.get("global"), i) for i, raw in enumerate(raw_jobs)]
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("任务名称不能重复")
+    return jobs
+
+
+class WorkloadEngine:
+    """在 work_dir 下按任务描述创建文件并以多线程执行读写，run() 返回该任务的指标"""
+
+    def __init__(self, job, work_dir, manifest=None, seed=None):
+        self.job = job
+        self.work_dir = work_dir
+        self.manifest = manifest
+        self.generator = PatternGenerator(seed)
+        self.blocks = job["file_size"] // job["block_size"]
+        self.paths = [os.path.join(work_dir, f"{i:05d}.dat") for i in range(job["file_count"])]
+        self.latency = LatencyRecorder()
+
+    def _data_offset(self, file_index, offset):
+        """文件中某位置在种子数据流中的偏移（每个文件占用数据流中的一段）"""
+        return file_index * self.job["file_size"] + offset
+
+    def _needs_layout(self):
+        """读取和随机写入都需要先把文件完整写出；顺序写入由负载本身创建文件内容"""
+        return self.job["rw"] != "write" or self.job["pattern"] == "random"
+
+    def _layout(self):
+        """创建测试文件，返回耗时（秒）"""
+        if self.manifest is not None:
+            self.manifest.add_dir(self.work_dir)
+            self.manifest.add_many(self.paths)
+        os.makedirs(self.work_dir, exist_ok=True)
+        start_time = time.perf_counter()
+        if not self._needs_layout():
+            for path in self.paths:
+                open(path, "wb").close()
+            return time.perf_counter() - start_time
+
+        chunk_size = max(DIRECT_IO_BLOCK_SIZE - DIRECT_IO_BLOCK_SIZE % self.job["block_size"], self.job["block_size"])
+        with AlignedBuffer(chunk_size) as buf:
+            for file_index, path in enumerate(self.paths):
+                with DirectFile(path, "w", direct=self.job["direct"]) as f:
+                    for offset in range(0, self.job["file_size"], chunk_size):
+                        chunk = buf.view[:min(chunk_size, self.job["file_size"] - offset)]
+                        self.generator.fill(chunk, self._data_offset(file_index, offset))
+                        f.write(chunk)
+                    f.sync()
+        return time.perf_counter() - start_time
+
+    def _regions(self, thread_index):
+        """顺序模式下各线程负责的 (文件号, 起始块, 结束块)：文件数不少于线程数时按文件分配，否则平分文件"""
+        threads, file_count = self.job["threads"], self.job["file_count"]
+        if file_count >= threads:
+            return [(i, 0, self.blocks) for i in range(thread_index, file_count, threads)]
+        file_index = thread_index % file_count
+        sharers = list(range(file_index, threads, file_count))
+        k, m = sharers.index(thread_index), len(sharers)
+        start, end = k * self.blocks // m, (k + 1) * self.blocks // m
+        return [(file_index, start, end)] if end > start else []
+
+    def _locations(self, thread_index, rng):
+        """依次产生要访问的 (文件号, 块号)"""
+        if self.job["pattern"] == "sequential":
+            regions = self._regions(thread_index)
+            while regions:
+                for file_index, start, end in regions:
+                    for block in range(start, end):
+                        yield file_index, block
+                if not self.job["duration"]:
+                    return
+        else:
+            total = self.job["file_count"] * self.blocks
+            count = max(1, total // self.job["threads"]) if not self.job["duration"] else None
+            file_count, blocks = self.job["file_count"], self.blocks
+            while count is None or count > 0:
+                yield rng.randrange(file_count), rng.randrange(blocks)
+                if count is not None:
+                    count -= 1
+
+    def _worker(self, thread_index, deadline):
+        job = self.job
+        rng = random.Random(self.generator.seed + thread_index)
+        latency = LatencyRecorder()
+        measure = latency.measure
+        stats = {"read_ops": 0, "write_ops": 0, "read_bytes": 0, "write_bytes": 0,
+                 "verify_errors": 0, "error": None, "method": None, "latency": latency}
+        files, dirty = {}, set()
+        block_size, rw, read_ratio = job["block_size"], job["rw"], job["read_ratio"]
+        sync_each = job["sync"] == "each"
+        try:
+            with AlignedBuffer(block_size) as buf:
+                view = buf.view
+                for file_index, block in self._locations(thread_index, rng):
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        break
+                    f = files.get(file_index)
+                    if f is None:
+                        f = files[file_index] = DirectFile(self.paths[file_index], "rw", direct=job["direct"])
+                        stats["method"] = stats["method"] or f.method
+                    offset = block * block_size
+                    if rw == "read" or (rw == "mixed" and rng.random() < read_ratio):
+                        with measure("read"):
+                            n = f.pread_into(view, offset)
+                        stats["read_ops"] += 1
+                        stats["read_bytes"] += n
+                        if job["verify"] and view[:n] != self.generator.read(self._data_offset(file_index, offset), n):
+                            stats["verify_errors"] += 1
+                    else:
+                        self.generator.fill(view, self._data_offset(file_index, offset))
+                        with measure("write"):
+                            n = f.pwrite(view, offset)
+                        stats["write_ops"] += 1
+                        stats["write_bytes"] += n
+                        dirty.add(file_index)
+                        if sync_each and stats["write_ops"] % job["sync_every"] == 0:
+                            with measure("fsync"):
+                                f.sync()
+                            dirty.discard(file_index)
+                if job["sync"] != "none":
+                    for file_index in dirty:
+                        with measure("fsync"):
+                            files[file_index].sync()
+        except Exception as e:
+            stats["error"] = str(e)
+        finally:
+            for f in files.values():
+                f.close()
+        return stats
+
+    def run(self):
+        """
+        Returns:
+            dict: method（实际使用的I/O方式）/ layout_s / elapsed_s / 读写次数与字节数 / read_mb_s / write_mb_s /
+            iops / verify_errors / errors
+        """
+        job = self.job
+        layout_s = self._layout()
+        deadline = None
+        start_time = time.perf_counter()
+        if job["duration"]:
+            deadline = start_time + job["duration"]
+        with ThreadPoolExecutor(max_workers=job["threads"]) as pool:
+            futures = [pool.submit(self._worker, i, deadline) for i in range(job["threads"])]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start_time
+
+        metrics = {"read_ops": 0, "write_ops": 0, "read_bytes": 0, "write_bytes": 0, "verify_errors": 0}
+        errors = []
+        for stats in results:
+            for key in metrics:
+                metrics[key] += stats[key]
+            self.latency.merge(stats["latency"])
+            if stats["error"]:
+                errors.append(stats["error"])
+        ops = metrics["read_ops"] + metrics["write_ops"]
+        methods = sorted({stats["method"] for stats in results if stats["method"]})
+        metrics.update({
+            "method": "/".join(methods) or None,
+            "layout_s": round(layout_s, 3),
+            "elapsed_s": round(elapsed, 3),
+            "read_mb_s": round(metrics["read_bytes"] / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0,
+            "write_mb_s": round(metrics["write_bytes"] / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0,
+            "iops": round(ops / elapsed, 1) if elapsed > 0 else 0,
+            "errors": errors,
+        })
+        return metrics
+
+    def remove_files(self):
+        """删除本任务创建的文件与目录（清单中的记录留给最终清理时跳过）"""
+        for path in self.paths:
+            remove_file(path)
+        try:
+            os.rmdir(self.work_dir)
+        except OSError:
+            pass